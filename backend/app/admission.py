@@ -0,0 +1,105 @@
+import os
+import time
+import datetime
+from pymongo import ReturnDocument
+from app.database import get_database, job_key
+
+# Admission control for /submit-work, all state in Mongo so it holds across API replicas:
+#   rate limits  - fixed-window counters per job and per assigned freelancer
+#   review lease - one submission per job in the review queue at a time; an identical
+#                  concurrent submission (same content_hash) is answered with the one
+#                  already queued instead of a second review
+RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("SUBMIT_RATE_WINDOW_SECONDS", 60))
+# Submissions per window; 0 disables the limit
+SUBMIT_LIMIT_PER_JOB = int(os.getenv("SUBMIT_LIMIT_PER_JOB", 6))
+SUBMIT_LIMIT_PER_FREELANCER = int(os.getenv("SUBMIT_LIMIT_PER_FREELANCER", 20))
+# How long the lease outlives the last sign of progress: the queue renews it each time
+# the submission is claimed, reclaimed, moves stage or is requeued (see renew_review_lease),
+# so it must exceed one JUDGE_LEASE_SECONDS claim plus the wait for a worker. A lease
+# left by a submission that is no longer in the queue frees itself after this long.
+REVIEW_LEASE_SECONDS = int(os.getenv("REVIEW_LEASE_SECONDS", 900))
+# Suggested wait for a submission that finds another one under review
+REVIEW_BUSY_RETRY_SECONDS = 15
+
+
+class Throttled(Exception):
+    """The submission is refused for now; the client may retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+async def _count(key: str, limit: int, what: str):
+    if limit <= 0:
+        return
+    db = get_database()
+    now = time.time()
+    window_start = int(now // RATE_LIMIT_WINDOW_SECONDS) * RATE_LIMIT_WINDOW_SECONDS
+    window_end = window_start + RATE_LIMIT_WINDOW_SECONDS
+    counter = await db.rate_limits.find_one_and_update(
+        {"_id": f"{key}:{window_start}"},
+        # expires_at drives the TTL index (see database.py)
+        {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": datetime.datetime.fromtimestamp(window_end)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    if counter["count"] > limit:
+        raise Throttled(f"Too many submissions {what}: at most {limit} per {RATE_LIMIT_WINDOW_SECONDS}s", window_end - now)
+
+
+async def check_rate_limits(jobId: str, job: dict):
+    """Counts one submission against the job and its freelancer. Raises Throttled past either limit."""
+    await _count(f"job:{jobId}", SUBMIT_LIMIT_PER_JOB, "for this job")
+    freelancer = job.get("freelancer_address") or job.get("freelancer_name")
+    if freelancer:
+        await _count(f"freelancer:{str(freelancer).lower()}", SUBMIT_LIMIT_PER_FREELANCER, "from this freelancer")
+
+
+async def acquire_review_lease(jobId: str, submission_id, content_hash: str, chain_id: int = None):
+    """
+    Takes the job's review lease for a submission about to be queued under `submission_id`.
+    Returns None once taken, or the lease of an identical submission already queued
+    ({'submission_id', 'content_hash', 'expires_at'}) for the caller to answer with.
+    Raises Throttled when a different submission holds it.
+    """
+    db = get_database()
+    for _ in range(2):
+        now = datetime.datetime.now()
+        lease = {
+            "submission_id": submission_id,
+            "content_hash": content_hash,
+            "expires_at": now + datetime.timedelta(seconds=REVIEW_LEASE_SECONDS),
+        }
+        taken = await db.jobs.update_one(
+            {**job_key(jobId, chain_id), "$or": [{"review_lease": None}, {"review_lease.expires_at": {"$lte": now}}]},
+            {"$set": {"review_lease": lease}},
+        )
+        if taken.modified_count:
+            return None
+        job = await db.jobs.find_one(job_key(jobId, chain_id), {"review_lease": 1})
+        held = (job or {}).get("review_lease")
+        if not held:
+            continue  # released in between: try again
+        if held["content_hash"] == content_hash:
+            return held
+        raise Throttled("Another submission for this job is under review", REVIEW_BUSY_RETRY_SECONDS)
+    raise Throttled("Another submission for this job is under review", REVIEW_BUSY_RETRY_SECONDS)
+
+
+async def renew_review_lease(submission: dict):
+    """Extends the job's lease while the submission is still in the queue (no-op unless it holds the lease)."""
+    db = get_database()
+    await db.jobs.update_one(
+        {**job_key(submission["chain_job_id"], submission.get("chain_id")), "review_lease.submission_id": submission["_id"]},
+        {"$set": {"review_lease.expires_at": datetime.datetime.now() + datetime.timedelta(seconds=REVIEW_LEASE_SECONDS)}},
+    )
+
+
+async def release_review_lease(submission: dict):
+    """Frees the job for the next submission (no-op unless this submission holds the lease)."""
+    db = get_database()
+    await db.jobs.update_one(
+        {**job_key(submission["chain_job_id"], submission.get("chain_id")), "review_lease.submission_id": submission["_id"]},
+        {"$unset": {"review_lease": ""}},
+    )
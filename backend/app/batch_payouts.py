@@ -0,0 +1,208 @@
+import os
+import asyncio
+import datetime
+from bson import ObjectId
+from starlette.concurrency import run_in_threadpool
+from app.database import get_database
+from app.change_feed import jobs_changed, submission_changed
+from app import payouts
+
+# "single": one releaseFunds per PASS verdict. "batch": approved jobs are settled together.
+PAYOUT_MODE = os.getenv("PAYOUT_MODE", "single").lower()
+# A batch is sent once it has this many jobs, or when its oldest job has waited the window
+PAYOUT_BATCH_MAX_JOBS = int(os.getenv("PAYOUT_BATCH_MAX_JOBS", 20))
+PAYOUT_BATCH_WINDOW_SECONDS = float(os.getenv("PAYOUT_BATCH_WINDOW_SECONDS", 15))
+BATCH_POLL_SECONDS = 1.0
+
+# Job states on db.jobs.status while waiting for a batch
+PAYOUT_QUEUED = "PAYOUT_QUEUED"
+BATCHING = "BATCHING"
+
+
+class BatchScheduler:
+    task: asyncio.Task = None
+
+scheduler = BatchScheduler()
+
+
+def batch_mode() -> bool:
+    return PAYOUT_MODE == "batch"
+
+
+async def queue_payout(job_id: str, submission: dict) -> bool:
+    """
+    Marks an approved job for the next releaseFundsBatch, paying `submission`.
+    False if a payout for the job is already under way.
+    """
+    claimed = await payouts.claim_payout(
+        job_id, PAYOUT_QUEUED, submission.get("chain_id"),
+        approved_at=datetime.datetime.now(), payout_submission_id=str(submission["_id"]),
+    )
+    if claimed is None:
+        return False
+    # Written now rather than with the verdict: the scheduler may send the batch before the
+    # worker stores its result. Left alone if the batch already went out.
+    db = get_database()
+    result = await db.submissions.update_one(
+        {"_id": submission["_id"], "tx_hash": None}, {"$set": {"payout_status": payouts.QUEUED}}
+    )
+    if result.modified_count:
+        submission_changed(submission, {"payout_status": payouts.QUEUED})
+    await jobs_changed(job_id)
+    return True
+
+
+def _paid_submissions(jobs: list[dict]) -> dict:
+    """Filter for the submissions the queued `jobs` pay (see queue_payout)."""
+    return {"$or": [
+        {"_id": {"$in": [ObjectId(job["payout_submission_id"]) for job in jobs if job.get("payout_submission_id")]}},
+        # Jobs queued before payout_submission_id was recorded
+        {"chain_job_id": {"$in": [job["chain_job_id"] for job in jobs]}, "payout_status": payouts.QUEUED},
+    ]}
+
+
+async def requeue_stale_batches() -> int:
+    """
+    Resolves BATCHING claims older than PAYOUT_CLAIM_SECONDS (the process died before recording
+    the batch's tx hash). The batch may still have been broadcast, so each job is looked up on
+    chain first: settled jobs are marked PAID or REFUNDED, the rest go back to the queue.
+    A chain whose RPC fails is retried next round. Returns how many jobs were requeued.
+    """
+    from app.chain import aget_jobs_details
+    db = get_database()
+    cutoff = datetime.datetime.now() - datetime.timedelta(seconds=payouts.PAYOUT_CLAIM_SECONDS)
+    stale = await db.jobs.find(
+        {"status": BATCHING, "$or": [{"batch_claimed_at": {"$lt": cutoff}}, {"batch_claimed_at": None}]},
+        {"chain_job_id": 1, "chain_id": 1, "payout_submission_id": 1},
+    ).to_list(length=None)
+    by_chain = {}
+    for job in stale:
+        by_chain.setdefault(job.get("chain_id"), []).append(job)
+
+    requeued = 0
+    for chain_id, jobs in by_chain.items():
+        try:
+            onchain = await aget_jobs_details([int(job["chain_job_id"]) for job in jobs], chain_id)
+        except Exception as e:
+            print(f"⚠️ On-chain check of unfinished batch jobs (chain {chain_id or 'default'}) failed: {e}")
+            continue
+        outcomes = {"PAID": [], "REFUNDED": [], PAYOUT_QUEUED: []}
+        for job in jobs:
+            details = onchain.get(int(job["chain_job_id"]))
+            if details and details["is_settled"]:
+                outcomes["PAID" if details["is_approved"] else "REFUNDED"].append(job)
+            else:
+                outcomes[PAYOUT_QUEUED].append(job)
+
+        for status, settled in outcomes.items():
+            if not settled:
+                continue
+            await db.jobs.update_many(
+                {"_id": {"$in": [job["_id"] for job in settled]}, "status": BATCHING},
+                {"$set": {"status": status}, "$unset": {"batch_id": "", "batch_claimed_at": ""}},
+            )
+            if status == "PAID":
+                await db.submissions.update_many(_paid_submissions(settled), {"$set": {
+                    "payout_status": payouts.CONFIRMED, "payout_confirmed_at": datetime.datetime.now(),
+                }})
+            elif status == "REFUNDED":
+                await db.submissions.update_many(_paid_submissions(settled), {"$set": {
+                    "payout_status": payouts.REVERTED, "reason": "Payout failed: the job was refunded",
+                }})
+            job_ids = [job["chain_job_id"] for job in settled]
+            print(f"♻️  {len(job_ids)} jobs from an unfinished batch -> {status}: {', '.join(job_ids)}")
+            await jobs_changed(*job_ids)
+        requeued += len(outcomes[PAYOUT_QUEUED])
+    return requeued
+
+
+async def flush_batch(chain_id: int = None, force: bool = False):
+    """
+    Sends one releaseFundsBatch for the jobs queued on `chain_id` if the size or time window
+    is reached (or force=True). Returns the tx hash, or None if nothing was sent.
+    """
+    from app.chain import get_payout_sender
+    db = get_database()
+    queued = await db.jobs.find(
+        {"status": PAYOUT_QUEUED, "chain_id": chain_id}, {"chain_job_id": 1, "approved_at": 1}
+    ).sort("approved_at", 1).limit(PAYOUT_BATCH_MAX_JOBS).to_list(length=PAYOUT_BATCH_MAX_JOBS)
+    if not queued:
+        return None
+
+    waited = (datetime.datetime.now() - queued[0]["approved_at"]).total_seconds()
+    if not force and len(queued) < PAYOUT_BATCH_MAX_JOBS and waited < PAYOUT_BATCH_WINDOW_SECONDS:
+        return None
+
+    # Claim the jobs first so a second scheduler cannot send them again. The batch id tells
+    # this flush's claims from a concurrent one's; the timestamp lets a crashed flush's be requeued.
+    batch_id = str(ObjectId())
+    claim = {"batch_id": batch_id, "status": BATCHING}
+    await db.jobs.update_many(
+        {"_id": {"$in": [job["_id"] for job in queued]}, "status": PAYOUT_QUEUED},
+        {"$set": {**claim, "batch_claimed_at": datetime.datetime.now()}},
+    )
+    claimed = await db.jobs.find(claim, {"chain_job_id": 1, "payout_submission_id": 1}).to_list(length=None)
+    job_ids = [job["chain_job_id"] for job in claimed]
+    if not job_ids:
+        return None
+
+    try:
+        print(f"💸 Initiating batch payout for {len(job_ids)} jobs on chain {chain_id or 'default'}...")
+        tx_hash = await run_in_threadpool(
+            lambda: get_payout_sender(chain_id).send_release_batch([int(i) for i in job_ids])
+        )
+    except Exception as e:
+        print(f"❌ Batch Payout Error: {e}")
+        await db.jobs.update_many(claim, {"$set": {"status": PAYOUT_QUEUED}, "$unset": {"batch_id": "", "batch_claimed_at": ""}})
+        await jobs_changed(*job_ids)
+        raise
+
+    await db.jobs.update_many(claim, {"$set": {"status": "PAYING", "tx_hash": tx_hash}})
+    # Keyed on the job's paid submission, which the worker may not have completed yet
+    await db.submissions.update_many(
+        _paid_submissions(claimed), {"$set": {"payout_status": payouts.PENDING, "tx_hash": tx_hash}}
+    )
+    await jobs_changed(*job_ids)
+    return tx_hash
+
+
+async def flush_batches(force: bool = False) -> list[str]:
+    """flush_batch for every chain with queued jobs, chains in parallel. Returns the tx hashes sent."""
+    await requeue_stale_batches()
+    db = get_database()
+    chain_ids = [
+        group["_id"] async for group in
+        db.jobs.aggregate([{"$match": {"status": PAYOUT_QUEUED}}, {"$group": {"_id": "$chain_id"}}])
+    ]
+    results = await asyncio.gather(*[flush_batch(chain_id, force) for chain_id in chain_ids], return_exceptions=True)
+    for chain_id, result in zip(chain_ids, results):
+        if isinstance(result, Exception):
+            print(f"❌ Batch Scheduler Error (chain {chain_id or 'default'}): {result}")
+    return [result for result in results if isinstance(result, str)]
+
+
+async def _scheduler_loop():
+    while True:
+        try:
+            await flush_batches()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Batch Scheduler Error: {e}")
+        await asyncio.sleep(BATCH_POLL_SECONDS)
+
+
+def start_batch_scheduler():
+    """Call this on startup (no-op unless PAYOUT_MODE=batch)"""
+    if not batch_mode():
+        return
+    scheduler.task = asyncio.create_task(_scheduler_loop())
+    print(f"📦 Batch payouts on: up to {PAYOUT_BATCH_MAX_JOBS} jobs / {PAYOUT_BATCH_WINDOW_SECONDS}s")
+
+
+async def stop_batch_scheduler():
+    """Call this on shutdown"""
+    if scheduler.task:
+        scheduler.task.cancel()
+        await asyncio.gather(scheduler.task, return_exceptions=True)
+        scheduler.task = None
@@ -0,0 +1,135 @@
+import os
+import uuid
+import asyncio
+import hashlib
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from app.database import get_database
+
+# Content-addressed storage for submitted files, keyed by SHA-256: identical files are
+# stored once however many submissions reference them. Submissions keep only a manifest
+# ([{'name', 'sha256', 'bytes', 'binary'}]) so a re-review needs no second upload.
+BLOB_STORE = os.getenv("BLOB_STORE", "fs").lower()  # fs | gridfs
+BLOB_DIR = os.getenv("BLOB_DIR", "data/blobs")
+GRIDFS_BUCKET = "blobs"
+# Larger uploads are rejected; text beyond the judge's byte budgets is stored but not reviewed
+MAX_BLOB_BYTES = int(os.getenv("MAX_BLOB_BYTES", 50 * 1024 * 1024))
+# Per submission: at most this many files and bytes stored (see ingest_files)
+MAX_SUBMISSION_FILES = int(os.getenv("MAX_SUBMISSION_FILES", 200))
+MAX_SUBMISSION_BLOB_BYTES = int(os.getenv("MAX_SUBMISSION_BLOB_BYTES", 100 * 1024 * 1024))
+
+
+class BlobTooLarge(ValueError):
+    pass
+
+
+def _fs_path(digest: str) -> str:
+    # Two levels of fan-out keep directories small
+    return os.path.join(BLOB_DIR, digest[:2], digest[2:4], digest)
+
+
+class BlobWriter:
+    """
+    Streams one file into the store, hashing as it goes. The blob is written under a
+    temporary name and moved to its hash on close(); if that hash is already stored
+    the new copy is dropped.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BLOB_BYTES):
+        self.max_bytes = max_bytes
+        self.sha = hashlib.sha256()
+        self.bytes = 0
+        self.digest = None
+        self._file = None
+        self._temp_path = None
+        self._grid_in = None
+
+    async def write(self, chunk: bytes):
+        self.bytes += len(chunk)
+        if self.bytes > self.max_bytes:
+            await self.abort()
+            raise BlobTooLarge(f"File exceeds {self.max_bytes} bytes")
+        self.sha.update(chunk)
+        if BLOB_STORE == "gridfs":
+            if self._grid_in is None:
+                bucket = AsyncIOMotorGridFSBucket(get_database(), bucket_name=GRIDFS_BUCKET)
+                self._grid_in = bucket.open_upload_stream(f"tmp-{uuid.uuid4().hex}")
+            await self._grid_in.write(chunk)
+            return
+        if self._file is None:
+            os.makedirs(os.path.join(BLOB_DIR, "tmp"), exist_ok=True)
+            self._temp_path = os.path.join(BLOB_DIR, "tmp", uuid.uuid4().hex)
+            self._file = open(self._temp_path, "wb")
+        await asyncio.to_thread(self._file.write, chunk)
+
+    async def close(self) -> str:
+        """Commits the blob and returns its SHA-256."""
+        self.digest = self.sha.hexdigest()
+        if BLOB_STORE == "gridfs":
+            await self._close_gridfs()
+        else:
+            await asyncio.to_thread(self._close_fs)
+        return self.digest
+
+    def _close_fs(self):
+        path = _fs_path(self.digest)
+        if self._file is None:  # empty file
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, "wb").close()
+            return
+        self._file.close()
+        if os.path.exists(path):
+            os.remove(self._temp_path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic; a concurrent upload of the same content writes the same bytes
+        os.replace(self._temp_path, path)
+
+    async def _close_gridfs(self):
+        bucket = AsyncIOMotorGridFSBucket(get_database(), bucket_name=GRIDFS_BUCKET)
+        if self._grid_in is None:
+            self._grid_in = bucket.open_upload_stream(f"tmp-{uuid.uuid4().hex}")
+        await self._grid_in.close()
+        files = get_database()[f"{GRIDFS_BUCKET}.files"]
+        if await files.find_one({"filename": self.digest}, {"_id": 1}):
+            await bucket.delete(self._grid_in._id)
+        else:
+            await bucket.rename(self._grid_in._id, self.digest)
+
+    async def abort(self):
+        if self._file is not None:
+            self._file.close()
+            os.remove(self._temp_path)
+            self._file = None
+        if self._grid_in is not None:
+            await self._grid_in.abort()
+            self._grid_in = None
+
+
+class BlobReader:
+    """
+    A stored blob as a read(n) stream, the interface ingest_files expects from an upload.
+    `filename` is the name it was submitted under.
+    """
+
+    def __init__(self, digest: str, filename: str = None):
+        self.digest = digest
+        self.filename = filename
+        self._file = None
+        self._grid_out = None
+
+    async def read(self, size: int = -1) -> bytes:
+        if BLOB_STORE == "gridfs":
+            if self._grid_out is None:
+                bucket = AsyncIOMotorGridFSBucket(get_database(), bucket_name=GRIDFS_BUCKET)
+                self._grid_out = await bucket.open_download_stream_by_name(self.digest)
+            return await self._grid_out.read(size)
+        if self._file is None:
+            self._file = open(_fs_path(self.digest), "rb")
+        return await asyncio.to_thread(self._file.read, size)
+
+    async def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._grid_out = None
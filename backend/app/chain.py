@@ -1,71 +1,622 @@
+import os
 import json
-from web3 import Web3
-from app.constants import TELEO_ESCROW_ADDRESS, TELEO_ESCROW_ABI
-from init_env import RPC_URL, PRIVATE_KEY
+import time
+import asyncio
+import threading
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3, AsyncWeb3
+from web3.exceptions import TransactionNotFound
+from web3.logs import DISCARD
+from app.constants import TELEO_ESCROW_ABI, TELEO_ESCROW_ADDRESSES, SEPOLIA_CHAIN_ID
+from init_env import RPC_URL, PRIVATE_KEY, CHAINS, DEFAULT_CHAIN_ID
+from app.metrics import RPC_SECONDS
 
-if not RPC_URL or not PRIVATE_KEY:
-    raise ValueError("Missing SEPOLIA_RPC_URL or JUDGE_PRIVATE_KEY in .env")
+# --- Chain registry ---
+# SEPOLIA_RPC_URL serves DEFAULT_CHAIN_ID (jobs without a chain_id go there too); CHAINS adds
+# more. Each chain gets its own endpoints, clients, read cache and payout signer, so a slow
+# or failing chain only holds up its own jobs.
+RPC_TIMEOUT_SECONDS = float(os.getenv("RPC_TIMEOUT_SECONDS", 10))
+# Keep-alive connections per endpoint
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", 32))
+# How long an endpoint that failed is skipped while others are healthy
+RPC_BENCH_SECONDS = float(os.getenv("RPC_BENCH_SECONDS", 30))
+# Not retried on another endpoint once the request may have reached a node
+WRITE_METHODS = ("eth_sendRawTransaction",)
 
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
 
-# 2. Setup the Contract
-contract = w3.eth.contract(address=TELEO_ESCROW_ADDRESS, abi=TELEO_ESCROW_ABI)
+class ChainConfig:
+    def __init__(self, chain_id: int, rpc_urls: list[str], escrow_address: str, start_block: int = None):
+        self.chain_id = chain_id
+        self.rpc_urls = rpc_urls
+        self.escrow_address = Web3.to_checksum_address(escrow_address)
+        # First block the indexer scans (the escrow deployment block); None: INDEXER_START_BLOCK
+        self.start_block = start_block
 
-def get_job_details(job_id: int):
+
+def load_chain_configs() -> dict:
+    """chain_id -> ChainConfig, from SEPOLIA_RPC_URL and CHAINS."""
+    configs = {}
+    if RPC_URL:
+        configs[DEFAULT_CHAIN_ID] = ChainConfig(
+            DEFAULT_CHAIN_ID,
+            [url.strip() for url in RPC_URL.split(",") if url.strip()],
+            TELEO_ESCROW_ADDRESSES[SEPOLIA_CHAIN_ID],
+        )
+    for chain_id, entry in json.loads(CHAINS or "{}").items():
+        chain_id = int(chain_id)
+        escrow_address = entry.get("escrow_address") or TELEO_ESCROW_ADDRESSES.get(chain_id)
+        if not entry.get("rpc_urls") or not escrow_address:
+            raise ValueError(f"CHAINS[{chain_id}] needs rpc_urls and an escrow_address")
+        configs[chain_id] = ChainConfig(chain_id, entry["rpc_urls"], escrow_address, entry.get("start_block"))
+    return configs
+
+
+class RpcEndpoints:
+    """
+    A chain's RPC URLs behind pooled keep-alive sessions (one requests.Session for the sync
+    client, one aiohttp session for the async one). Requests rotate over the healthy
+    endpoints; one that fails at the HTTP level (connect error, timeout, 429, 5xx) is benched
+    for RPC_BENCH_SECONDS and the request moves on to the next. JSON-RPC errors such as
+    reverts are answers, not failures.
+    """
+
+    def __init__(self, chain_id: int, urls: list[str]):
+        self.chain_id = chain_id
+        self.urls = urls
+        self.lock = threading.Lock()
+        self.turn = 0
+        self.benched_until = {url: 0.0 for url in urls}
+        self.session = None
+        self.async_session = None
+
+    def _order(self) -> list[str]:
+        with self.lock:
+            start = self.turn % len(self.urls)
+            self.turn += 1
+        rotated = self.urls[start:] + self.urls[:start]
+        now = time.monotonic()
+        healthy = [url for url in rotated if self.benched_until[url] <= now]
+        # All benched: try them anyway, the one benched longest ago first
+        return healthy or sorted(rotated, key=self.benched_until.get)
+
+    def _bench(self, url: str, error: Exception):
+        with self.lock:
+            self.benched_until[url] = time.monotonic() + RPC_BENCH_SECONDS
+        print(f"⚠️ RPC endpoint {url} (chain {self.chain_id}) failed ({error}), benched for {RPC_BENCH_SECONDS}s")
+
+    def _session(self) -> requests.Session:
+        if self.session is None:
+            with self.lock:
+                if self.session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=len(self.urls), pool_maxsize=RPC_POOL_SIZE)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self.session = session
+        return self.session
+
+    def _async_session(self) -> aiohttp.ClientSession:
+        # Created on the event loop that first uses it (the app has one)
+        if self.async_session is None or self.async_session.closed:
+            self.async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=RPC_POOL_SIZE),
+                timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT_SECONDS),
+            )
+        return self.async_session
+
+    def post(self, data: bytes, headers: dict, idempotent: bool = True) -> bytes:
+        urls = self._order()
+        for attempt, url in enumerate(urls):
+            try:
+                response = self._session().post(url, data=data, headers=headers, timeout=RPC_TIMEOUT_SECONDS)
+                response.raise_for_status()
+                return response.content
+            except requests.RequestException as e:
+                self._bench(url, e)
+                # A connection error means the request never reached the node
+                unsent = isinstance(e, requests.ConnectionError)
+                if attempt == len(urls) - 1 or not (idempotent or unsent):
+                    raise
+
+    async def apost(self, data: bytes, headers: dict, idempotent: bool = True) -> bytes:
+        urls = self._order()
+        for attempt, url in enumerate(urls):
+            try:
+                async with self._async_session().post(url, data=data, headers=headers) as response:
+                    response.raise_for_status()
+                    return await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._bench(url, e)
+                unsent = isinstance(e, aiohttp.ClientConnectorError)
+                if attempt == len(urls) - 1 or not (idempotent or unsent):
+                    raise
+
+    async def aclose(self):
+        if self.async_session is not None:
+            await self.async_session.close()
+            self.async_session = None
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+
+def _in_request_order(response):
+    """
+    A batch response matched back to its requests. JSON-RPC 2.0 lets a node answer a batch in
+    any order; web3 numbers a batch's requests with increasing ids. A single error object
+    (the node rejected the whole batch) is returned as is.
+    """
+    if not isinstance(response, list):
+        return response
+    if any(item.get("id") is None for item in response):
+        # Only some errors come back without an id: keep the node's order
+        return response
+    return sorted(response, key=lambda item: item["id"])
+
+
+class FailoverHTTPProvider(Web3.HTTPProvider):
+    """
+    HTTPProvider over a chain's RpcEndpoints. Records every JSON-RPC round trip in
+    teleo_rpc_request_seconds.
+    """
+
+    def __init__(self, endpoints: RpcEndpoints):
+        super().__init__(endpoints.urls[0])
+        self.endpoints = endpoints
+
+    def _make_request(self, method, request_data: bytes) -> bytes:
+        start = time.perf_counter()
+        try:
+            return self.endpoints.post(
+                request_data, self.get_request_headers(), idempotent=method not in WRITE_METHODS
+            )
+        finally:
+            RPC_SECONDS.observe(time.perf_counter() - start, method=method, chain=self.endpoints.chain_id)
+
+    def make_batch_request(self, batch_requests):
+        start = time.perf_counter()
+        try:
+            raw_response = self.endpoints.post(self.encode_batch_rpc_request(batch_requests), self.get_request_headers())
+        finally:
+            RPC_SECONDS.observe(time.perf_counter() - start, method="batch", chain=self.endpoints.chain_id)
+        return _in_request_order(self.decode_rpc_response(raw_response))
+
+
+class AsyncFailoverHTTPProvider(AsyncWeb3.AsyncHTTPProvider):
+    """The same for AsyncWeb3: reads in the request path need no worker thread."""
+
+    def __init__(self, endpoints: RpcEndpoints):
+        super().__init__(endpoints.urls[0])
+        self.endpoints = endpoints
+
+    async def _make_request(self, method, request_data: bytes) -> bytes:
+        start = time.perf_counter()
+        try:
+            return await self.endpoints.apost(
+                request_data, self.get_request_headers(), idempotent=method not in WRITE_METHODS
+            )
+        finally:
+            RPC_SECONDS.observe(time.perf_counter() - start, method=method, chain=self.endpoints.chain_id)
+
+    async def make_batch_request(self, batch_requests):
+        start = time.perf_counter()
+        try:
+            raw_response = await self.endpoints.apost(
+                self.encode_batch_rpc_request(batch_requests), self.get_request_headers()
+            )
+        finally:
+            RPC_SECONDS.observe(time.perf_counter() - start, method="batch", chain=self.endpoints.chain_id)
+        return _in_request_order(self.decode_rpc_response(raw_response))
+
+    async def disconnect(self):
+        await self.endpoints.aclose()
+
+
+class Chain:
+    """
+    One configured chain. Web3 clients and contracts are built on first use, so importing
+    this module needs no env or network.
+    """
+
+    def __init__(self, config: ChainConfig):
+        self.chain_id = config.chain_id
+        self.escrow_address = config.escrow_address
+        self.start_block = config.start_block
+        self.endpoints = RpcEndpoints(config.chain_id, config.rpc_urls)
+        self.lock = threading.Lock()
+        self._w3 = None
+        self._contract = None
+        self._async_w3 = None
+        self._async_contract = None
+        self.read_cache = JobReadCache()
+        self.payout_lock = threading.Lock()
+        self.payout_sender = None
+
+    @property
+    def w3(self) -> Web3:
+        if self._w3 is None:
+            with self.lock:
+                if self._w3 is None:
+                    w3 = Web3(FailoverHTTPProvider(self.endpoints))
+                    self._contract = w3.eth.contract(address=self.escrow_address, abi=TELEO_ESCROW_ABI)
+                    self._w3 = w3
+        return self._w3
+
+    @property
+    def contract(self):
+        self.w3
+        return self._contract
+
+    @property
+    def async_w3(self) -> AsyncWeb3:
+        if self._async_w3 is None:
+            w3 = AsyncWeb3(AsyncFailoverHTTPProvider(self.endpoints))
+            self._async_contract = w3.eth.contract(address=self.escrow_address, abi=TELEO_ESCROW_ABI)
+            self._async_w3 = w3
+        return self._async_w3
+
+    @property
+    def async_contract(self):
+        self.async_w3
+        return self._async_contract
+
+
+class ChainRegistry:
+    lock = threading.Lock()
+    chains: dict = None  # chain_id -> Chain
+
+registry = ChainRegistry()
+
+def get_chains() -> dict:
+    if registry.chains is None:
+        with registry.lock:
+            if registry.chains is None:
+                registry.chains = {chain_id: Chain(config) for chain_id, config in load_chain_configs().items()}
+    return registry.chains
+
+def get_chain(chain_id: int = None) -> Chain:
+    """The chain a job lives on; jobs without a chain_id use DEFAULT_CHAIN_ID."""
+    chains = get_chains()
+    chain_id = DEFAULT_CHAIN_ID if chain_id is None else int(chain_id)
+    if chain_id not in chains:
+        if chain_id == DEFAULT_CHAIN_ID:
+            raise ValueError("Missing SEPOLIA_RPC_URL in .env")
+        raise ValueError(f"Chain {chain_id} is not configured (see CHAINS)")
+    return chains[chain_id]
+
+def get_w3(chain_id: int = None) -> Web3:
+    return get_chain(chain_id).w3
+
+def get_contract(chain_id: int = None):
+    return get_chain(chain_id).contract
+
+async def close_chains():
+    """Closes the pooled RPC sessions (FastAPI shutdown)."""
+    for chain in (registry.chains or {}).values():
+        await chain.endpoints.aclose()
+
+# --- Batched, cached job reads ---
+# Jobs can only change until they are settled, so settled jobs are cached forever and
+# open jobs are cached for the current block only.
+JOB_READ_BATCH_SIZE = int(os.getenv("JOB_READ_BATCH_SIZE", 100))
+# How long a fetched block number is trusted before asking the node again (Sepolia blocks are ~12s)
+BLOCK_NUMBER_TTL = float(os.getenv("BLOCK_NUMBER_TTL_SECONDS", 2.0))
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+class JobReadCache:
+    """Per chain; shared by the sync and async readers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.block_number = None
+        self.block_checked_at = 0.0
+        self.open_jobs = {}     # job_id -> details as of block_number
+        self.settled_jobs = {}  # job_id -> details, immutable
+
+    def fresh_block(self):
+        """The cached block number if it is recent enough, else None."""
+        with self.lock:
+            if self.block_number is not None and time.monotonic() - self.block_checked_at < BLOCK_NUMBER_TTL:
+                return self.block_number
+        return None
+
+    def set_block(self, block: int, checked_at: float):
+        with self.lock:
+            if block != self.block_number:
+                self.open_jobs = {}
+            self.block_number = block
+            self.block_checked_at = checked_at
+
+    def lookup(self, job_ids: list[int]):
+        """(cached results, ids still to read)"""
+        results, missing = {}, []
+        with self.lock:
+            for job_id in job_ids:
+                if job_id in self.settled_jobs:
+                    results[job_id] = self.settled_jobs[job_id]
+                elif job_id in self.open_jobs:
+                    results[job_id] = self.open_jobs[job_id]
+                else:
+                    missing.append(job_id)
+        return results, missing
+
+    def store(self, results: dict, job_ids: list[int], raw: list, block: int):
+        fetched = [_format_job(job) for job in raw]
+        with self.lock:
+            for job_id, details in zip(job_ids, fetched):
+                results[job_id] = details
+                if details and details["is_settled"]:
+                    self.settled_jobs[job_id] = details
+                elif self.block_number == block:
+                    self.open_jobs[job_id] = details
+
+def _format_job(job):
+    # Unset mapping slots come back zeroed: treat them as "no such job"
+    if job[1] == ZERO_ADDRESS:
+        return None
+    return {
+        "id": job[0],
+        "client": job[1],
+        "freelancer": job[2],
+        "amount": Web3.from_wei(job[3], 'ether'), # Convert Wei to MNEE
+        "description": job[4],
+        "is_settled": job[5],
+        "is_approved": job[6]
+    }
+
+def _current_block(chain: Chain) -> int:
+    block = chain.read_cache.fresh_block()
+    if block is None:
+        checked_at = time.monotonic()
+        block = chain.w3.eth.block_number
+        chain.read_cache.set_block(block, checked_at)
+    return block
+
+async def _acurrent_block(chain: Chain) -> int:
+    block = chain.read_cache.fresh_block()
+    if block is None:
+        checked_at = time.monotonic()
+        block = await chain.async_w3.eth.block_number
+        chain.read_cache.set_block(block, checked_at)
+    return block
+
+def _read_jobs(chain: Chain, job_ids: list[int], block: int) -> list:
+    """One JSON-RPC batch of eth_call per JOB_READ_BATCH_SIZE ids, all pinned to the same block."""
+    raw = []
+    for start in range(0, len(job_ids), JOB_READ_BATCH_SIZE):
+        batch_ids = job_ids[start:start + JOB_READ_BATCH_SIZE]
+        try:
+            with chain.w3.batch_requests() as batch:
+                for job_id in batch_ids:
+                    batch.add(chain.contract.functions.jobs(job_id).call(block_identifier=block))
+                raw.extend(batch.execute())
+        except Exception as e:
+            # Some providers reject JSON-RPC batches; fall back to one call per job
+            print(f"⚠️ Batch read failed ({e}), falling back to single calls")
+            raw.extend(chain.contract.functions.jobs(job_id).call(block_identifier=block) for job_id in batch_ids)
+    return raw
+
+async def _aread_jobs(chain: Chain, job_ids: list[int], block: int) -> list:
+    raw = []
+    for start in range(0, len(job_ids), JOB_READ_BATCH_SIZE):
+        batch_ids = job_ids[start:start + JOB_READ_BATCH_SIZE]
+        try:
+            async with chain.async_w3.batch_requests() as batch:
+                for job_id in batch_ids:
+                    batch.add(chain.async_contract.functions.jobs(job_id).call(block_identifier=block))
+                raw.extend(await batch.async_execute())
+        except Exception as e:
+            print(f"⚠️ Batch read failed ({e}), falling back to single calls")
+            raw.extend(await asyncio.gather(*[
+                chain.async_contract.functions.jobs(job_id).call(block_identifier=block) for job_id in batch_ids
+            ]))
+    return raw
+
+def get_jobs_details(job_ids: list[int], chain_id: int = None) -> dict:
+    """
+    Reads many jobs from one chain in batched round trips.
+    Returns: {job_id: details dict, or None if the job does not exist}
+    """
+    chain = get_chain(chain_id)
+    job_ids = list(dict.fromkeys(int(i) for i in job_ids))
+    block = _current_block(chain)
+    results, missing = chain.read_cache.lookup(job_ids)
+    if missing:
+        chain.read_cache.store(results, missing, _read_jobs(chain, missing, block), block)
+    return results
+
+async def aget_jobs_details(job_ids: list[int], chain_id: int = None) -> dict:
+    """get_jobs_details on the event loop (AsyncWeb3)."""
+    chain = get_chain(chain_id)
+    job_ids = list(dict.fromkeys(int(i) for i in job_ids))
+    block = await _acurrent_block(chain)
+    results, missing = chain.read_cache.lookup(job_ids)
+    if missing:
+        chain.read_cache.store(results, missing, await _aread_jobs(chain, missing, block), block)
+    return results
+
+def get_job_details(job_id: int, chain_id: int = None):
     """Reads job data from the blockchain to verify it exists."""
     try:
-        job = contract.functions.jobs(job_id).call()
-        # Return a nice dict
-        return {
-            "id": job[0],
-            "client": job[1],
-            "freelancer": job[2],
-            "amount": w3.from_wei(job[3], 'ether'), # Convert Wei to MNEE
-            "description": job[4],
-            "is_settled": job[5],
-            "is_approved": job[6]
-        }
+        return get_jobs_details([job_id], chain_id).get(int(job_id))
     except Exception as e:
         print(f"Error fetching job: {e}")
         return None
 
-def release_payment(job_id: int):
-    """The AI calls this to release money."""
-    # 1. Ensure we get the key correctly
-    if not PRIVATE_KEY:
-        raise Exception("CRITICAL: PRIVATE_KEY not found in env vars!")
-
-    account = w3.eth.account.from_key(PRIVATE_KEY)
-    
-    # --- DEBUGGING BLOCK START ---
-    print(f"\n DEBUGGING PAYMENT TRANSACTION:")
-    print(f"   ▶ Network: {w3.eth.chain_id} (Should be 11155111 for Sepolia)")
-    print(f"   ▶ Signer: {account.address}")
-    
-    balance_wei = w3.eth.get_balance(account.address)
-    balance_eth = w3.from_wei(balance_wei, 'ether')
-    print(f"   ▶ Balance: {balance_eth} ETH")
-    
-    if balance_wei == 0:
-        raise Exception(f"⛔ WALLET IS EMPTY! Address {account.address} has 0 ETH.")
-    # --- DEBUGGING BLOCK END ---
-
-    # 2. Build Transaction
-    # Note: We ensure job_id is an INT for the contract
-    tx = contract.functions.releaseFunds(int(job_id)).build_transaction({
-        'from': account.address,
-        'nonce': w3.eth.get_transaction_count(account.address),
-        'gas': 200000,
-        'gasPrice': int(w3.eth.gas_price * 1.2) # Boost gas by 20%
-    })
-    
-    # 3. Sign & Send
-    print("   ▶ Sending Transaction...")
-    signed_tx = w3.eth.account.sign_transaction(tx, PRIVATE_KEY)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-    
-    print(f"   ✅ Sent! Hash: {tx_hash.hex()}")
-    
-    # 4. Wait for Receipt
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-    return receipt.transactionHash.hex()
\ No newline at end of file
+async def aget_job_details(job_id: int, chain_id: int = None):
+    try:
+        return (await aget_jobs_details([job_id], chain_id)).get(int(job_id))
+    except Exception as e:
+        print(f"Error fetching job: {e}")
+        return None
+
+# --- Payouts ---
+PAYOUT_GAS_LIMIT = int(os.getenv("PAYOUT_GAS_LIMIT", 200000))
+# releaseFundsBatch gas: fixed overhead plus a per-job allowance
+BATCH_BASE_GAS = 60000
+BATCH_GAS_PER_JOB = int(os.getenv("BATCH_GAS_PER_JOB", 80000))
+# How long a positive balance check is trusted before asking the node again
+BALANCE_CHECK_SECONDS = float(os.getenv("BALANCE_CHECK_SECONDS", 60))
+NONCE_ERRORS = ("nonce", "replacement transaction underpriced")
+# The node already has this exact signed tx: it was broadcast, not rejected
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction")
+
+class NonceManager:
+    """
+    Hands out consecutive nonces locally so concurrent payouts never reuse one.
+    Seeded from the node's pending count; resync() drops the local view after an error.
+    """
+    def __init__(self, w3: Web3, address: str):
+        self.w3 = w3
+        self.address = address
+        self.lock = threading.Lock()
+        self.next_nonce = None
+
+    def allocate(self) -> int:
+        with self.lock:
+            if self.next_nonce is None:
+                self.next_nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+            nonce = self.next_nonce
+            self.next_nonce += 1
+            return nonce
+
+    def resync(self):
+        with self.lock:
+            self.next_nonce = None
+
+class PayoutSender:
+    """
+    Signs and broadcasts judge transactions on one chain without waiting for them to be mined.
+    Chain ID and signer are resolved once, the balance check is cached for
+    BALANCE_CHECK_SECONDS and EIP-1559 fees are refreshed once per block.
+    Receipts are confirmed separately (see app/payouts.py).
+    """
+    def __init__(self, chain: Chain):
+        # 1. Ensure we get the key correctly
+        if not PRIVATE_KEY:
+            raise Exception("CRITICAL: PRIVATE_KEY not found in env vars!")
+        self.chain = chain
+        self.w3 = chain.w3
+        self.account = self.w3.eth.account.from_key(PRIVATE_KEY)
+        self.chain_id = self.w3.eth.chain_id
+        if self.chain_id != chain.chain_id:
+            print(f"⚠️ RPC for chain {chain.chain_id} reports chain id {self.chain_id}")
+        self.nonces = NonceManager(self.w3, self.account.address)
+        self.lock = threading.Lock()
+        self.balance_checked_at = 0.0
+        self.fees_block = None
+        self.fees = None
+        print(f"💼 Payout signer {self.account.address} on chain {self.chain_id}")
+
+    def _check_balance(self):
+        now = time.monotonic()
+        if now - self.balance_checked_at < BALANCE_CHECK_SECONDS:
+            return
+        balance_wei = self.w3.eth.get_balance(self.account.address)
+        if balance_wei == 0:
+            raise Exception(f"⛔ WALLET IS EMPTY! Address {self.account.address} has 0 ETH.")
+        self.balance_checked_at = now
+
+    def _fee_fields(self) -> dict:
+        block = _current_block(self.chain)
+        with self.lock:
+            if self.fees_block == block:
+                return self.fees
+        latest = self.w3.eth.get_block("latest")
+        if latest.get("baseFeePerGas") is None:
+            # Pre-London chain: legacy pricing
+            fees = {"gasPrice": self.w3.eth.gas_price}
+        else:
+            priority_fee = self.w3.eth.max_priority_fee
+            # Headroom for the base fee to double before the tx is mined
+            fees = {
+                "maxFeePerGas": 2 * latest["baseFeePerGas"] + priority_fee,
+                "maxPriorityFeePerGas": priority_fee,
+            }
+        with self.lock:
+            self.fees_block, self.fees = block, fees
+        return fees
+
+    def send(self, contract_call, gas: int = PAYOUT_GAS_LIMIT) -> str:
+        """Builds, signs and broadcasts a contract call. Returns the tx hash (0x-hex)."""
+        self._check_balance()
+        for attempt in range(2):
+            # Node calls that can fail come before the nonce is taken
+            fees = self._fee_fields()
+            nonce = self.nonces.allocate()
+            try:
+                tx = contract_call.build_transaction({
+                    "from": self.account.address,
+                    "nonce": nonce,
+                    "gas": gas,
+                    "chainId": self.chain_id,
+                    **fees,
+                })
+                signed_tx = self.account.sign_transaction(tx)
+            except Exception:
+                # Never broadcast: a nonce left unused would hold up every later payout
+                self.nonces.resync()
+                raise
+            try:
+                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+                return Web3.to_hex(tx_hash)
+            except Exception as e:
+                error = str(e).lower()
+                if any(err in error for err in ALREADY_KNOWN_ERRORS):
+                    # Accepted earlier (e.g. a retried request): sending it again under a new nonce would pay twice
+                    return Web3.to_hex(signed_tx.hash)
+                # The allocated nonce was not consumed (or was stale): re-read it from the node
+                self.nonces.resync()
+                if attempt == 0 and any(err in error for err in NONCE_ERRORS):
+                    print(f"   ↻ Nonce {nonce} rejected ({e}), resyncing")
+                    continue
+                raise
+
+    def send_release(self, job_id: int) -> str:
+        """The AI calls this to release money. Returns as soon as the tx is broadcast."""
+        # Note: We ensure job_id is an INT for the contract
+        tx_hash = self.send(self.chain.contract.functions.releaseFunds(int(job_id)))
+        print(f"   ✅ Sent releaseFunds({job_id})! Hash: {tx_hash}")
+        return tx_hash
+
+    def send_release_batch(self, job_ids: list[int]) -> str:
+        """Settles many approved jobs in one releaseFundsBatch transaction. Returns the tx hash."""
+        job_ids = [int(i) for i in job_ids]
+        tx_hash = self.send(
+            self.chain.contract.functions.releaseFundsBatch(job_ids),
+            gas=BATCH_BASE_GAS + BATCH_GAS_PER_JOB * len(job_ids),
+        )
+        print(f"   ✅ Sent releaseFundsBatch({len(job_ids)} jobs)! Hash: {tx_hash}")
+        return tx_hash
+
+def get_payout_sender(chain_id: int = None) -> PayoutSender:
+    chain = get_chain(chain_id)
+    with chain.payout_lock:
+        if chain.payout_sender is None:
+            chain.payout_sender = PayoutSender(chain)
+        return chain.payout_sender
+
+def get_receipt(tx_hash: str, chain_id: int = None):
+    """Returns the receipt, or None while the tx is still pending."""
+    try:
+        return get_w3(chain_id).eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        return None
+
+async def aget_receipt(tx_hash: str, chain_id: int = None):
+    try:
+        return await get_chain(chain_id).async_w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        return None
+
+def get_failed_releases(receipt, chain_id: int = None) -> set[int]:
+    """Job IDs a releaseFundsBatch receipt reports as skipped (JobReleaseFailed)."""
+    events = get_contract(chain_id).events.JobReleaseFailed().process_receipt(receipt, errors=DISCARD)
+    return {event["args"]["jobId"] for event in events}
+
+def release_payment(job_id: int, chain_id: int = None):
+    """The AI calls this to release money, and waits for the receipt."""
+    tx_hash = get_payout_sender(chain_id).send_release(job_id)
+    receipt = get_w3(chain_id).eth.wait_for_transaction_receipt(tx_hash)
+    return Web3.to_hex(receipt.transactionHash)
@@ -0,0 +1,145 @@
+import os
+import asyncio
+from pymongo.errors import OperationFailure, PyMongoError
+from app.database import get_database
+from app.progress import broker
+
+# Job and submission changes pushed to SSE subscribers (/jobs/events, /jobs/{jobId}/events).
+# With a replica set, Mongo change streams feed the broker, so writes from any process
+# (other API replicas, scripts) reach every subscriber. On a standalone mongod, or with
+# CHANGE_STREAMS=off, the writers in this process publish directly instead.
+CHANGE_STREAMS = os.getenv("CHANGE_STREAMS", "auto").lower()  # auto | on | off
+CHANGE_STREAM_RETRY_SECONDS = float(os.getenv("CHANGE_STREAM_RETRY_SECONDS", 5))
+# "The $changeStream stage is only supported on replica sets"
+NOT_A_REPLICA_SET = 40573
+
+JOBS_TOPIC = "jobs"
+JOB_EVENT_FIELDS = (
+    "chain_job_id", "chain_id", "title", "status", "amount_mnee", "client_name", "freelancer_name",
+    "applicants", "tags", "tx_hash",
+)
+SUBMISSION_EVENT_FIELDS = (
+    "chain_job_id", "freelancer_name", "files", "status", "verdict", "reason", "tx_hash", "payout_status",
+    "created_at",
+)
+
+
+class ChangeFeed:
+    tasks: list = []
+    active: set = set()  # collections whose change stream is open
+
+
+feed = ChangeFeed()
+
+
+def job_topic(jobId: str) -> str:
+    """A job's own changes and its submissions."""
+    return f"job:{jobId}"
+
+
+def _job_event(fields: dict) -> dict:
+    return {"event": "job", **{k: fields[k] for k in JOB_EVENT_FIELDS if k in fields}}
+
+
+def _submission_event(submission_id, fields: dict) -> dict:
+    return {
+        "event": "submission", "submission_id": str(submission_id),
+        **{k: fields[k] for k in SUBMISSION_EVENT_FIELDS if k in fields},
+    }
+
+
+def _publish_job(job: dict):
+    event = _job_event(job)
+    broker.publish(JOBS_TOPIC, event)
+    broker.publish(job_topic(job["chain_job_id"]), event)
+
+
+async def jobs_changed(*chain_job_ids: str):
+    """
+    Call after writing jobs. Publishes their current state unless a change stream
+    already delivers it. Costs one read, only in the in-process fallback.
+    """
+    if "jobs" in feed.active or not chain_job_ids:
+        return
+    db = get_database()
+    projection = {k: 1 for k in JOB_EVENT_FIELDS}
+    async for job in db.jobs.find({"chain_job_id": {"$in": list(chain_job_ids)}}, projection):
+        _publish_job(job)
+
+
+def submission_changed(submission: dict, fields: dict = None):
+    """Call after writing a submission (new: `fields` omitted; updated: the fields set)."""
+    if "submissions" in feed.active:
+        return
+    event = _submission_event(submission["_id"], {"chain_job_id": submission["chain_job_id"], **(fields or submission)})
+    broker.publish(job_topic(submission["chain_job_id"]), event)
+
+
+def _changed_fields(change: dict, fields: tuple):
+    """Event fields of an insert/replace, or the updated ones; None when nothing relevant changed."""
+    document = change.get("fullDocument") or {}
+    if change["operationType"] != "update":
+        return document
+    updated = change["updateDescription"]["updatedFields"]
+    # $addToSet on applicants shows up as "applicants" or "applicants.<n>"
+    touched = {name.split(".")[0] for name in updated} | set(change["updateDescription"].get("removedFields", []))
+    if not touched & set(fields):
+        return None
+    return {k: document[k] for k in fields if k in document}
+
+
+async def _watch(collection: str):
+    """Follows one collection's change stream, resuming after errors where Mongo allows it."""
+    db = get_database()
+    resume_after = None
+    while True:
+        try:
+            async with db[collection].watch(
+                [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}],
+                full_document="updateLookup",
+                resume_after=resume_after,
+            ) as stream:
+                feed.active.add(collection)
+                async for change in stream:
+                    resume_after = stream.resume_token
+                    if collection == "jobs":
+                        job = _changed_fields(change, JOB_EVENT_FIELDS)
+                        if job and "chain_job_id" in job:
+                            _publish_job(job)
+                    else:
+                        fields = _changed_fields(change, SUBMISSION_EVENT_FIELDS)
+                        if fields and "chain_job_id" in fields:
+                            broker.publish(
+                                job_topic(fields["chain_job_id"]),
+                                _submission_event(change["documentKey"]["_id"], fields),
+                            )
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            feed.active.discard(collection)
+            if e.code == NOT_A_REPLICA_SET and CHANGE_STREAMS == "auto":
+                print(f"📣 Change streams unavailable ({collection}): publishing in-process")
+                return
+            if e.has_error_label("NonResumableChangeStreamError"):
+                resume_after = None
+            print(f"⚠️ Change stream on {collection} failed: {e}")
+        except PyMongoError as e:
+            feed.active.discard(collection)
+            print(f"⚠️ Change stream on {collection} failed: {e}")
+        await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+
+
+def start_change_feed():
+    """Call this on startup (no-op with CHANGE_STREAMS=off)"""
+    if CHANGE_STREAMS == "off":
+        return
+    feed.tasks = [asyncio.create_task(_watch(name)) for name in ("jobs", "submissions")]
+
+
+async def stop_change_feed():
+    """Call this on shutdown"""
+    for task in feed.tasks:
+        task.cancel()
+    await asyncio.gather(*feed.tasks, return_exceptions=True)
+    feed.tasks = []
+    feed.active.clear()
@@ -2,7 +2,14 @@
 MOCK_MNEE_ADDRESS = "0xC24Ca92955eE1Fe6975689F84D261Ee873C5B909"
 TELEO_ESCROW_ADDRESS = "0x57e9Bd08Af827AE3D19CBDa714114EbCFcA6f35c"
 
-# 2. The Minimal ABI (Only the functions our Backend needs to call)
+# Chains the escrow is deployed on: chain_id -> TeleoEscrow address
+# (more can be added at runtime through the CHAINS env var, see app/chain.py)
+SEPOLIA_CHAIN_ID = 11155111
+TELEO_ESCROW_ADDRESSES = {
+    SEPOLIA_CHAIN_ID: TELEO_ESCROW_ADDRESS,
+}
+
+# 2. The Minimal ABI (Only the functions and events our Backend needs)
 TELEO_ESCROW_ABI = [
     {
         "inputs": [{"name": "_jobId", "type": "uint256"}],
@@ -11,6 +18,13 @@ TELEO_ESCROW_ABI = [
         "stateMutability": "nonpayable",
         "type": "function"
     },
+    {
+        "inputs": [{"name": "_jobIds", "type": "uint256[]"}],
+        "name": "releaseFundsBatch",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
     {
         "inputs": [{"name": "_jobId", "type": "uint256"}],
         "name": "refundClient",
@@ -32,6 +46,43 @@ TELEO_ESCROW_ABI = [
         ],
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "jobId", "type": "uint256"},
+            {"indexed": False, "name": "client", "type": "address"},
+            {"indexed": False, "name": "freelancer", "type": "address"},
+            {"indexed": False, "name": "amount", "type": "uint256"}
+        ],
+        "name": "JobCreated",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "jobId", "type": "uint256"},
+            {"indexed": False, "name": "verdict", "type": "string"}
+        ],
+        "name": "JobCompleted",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "jobId", "type": "uint256"}
+        ],
+        "name": "JobRefunded",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "jobId", "type": "uint256"},
+            {"indexed": False, "name": "reason", "type": "string"}
+        ],
+        "name": "JobReleaseFailed",
+        "type": "event"
     }
 ]
 
@@ -0,0 +1,115 @@
+import os
+import re
+import math
+import logging
+
+logger = logging.getLogger("uvicorn")
+
+# Prompt budget for the submission part of a single judge call, in (estimated) tokens
+JUDGE_CONTEXT_TOKENS = int(os.getenv("JUDGE_CONTEXT_TOKENS", 60000))
+# Upper bound on parallel chunk reviews for one submission; least relevant files beyond it are dropped
+JUDGE_MAX_CHUNKS = int(os.getenv("JUDGE_MAX_CHUNKS", 8))
+# Rough chars-per-token ratio for code and prose with Gemini tokenizers
+CHARS_PER_TOKEN = 4
+# Only the head of each file is embedded when ranking by relevance
+EMBED_CHARS = 8000
+
+# Per-file header added by build_submission_text, counted against the budget
+FILE_OVERHEAD_TOKENS = 20
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def document_tokens(doc: dict) -> int:
+    return estimate_tokens(doc["text"]) + FILE_OVERHEAD_TOKENS
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _keyword_score(job_desc: str, doc: dict) -> float:
+    """Fallback relevance: share of job-description words that appear in the file name or text."""
+    words = set(re.findall(r"[a-zA-Z_]{3,}", job_desc.lower()))
+    if not words:
+        return 0.0
+    haystack = f"{doc['name']} {doc['text'][:EMBED_CHARS]}".lower()
+    return sum(1 for w in words if w in haystack) / len(words)
+
+
+async def rank_documents(job_desc: str, documents: list[dict], ai=None) -> list[dict]:
+    """
+    Orders text documents by relevance to the job description, most relevant first.
+    Uses embeddings when an AI client is given, keyword overlap otherwise (or on failure).
+    """
+    scores = None
+    if ai is not None and documents:
+        vectors = await ai.aembed_texts([job_desc] + [d["text"][:EMBED_CHARS] for d in documents])
+        if len(vectors) == len(documents) + 1:
+            scores = [_cosine(vectors[0], v) for v in vectors[1:]]
+        else:
+            logger.warning("Embedding ranking unavailable, falling back to keyword overlap")
+
+    if scores is None:
+        scores = [_keyword_score(job_desc, d) for d in documents]
+
+    ranked = sorted(zip(scores, range(len(documents))), key=lambda pair: -pair[0])
+    return [documents[i] for _, i in ranked]
+
+
+def _split_document(doc: dict, budget: int) -> list[dict]:
+    """Cuts a file larger than the whole budget into budget-sized parts."""
+    step = max(1, (budget - FILE_OVERHEAD_TOKENS) * CHARS_PER_TOKEN)
+    pieces = [doc["text"][i:i + step] for i in range(0, len(doc["text"]), step)]
+    return [
+        {**doc, "name": f"{doc['name']} (part {n}/{len(pieces)})", "text": piece, "size": len(piece)}
+        for n, piece in enumerate(pieces, start=1)
+    ]
+
+
+async def plan_context(
+    job_desc: str, documents: list[dict], ai=None, budget: int = None, max_chunks: int = None
+) -> dict:
+    """
+    Packs submission documents into judge-sized chunks.
+    If everything fits in the budget a single chunk is returned in upload order (no ranking).
+    Otherwise files are ranked by relevance and packed greedily into at most max_chunks chunks.
+    Returns: {'chunks': [[doc]], 'dropped': [file name], 'total_tokens': int}
+    """
+    budget = budget or JUDGE_CONTEXT_TOKENS
+    max_chunks = max_chunks or JUDGE_MAX_CHUNKS
+
+    text_docs = [d for d in documents if not d["binary"]]
+    attachments = [d for d in documents if d["binary"]]
+    total_tokens = sum(document_tokens(d) for d in text_docs)
+
+    if total_tokens <= budget:
+        return {"chunks": [documents], "dropped": [], "total_tokens": total_tokens}
+
+    ranked = await rank_documents(job_desc, text_docs, ai=ai)
+
+    # First-fit decreasing by relevance: the most relevant files land in the earliest chunks
+    chunks, loads, dropped = [], [], []
+    for doc in ranked:
+        parts = _split_document(doc, budget) if document_tokens(doc) > budget else [doc]
+        for part in parts:
+            cost = document_tokens(part)
+            for i, load in enumerate(loads):
+                if load + cost <= budget:
+                    chunks[i].append(part)
+                    loads[i] += cost
+                    break
+            else:
+                if len(chunks) < max_chunks:
+                    chunks.append([part])
+                    loads.append(cost)
+                else:
+                    dropped.append(part["name"])
+
+    # Attachments are just one line each, they ride along with the first chunk
+    chunks[0].extend(attachments)
+    return {"chunks": chunks, "dropped": dropped, "total_tokens": total_tokens}
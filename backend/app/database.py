@@ -1,7 +1,11 @@
+import os
 from motor.motor_asyncio import AsyncIOMotorClient
-from init_env import MONGO_URI
+from pymongo.errors import OperationFailure
+from init_env import MONGO_URI, DEFAULT_CHAIN_ID
+from app.metrics import MongoCommandMetrics
 
 DB_NAME = "teleo_db"
+VERDICT_CACHE_TTL_SECONDS = int(os.getenv("VERDICT_CACHE_TTL_SECONDS", 7 * 24 * 3600))
 class Database:
     client: AsyncIOMotorClient = None
     db = None
@@ -10,12 +14,66 @@ db = Database()
 
 async def connect_to_mongo():
     """Call this on startup"""
-    db.client = AsyncIOMotorClient(MONGO_URI)
+    db.client = AsyncIOMotorClient(MONGO_URI, event_listeners=[MongoCommandMetrics()])
     db.db = db.client[DB_NAME]
     print(f"🔥 Connected to MongoDB: {DB_NAME}")
 
-    # Create a unique index on chain_job_id to prevent duplicates
-    await db.db.jobs.create_index("chain_job_id", unique=True)
+    # Job ids are per escrow contract, so a job is identified by its chain too (see job_key)
+    await backfill_chain_ids()
+    try:
+        await db.db.jobs.drop_index("chain_job_id_1")  # the single-chain key
+    except OperationFailure:
+        pass
+    await db.db.jobs.create_index([("chain_id", 1), ("chain_job_id", 1)], unique=True)
+    # Receipt watcher polls jobs in PAYING state
+    await db.db.jobs.create_index("status")
+    # Keyset pagination for /jobs: newest job_number first, optionally filtered by chain/status
+    await backfill_job_numbers()
+    await db.db.jobs.create_index([("chain_id", 1), ("status", 1), ("job_number", -1), ("_id", -1)])
+    await db.db.jobs.create_index([("chain_id", 1), ("job_number", -1), ("_id", -1)])
+    # The same listings across all chains (no chain_id filter)
+    await db.db.jobs.create_index([("status", 1), ("job_number", -1), ("_id", -1)])
+    await db.db.jobs.create_index([("job_number", -1), ("_id", -1)])
+    # Keyset pagination for /submissions/{jobId}
+    await db.db.submissions.create_index([("chain_id", 1), ("chain_job_id", 1), ("created_at", -1), ("_id", -1)])
+    # Judge workers claim the oldest queued submission
+    await db.db.submissions.create_index([("status", 1), ("created_at", 1)])
+    # Pre-screen duplicate detection
+    await db.db.submissions.create_index([("content_hash", 1), ("created_at", 1)])
+    # Submission rate-limit windows expire on their own (see admission.py)
+    await db.db.rate_limits.create_index("expires_at", expireAfterSeconds=0)
+    # Re-judge reports read one run's results (see rejudge.py)
+    await db.db.rejudge_results.create_index("run_id")
+    # Cached judge verdicts expire on their own
+    await db.db.verdict_cache.create_index("created_at", expireAfterSeconds=VERDICT_CACHE_TTL_SECONDS)
+
+def job_key(chain_job_id: str, chain_id: int = None) -> dict:
+    """Filter for one job (or its submissions); no chain_id means DEFAULT_CHAIN_ID."""
+    return {"chain_id": DEFAULT_CHAIN_ID if chain_id is None else int(chain_id), "chain_job_id": chain_job_id}
+
+async def backfill_chain_ids():
+    """
+    Jobs stored before chain_id was part of their key are on the default chain; their
+    submissions take the job's chain. chain_job_id alone was unique then, so this is unambiguous.
+    """
+    await db.db.jobs.update_many({"chain_id": None}, {"$set": {"chain_id": DEFAULT_CHAIN_ID}})
+    if not await db.db.submissions.find_one({"chain_id": {"$exists": False}}, {"_id": 1}):
+        return
+    for chain_id in await db.db.jobs.distinct("chain_id"):
+        job_ids = await db.db.jobs.distinct("chain_job_id", {"chain_id": chain_id})
+        await db.db.submissions.update_many(
+            {"chain_id": {"$exists": False}, "chain_job_id": {"$in": job_ids}}, {"$set": {"chain_id": chain_id}}
+        )
+    await db.db.submissions.update_many({"chain_id": {"$exists": False}}, {"$set": {"chain_id": DEFAULT_CHAIN_ID}})
+
+async def backfill_job_numbers():
+    """Jobs indexed before job_number existed get it derived from chain_job_id."""
+    await db.db.jobs.update_many(
+        {"job_number": {"$exists": False}},
+        [{"$set": {"job_number": {"$convert": {
+            "input": "$chain_job_id", "to": "long", "onError": -1, "onNull": -1
+        }}}}]
+    )
 
 async def close_mongo_connection():
     """Call this on shutdown"""
@@ -0,0 +1,131 @@
+import os
+import difflib
+from app.database import get_database, job_key
+from app.ingest import load_documents
+from app.context_planner import estimate_tokens
+from app.prescreen import ERROR_REASON_PREFIXES
+from app import job_queue
+
+# Incremental re-review: after a FAIL, the next submission to the same job is judged on
+# what changed (unified diff hunks, new files in full) plus the previous verdict, instead
+# of the whole project again. Falls back to a full review when the changes are large.
+INCREMENTAL_REVIEW_ENABLED = os.getenv("INCREMENTAL_REVIEW_ENABLED", "true").lower() == "true"
+# Full review when the changes exceed this many tokens...
+INCREMENTAL_MAX_TOKENS = int(os.getenv("INCREMENTAL_MAX_TOKENS", 15000))
+# ...or this share of the full submission (a rewrite is cheaper to read whole than as a diff)
+INCREMENTAL_MAX_SHARE = float(os.getenv("INCREMENTAL_MAX_SHARE", 0.5))
+# An incremental verdict the judge is less sure of than this is redone as a full review
+INCREMENTAL_MIN_CONFIDENCE = float(os.getenv("INCREMENTAL_MIN_CONFIDENCE", 0.7))
+DIFF_CONTEXT_LINES = 3
+
+
+async def previous_review(submission: dict):
+    """
+    The job's latest submission before this one that the LLM judged, or None. Pre-screen
+    rejections (recorded with 0 attempts, see job_queue.record) were never read by the
+    judge, so they are no baseline for reviewing only the changes.
+    """
+    db = get_database()
+    return await db.submissions.find_one(
+        {
+            **job_key(submission["chain_job_id"], submission.get("chain_id")),
+            "_id": {"$ne": submission["_id"]},
+            "created_at": {"$lt": submission["created_at"]},
+            "status": job_queue.DONE,
+            "verdict": {"$ne": None},
+            "attempts": {"$gt": 0},
+        },
+        {"notes": 1, "verdict": 1, "reason": 1, "blobs": 1, "created_at": 1},
+        sort=[("created_at", -1)],
+    )
+
+
+def _unified_diff(name: str, old: str, new: str) -> str:
+    return "".join(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True),
+        fromfile=f"a/{name}", tofile=f"b/{name}", n=DIFF_CONTEXT_LINES,
+    ))
+
+
+async def diff_submission(previous: dict, blobs: list[dict], documents: list[dict]) -> dict:
+    """
+    Compares a submission with `previous` by blob hash, reading back only the old versions
+    of files whose content changed.
+    Returns: {'changed': [(name, diff)], 'added': [doc], 'removed': [name], 'unchanged': [name]}
+    """
+    old_blobs = {blob["name"]: blob for blob in previous["blobs"]}
+    new_blobs = {blob["name"]: blob for blob in blobs}
+    modified = [
+        name for name, blob in new_blobs.items()
+        if name in old_blobs and old_blobs[name]["sha256"] != blob["sha256"]
+    ]
+    old_texts = {doc["name"]: doc for doc in await load_documents([old_blobs[name] for name in modified])}
+
+    changed, added = [], []
+    for doc in documents:
+        name = doc["name"]
+        if name not in old_blobs:
+            added.append(doc)
+        elif name in old_texts:
+            if doc["binary"] or old_texts[name]["binary"]:
+                changed.append((name, f"Binary file '{name}' changed\n"))
+            else:
+                changed.append((name, _unified_diff(name, old_texts[name]["text"], doc["text"])))
+    return {
+        "changed": changed,
+        "added": added,
+        "removed": [name for name in old_blobs if name not in new_blobs],
+        "unchanged": [name for name in new_blobs if name in old_blobs and name not in old_texts],
+    }
+
+
+def build_changes_text(notes: str, previous_notes: str, diff: dict) -> str:
+    """Renders a diff_submission() result into the judge context."""
+    parts = [f"FREELANCER NOTES:\n{notes}\n\n"]
+    if (previous_notes or "") != (notes or ""):
+        parts.append(f"PREVIOUS NOTES:\n{previous_notes}\n\n")
+    if diff["unchanged"]:
+        parts.append(f"Unchanged files (already reviewed): {', '.join(diff['unchanged'])}\n")
+    if diff["removed"]:
+        parts.append(f"Removed files: {', '.join(diff['removed'])}\n")
+    for name, hunks in diff["changed"]:
+        parts.append(f"\n\n--- CHANGED: {name} ---\n")
+        parts.append(hunks or "(whitespace-only or no textual change)\n")
+    for doc in diff["added"]:
+        if doc["binary"]:
+            parts.append(f"\n\n--- NEW ATTACHMENT ---\nFile '{doc['name']}' (Binary) received.")
+            continue
+        parts.append(f"\n\n--- NEW FILE: {doc['name']} ---\n")
+        parts.append(doc["text"])
+    return "".join(parts)
+
+
+async def plan_incremental(submission: dict, documents: list[dict]):
+    """
+    Decides whether a submission can be re-reviewed incrementally.
+    Returns {'previous_submission_id', 'previous_reason', 'changes', 'tokens'} or None for a full review.
+    """
+    if not INCREMENTAL_REVIEW_ENABLED or not submission.get("blobs"):
+        return None
+    previous = await previous_review(submission)
+    # Only a genuine FAIL whose files are in the blob store is a baseline to diff against
+    if not previous or previous["verdict"] != "FAIL" or not previous.get("blobs"):
+        return None
+    if str(previous.get("reason")).startswith(ERROR_REASON_PREFIXES):
+        return None
+
+    diff = await diff_submission(previous, submission["blobs"], documents)
+    if not diff["changed"] and not diff["added"] and not diff["removed"]:
+        return None  # same files again: the notes changed, or prescreen let it through; review in full
+    changes = build_changes_text(submission["notes"], previous.get("notes"), diff)
+    tokens = estimate_tokens(changes)
+    full_tokens = sum(estimate_tokens(doc["text"]) for doc in documents if not doc["binary"])
+    if tokens > INCREMENTAL_MAX_TOKENS or tokens > INCREMENTAL_MAX_SHARE * full_tokens:
+        print(f"🧾 Changes are ~{tokens} of ~{full_tokens} tokens: full review")
+        return None
+    return {
+        "previous_submission_id": str(previous["_id"]),
+        "previous_reason": previous["reason"],
+        "changes": changes,
+        "tokens": tokens,
+    }
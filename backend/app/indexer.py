@@ -0,0 +1,226 @@
+import os
+import asyncio
+import datetime
+from typing import TYPE_CHECKING
+from pymongo import UpdateOne
+from starlette.concurrency import run_in_threadpool
+from app.constants import TELEO_ESCROW_ADDRESS
+from app.database import get_database, job_key
+from app.change_feed import jobs_changed
+from init_env import DEFAULT_CHAIN_ID
+
+if TYPE_CHECKING:
+    # app.chain (web3, eth_account) is imported on first use, not when main is
+    from app.chain import Chain
+
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "false").lower() == "true"
+# One indexer per configured chain (see app/chain.py), each with its own checkpoint.
+# First block to scan when there is no checkpoint yet (the escrow deployment block); a CHAINS
+# entry can set its own start_block
+INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK", 0))
+# Only blocks this deep are indexed, so a reorg shallower than this never reaches Mongo
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", 6))
+INDEXER_POLL_SECONDS = float(os.getenv("INDEXER_POLL_SECONDS", 12))
+
+# eth_getLogs range bounds: grows while the provider keeps up, halves when it complains
+MIN_BLOCK_RANGE = 10
+MAX_BLOCK_RANGE = int(os.getenv("INDEXER_MAX_BLOCK_RANGE", 10000))
+INITIAL_BLOCK_RANGE = 2000
+
+# Checkpoint of the single-chain indexer, which only followed the default escrow
+LEGACY_CHECKPOINT_ID = f"escrow:{TELEO_ESCROW_ADDRESS.lower()}"
+
+
+class Indexer:
+    """One chain's escrow follower."""
+
+    def __init__(self, chain: "Chain"):
+        self.chain = chain
+        self.checkpoint_id = f"escrow:{chain.chain_id}:{chain.escrow_address.lower()}"
+        self.events = None  # topic0 -> contract event, built on first use
+        self.block_range = INITIAL_BLOCK_RANGE
+        self.task: asyncio.Task = None
+
+    def start_block(self) -> int:
+        return INDEXER_START_BLOCK if self.chain.start_block is None else self.chain.start_block
+
+
+class Indexers:
+    running: list = []
+
+indexers = Indexers()
+
+
+async def get_checkpoint(indexer: Indexer) -> int:
+    db = get_database()
+    state = await db.indexer_state.find_one({"_id": indexer.checkpoint_id})
+    if state is None and indexer.chain.chain_id == DEFAULT_CHAIN_ID:
+        # Picks up where the single-chain indexer left off instead of rescanning
+        state = await db.indexer_state.find_one({"_id": LEGACY_CHECKPOINT_ID})
+    return state["last_block"] if state else indexer.start_block() - 1
+
+
+async def save_checkpoint(indexer: Indexer, block: int):
+    db = get_database()
+    await db.indexer_state.update_one(
+        {"_id": indexer.checkpoint_id},
+        {"$set": {"last_block": block, "chain_id": indexer.chain.chain_id, "updated_at": datetime.datetime.now()}},
+        upsert=True,
+    )
+
+
+def _events(indexer: Indexer) -> dict:
+    if indexer.events is None:
+        events = indexer.chain.contract.events
+        indexer.events = {
+            event.topic: event
+            for event in (events.JobCreated, events.JobCompleted, events.JobRefunded)
+        }
+    return indexer.events
+
+
+def _decode(indexer: Indexer, log):
+    from web3 import Web3
+    event = _events(indexer).get(Web3.to_hex(log["topics"][0]))
+    return event().process_log(log) if event else None
+
+
+def _onchain_snapshot(details: dict, block: int) -> dict:
+    return {
+        "client": details["client"],
+        "freelancer": details["freelancer"],
+        "amount": float(details["amount"]),
+        "description": details["description"],
+        "is_settled": details["is_settled"],
+        "is_approved": details["is_approved"],
+        "block": block,
+    }
+
+
+def build_operations(events: list, created_details: dict, chain_id: int) -> list:
+    """Turns one chain's decoded escrow events into idempotent job upserts, in log order."""
+    from web3 import Web3
+    now = datetime.datetime.now()
+    ops = []
+    for event in events:
+        job_id = event["args"]["jobId"]
+        key = job_key(str(job_id), chain_id)
+
+        if event["event"] == "JobCreated":
+            details = created_details.get(job_id)
+            fields = {
+                "client_address": event["args"]["client"],
+                "freelancer_address": event["args"]["freelancer"],
+                "amount_mnee": float(Web3.from_wei(event["args"]["amount"], "ether")),
+                "job_number": job_id,
+                "created_block": event["blockNumber"],
+            }
+            if details:
+                fields["onchain"] = _onchain_snapshot(details, event["blockNumber"])
+            ops.append(UpdateOne(key, {
+                "$set": fields,
+                # Placeholders until the frontend posts the job's metadata to /jobs
+                "$setOnInsert": {
+                    "title": f"Job #{job_id}",
+                    "description": details["description"] if details else "",
+                    "client_name": "Unknown",
+                    "status": "OPEN",
+                    "tags": [],
+                    "applicants": [],
+                    "indexed_from_chain": True,
+                    "created_at": now,
+                },
+            }, upsert=True))
+
+        elif event["event"] == "JobCompleted":
+            ops.append(UpdateOne(key, {"$set": {
+                "status": "PAID",
+                "tx_hash": Web3.to_hex(event["transactionHash"]),
+                "onchain.is_settled": True,
+                "onchain.is_approved": True,
+            }}))
+
+        elif event["event"] == "JobRefunded":
+            ops.append(UpdateOne(key, {"$set": {
+                "status": "REFUNDED",
+                "onchain.is_settled": True,
+                "onchain.is_approved": False,
+            }}))
+    return ops
+
+
+async def sync_once(indexer: Indexer) -> bool:
+    """
+    Indexes the chain's next confirmed block range.
+    Returns True when caught up with the confirmed head, False if there is more to do.
+    """
+    from app.chain import get_jobs_details
+    db = get_database()
+    chain = indexer.chain
+    from_block = await get_checkpoint(indexer) + 1
+    head = await run_in_threadpool(lambda: chain.w3.eth.block_number)
+    safe_head = head - INDEXER_CONFIRMATIONS
+    if from_block > safe_head:
+        return True
+
+    to_block = min(from_block + indexer.block_range - 1, safe_head)
+    try:
+        logs = await run_in_threadpool(chain.w3.eth.get_logs, {
+            "address": chain.escrow_address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [list(_events(indexer).keys())],
+        })
+    except Exception as e:
+        # Typically "query returned more than N results" / "block range too large"
+        indexer.block_range = max(MIN_BLOCK_RANGE, indexer.block_range // 2)
+        print(f"⚠️ getLogs {from_block}-{to_block} on chain {chain.chain_id} failed ({e}), range -> {indexer.block_range}")
+        return False
+
+    events = [e for e in (_decode(indexer, log) for log in logs) if e]
+    created_ids = [e["args"]["jobId"] for e in events if e["event"] == "JobCreated"]
+    # Descriptions are not in the event: fetch them for all new jobs in one batched read
+    created_details = await run_in_threadpool(get_jobs_details, created_ids, chain.chain_id) if created_ids else {}
+
+    ops = build_operations(events, created_details, chain.chain_id)
+    if ops:
+        await db.jobs.bulk_write(ops, ordered=True)
+        await jobs_changed(*{str(e["args"]["jobId"]) for e in events})
+    await save_checkpoint(indexer, to_block)
+
+    print(f"🔎 Indexed blocks {from_block}-{to_block} on chain {chain.chain_id}: {len(events)} escrow events")
+    indexer.block_range = min(MAX_BLOCK_RANGE, indexer.block_range * 2)
+    return to_block >= safe_head
+
+
+async def _indexer_loop(indexer: Indexer):
+    while True:
+        try:
+            caught_up = await sync_once(indexer)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Indexer Error (chain {indexer.chain.chain_id}): {e}")
+            caught_up = True
+        if caught_up:
+            await asyncio.sleep(INDEXER_POLL_SECONDS)
+
+
+def start_indexer():
+    """Call this on startup (no-op unless INDEXER_ENABLED=true). One task per configured chain."""
+    if not INDEXER_ENABLED:
+        return
+    from app.chain import get_chains
+    for chain in get_chains().values():
+        indexer = Indexer(chain)
+        indexer.task = asyncio.create_task(_indexer_loop(indexer))
+        indexers.running.append(indexer)
+        print(f"🔎 Chain indexer started for {chain.escrow_address} on chain {chain.chain_id}")
+
+
+async def stop_indexer():
+    """Call this on shutdown"""
+    for indexer in indexers.running:
+        indexer.task.cancel()
+    await asyncio.gather(*[indexer.task for indexer in indexers.running], return_exceptions=True)
+    indexers.running = []
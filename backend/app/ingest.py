@@ -0,0 +1,159 @@
+import os
+import codecs
+from app.metrics import INGEST_BYTES
+from app.blob_store import (
+    BlobWriter, BlobReader, BlobTooLarge, MAX_BLOB_BYTES, MAX_SUBMISSION_FILES, MAX_SUBMISSION_BLOB_BYTES,
+)
+
+# Files with these extensions are decoded and handed to the AI Judge as text.
+# Anything else is recorded as a binary attachment.
+TEXT_EXTENSIONS = ('.py', '.js', '.txt', '.md', '.json', '.html', '.css')
+
+# Uploads are pulled off the wire in chunks of this size instead of one read()
+CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+
+# Byte budgets: a single file, and the whole submission (all text files together)
+MAX_FILE_BYTES = int(os.getenv("MAX_FILE_BYTES", 2 * 1024 * 1024))
+MAX_SUBMISSION_BYTES = int(os.getenv("MAX_SUBMISSION_BYTES", 8 * 1024 * 1024))
+
+
+def is_text_file(filename: str) -> bool:
+    return (filename or "").lower().endswith(TEXT_EXTENSIONS)
+
+
+async def read_text_upload(file, max_bytes: int, sink: BlobWriter = None) -> dict:
+    """
+    Streams an UploadFile in CHUNK_SIZE pieces and decodes the first max_bytes incrementally.
+    Without a sink, reading stops at max_bytes, so an oversized upload never sits in memory
+    in full. With a sink, the whole file is streamed into it (the blob store) chunk by chunk.
+    Returns: {'text': str, 'size': int, 'truncated': bool}
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    parts = []
+    size = 0
+    truncated = False
+
+    while True:
+        if sink is None and size >= max_bytes:
+            # Budget exhausted: peek one byte to tell "exactly at the limit" from "cut off"
+            truncated = bool(await file.read(1))
+            break
+        chunk = await file.read(CHUNK_SIZE if sink else min(CHUNK_SIZE, max_bytes - size))
+        if not chunk:
+            break
+        if sink:
+            await sink.write(chunk)
+        take = min(len(chunk), max_bytes - size)
+        truncated = truncated or take < len(chunk)
+        if take > 0:
+            parts.append(decoder.decode(memoryview(chunk)[:take]))
+            size += take
+
+    parts.append(decoder.decode(b"", final=True))
+    return {"text": "".join(parts), "size": size, "truncated": truncated}
+
+
+def check_upload_limits(files):
+    """
+    Rejects a submission over MAX_SUBMISSION_FILES files, or over MAX_BLOB_BYTES per file or
+    MAX_SUBMISSION_BLOB_BYTES in total by the sizes the upload declares, before anything is
+    written to the blob store. Raises BlobTooLarge.
+    """
+    files = files or []
+    if len(files) > MAX_SUBMISSION_FILES:
+        raise BlobTooLarge(f"Too many files ({len(files)}); at most {MAX_SUBMISSION_FILES} per submission")
+    sizes = [getattr(file, "size", None) or 0 for file in files]
+    if any(size > MAX_BLOB_BYTES for size in sizes):
+        raise BlobTooLarge(f"File exceeds {MAX_BLOB_BYTES} bytes")
+    if sum(sizes) > MAX_SUBMISSION_BLOB_BYTES:
+        raise BlobTooLarge(f"Submission exceeds {MAX_SUBMISSION_BLOB_BYTES} bytes")
+
+
+async def ingest_files(
+    files, max_file_bytes: int = None, max_submission_bytes: int = None, store_blobs: bool = True
+) -> dict:
+    """
+    Reads all uploaded files within the per-file and per-submission byte budgets.
+    With store_blobs every file, binary or text, is also streamed whole into the blob store.
+    Returns: {'file_names': [str], 'documents': [dict], 'blobs': [dict], 'total_bytes': int}
+    Each document is {'name', 'text', 'size', 'binary', 'truncated'}; each blob is the
+    manifest entry {'name', 'sha256', 'bytes', 'binary'} stored on the submission.
+    """
+    max_file_bytes = max_file_bytes or MAX_FILE_BYTES
+    max_submission_bytes = max_submission_bytes or MAX_SUBMISSION_BYTES
+    if store_blobs:
+        check_upload_limits(files)
+
+    file_names = []
+    documents = []
+    blobs = []
+    total_bytes = 0
+
+    for file in files or []:
+        print(f"📂 Processing file: {file.filename}")
+        file_names.append(file.filename)
+        binary = not is_text_file(file.filename)
+        # Sizes an upload declares are checked above; this also holds when they are missing
+        stored = sum(blob["bytes"] for blob in blobs)
+        sink = BlobWriter(min(MAX_BLOB_BYTES, MAX_SUBMISSION_BLOB_BYTES - stored)) if store_blobs else None
+
+        try:
+            if binary:
+                if sink:
+                    await read_text_upload(file, 0, sink)
+                doc = {"text": "", "size": 0, "truncated": False}
+            else:
+                budget = max(0, min(max_file_bytes, max_submission_bytes - total_bytes))
+                if budget == 0 and not sink:
+                    doc = {"text": "", "size": 0, "truncated": True}
+                else:
+                    doc = await read_text_upload(file, budget, sink)
+                total_bytes += doc["size"]
+        except BlobTooLarge:
+            if stored + sink.bytes > MAX_SUBMISSION_BLOB_BYTES:
+                raise BlobTooLarge(f"Submission exceeds {MAX_SUBMISSION_BLOB_BYTES} bytes") from None
+            raise
+        except BaseException:
+            if sink:
+                await sink.abort()
+            raise
+        documents.append({"name": file.filename, "binary": binary, **doc})
+
+        if sink:
+            blobs.append({"name": file.filename, "sha256": await sink.close(), "bytes": sink.bytes, "binary": binary})
+            INGEST_BYTES.observe(sink.bytes, kind="file")
+
+    if store_blobs:
+        INGEST_BYTES.observe(total_bytes, kind="submission")
+    return {"file_names": file_names, "documents": documents, "blobs": blobs, "total_bytes": total_bytes}
+
+
+async def load_documents(blobs: list[dict]) -> list[dict]:
+    """
+    Rebuilds a submission's documents from its blob manifest, with the same byte budgets
+    as the original upload, so the judge sees the same text without a second upload.
+    """
+    readers = [BlobReader(blob["sha256"], blob["name"]) for blob in blobs]
+    try:
+        return (await ingest_files(readers, store_blobs=False))["documents"]
+    finally:
+        for reader in readers:
+            await reader.close()
+
+
+def build_submission_text(notes: str, file_names: list[str], documents: list[dict]) -> str:
+    """
+    Renders the notes and ingested documents into the judge context.
+    Everything is collected into one parts list and joined once, so building the
+    context is linear in its size and holds no intermediate copies.
+    """
+    parts = [f"FREELANCER NOTES:\n{notes}\n\n", f"Files Uploaded: {', '.join(file_names)}\n\n"]
+    for doc in documents:
+        if doc["binary"]:
+            parts.append(f"\n\n--- ATTACHMENT ---\nFile '{doc['name']}' (Binary) received.")
+            continue
+        parts.append(f"\n\n--- FILE: {doc['name']} ---\n")
+        parts.append(doc["text"])
+        if doc["truncated"]:
+            parts.append(f"\n[... '{doc['name']}' truncated: upload size limit reached ...]")
+    return "".join(parts)
@@ -0,0 +1,198 @@
+import os
+import asyncio
+import datetime
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.database import get_database
+from app.metrics import STAGE_SECONDS
+from app.progress import broker
+from app.change_feed import submission_changed
+from app.admission import renew_review_lease, release_review_lease
+
+# Submission lifecycle stored on db.submissions.status
+QUEUED = "QUEUED"
+JUDGING = "JUDGING"
+PAYING = "PAYING"
+DONE = "DONE"
+FAILED = "FAILED"
+IN_FLIGHT = [JUDGING, PAYING]
+
+JUDGE_WORKERS = int(os.getenv("JUDGE_WORKERS", 4))
+# A worker that dies mid-review loses its claim after this long and the submission is retried
+LEASE_SECONDS = int(os.getenv("JUDGE_LEASE_SECONDS", 300))
+MAX_ATTEMPTS = int(os.getenv("JUDGE_MAX_ATTEMPTS", 3))
+POLL_INTERVAL = float(os.getenv("QUEUE_POLL_SECONDS", 1.0))
+
+
+class WorkerPool:
+    tasks: list = []
+    wakeup: asyncio.Event = None
+
+pool = WorkerPool()
+
+
+def _now():
+    return datetime.datetime.now()
+
+
+def _publish_status(submission: dict, fields: dict):
+    """
+    Pushes a status change to anyone following the submission (see /submissions/{id}/events)
+    and to the job's feed (see change_feed.py).
+    """
+    broker.publish(submission["_id"], {"event": "status", "submission_id": str(submission["_id"]), **fields})
+    submission_changed(submission, fields)
+
+
+async def enqueue(submission: dict) -> str:
+    """Persists a submission as QUEUED and nudges idle workers. Returns the submission ID."""
+    db = get_database()
+    submission.update({"status": QUEUED, "attempts": 0, "created_at": _now()})
+    result = await db.submissions.insert_one(submission)
+    submission_changed(submission)
+    if pool.wakeup:
+        pool.wakeup.set()
+    return str(result.inserted_id)
+
+
+async def record(submission: dict, result: dict) -> str:
+    """Stores a submission that was decided without the workers (e.g. by the pre-screen). Returns its ID."""
+    db = get_database()
+    now = _now()
+    submission.pop("payload", None)
+    submission.update({**result, "attempts": 0, "created_at": now, "completed_at": now})
+    inserted = await db.submissions.insert_one(submission)
+    submission_changed(submission)
+    return str(inserted.inserted_id)
+
+
+async def claim_next(worker_id: str):
+    """
+    Atomically claims the oldest QUEUED submission (or one whose lease expired).
+    Returns the claimed document or None when the queue is empty.
+    """
+    db = get_database()
+    now = _now()
+    return await db.submissions.find_one_and_update(
+        {"$or": [
+            {"status": QUEUED},
+            {"status": {"$in": IN_FLIGHT}, "lease_expires_at": {"$lt": now}},
+        ]},
+        {
+            "$set": {
+                "status": JUDGING,
+                "worker": worker_id,
+                "lease_expires_at": now + datetime.timedelta(seconds=LEASE_SECONDS),
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def set_stage(submission: dict, stage: str, **fields):
+    """Moves a claimed submission to the next pipeline stage and renews its lease."""
+    db = get_database()
+    fields.update({"status": stage, "lease_expires_at": _now() + datetime.timedelta(seconds=LEASE_SECONDS)})
+    await db.submissions.update_one({"_id": submission["_id"]}, {"$set": fields})
+    await renew_review_lease(submission)
+    _publish_status(submission, {k: v for k, v in fields.items() if k != "lease_expires_at"})
+
+
+async def complete(submission: dict, result: dict):
+    """
+    Stores the final outcome and drops the queued payload to keep the document small.
+    Frees the job for its next submission.
+    """
+    db = get_database()
+    await db.submissions.update_one(
+        {"_id": submission["_id"]},
+        {
+            "$set": {**result, "completed_at": _now()},
+            "$unset": {"payload": "", "lease_expires_at": "", "worker": ""},
+        },
+    )
+    await release_review_lease(submission)
+    _publish_status(submission, result)
+
+
+async def fail(submission: dict, error: Exception):
+    """Requeues a submission after an unexpected error, or marks it FAILED once out of attempts."""
+    db = get_database()
+    if submission.get("attempts", 0) < MAX_ATTEMPTS:
+        await db.submissions.update_one(
+            {"_id": submission["_id"]},
+            {"$set": {"status": QUEUED, "last_error": str(error)}, "$unset": {"lease_expires_at": "", "worker": ""}},
+        )
+        await renew_review_lease(submission)
+        _publish_status(submission, {"status": QUEUED})
+        return
+    await complete(submission, {
+        "status": FAILED,
+        "verdict": "FAIL",
+        "reason": f"System Error: {str(error)}",
+    })
+
+
+async def get_status(submission_id: str):
+    db = get_database()
+    if not ObjectId.is_valid(submission_id):
+        return None
+    return await db.submissions.find_one({"_id": ObjectId(submission_id)}, {"payload": 0})
+
+
+async def _worker_loop(worker_id: str, handler):
+    while True:
+        try:
+            submission = await claim_next(worker_id)
+        except Exception as e:
+            print(f"❌ Queue Error ({worker_id}): {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+            continue
+
+        if not submission:
+            # Idle: sleep until enqueue() signals new work or the poll interval elapses
+            try:
+                await asyncio.wait_for(pool.wakeup.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            pool.wakeup.clear()
+            continue
+
+        print(f"👷 {worker_id} picked up submission {submission['_id']} (Job #{submission['chain_job_id']})")
+        try:
+            # Claims and reclaims (after a worker died) keep the job's review lease alive
+            await renew_review_lease(submission)
+        except Exception as e:
+            print(f"❌ Queue Error ({worker_id}): {e}")
+        _publish_status(submission, {"status": JUDGING})
+        # Time spent waiting in the queue (retries are measured from the original enqueue)
+        STAGE_SECONDS.observe((_now() - submission["created_at"]).total_seconds(), stage="queue_wait")
+        try:
+            result = await handler(submission)
+            await complete(submission, result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Worker Error ({worker_id}): {e}")
+            await fail(submission, e)
+
+
+def start_workers(handler, count: int = None):
+    """Call this on startup. `handler(submission)` runs the judge + payout stages and returns the result fields."""
+    count = count or JUDGE_WORKERS
+    pool.wakeup = asyncio.Event()
+    pool.tasks = [
+        asyncio.create_task(_worker_loop(f"worker-{i}", handler))
+        for i in range(count)
+    ]
+    print(f"👷 Started {count} judge workers")
+
+
+async def stop_workers():
+    """Call this on shutdown"""
+    for task in pool.tasks:
+        task.cancel()
+    await asyncio.gather(*pool.tasks, return_exceptions=True)
+    pool.tasks = []
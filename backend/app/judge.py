@@ -1,21 +1,52 @@
+import os
+import re
 import json
+import time
+import asyncio
 import logging
+from google.genai import types
 from app.llm_client import VertexAIClient
-from app.PROMPTS import SYS_PROMPT
+from app.verdict_cache import VerdictCache
+from app.model_router import ModelRouter
+from app.context_planner import estimate_tokens
+from app.context_planner import plan_context
+from app.ingest import build_submission_text
+from app.PROMPTS import SYS_PROMPT, CHUNK_REVIEW_PROMPT, REDUCE_PROMPT, INCREMENTAL_PROMPT, PROMPT_VERSION
 
 logger = logging.getLogger("uvicorn")
 
+JUDGE_MODEL = os.getenv("JUDGE_MODEL", "gemini-2.0-flash-exp")
+# Verdicts should be reproducible, not creative
+JUDGE_TEMPERATURE = float(os.getenv("JUDGE_TEMPERATURE", 0.1))
+# Extra attempts when the model's output is not a valid verdict
+JUDGE_PARSE_RETRIES = int(os.getenv("JUDGE_PARSE_RETRIES", 2))
+# Multi-sample votes need independent samples, so they run warmer than single verdicts
+JUDGE_VOTE_TEMPERATURE = float(os.getenv("JUDGE_VOTE_TEMPERATURE", 0.7))
+
+# Structured output: verdict is ordered first so it can be read off the stream early
+VERDICT_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "verdict": types.Schema(type=types.Type.STRING, enum=["PASS", "FAIL"]),
+        "confidence": types.Schema(type=types.Type.NUMBER, minimum=0, maximum=1),
+        "reason": types.Schema(type=types.Type.STRING),
+    },
+    required=["verdict", "confidence", "reason"],
+    property_ordering=["verdict", "confidence", "reason"],
+)
+EARLY_VERDICT = re.compile(r'"verdict"\s*:\s*"(PASS|FAIL)"')
+INVALID_OUTPUT = {"verdict": "FAIL", "reason": "System Error: AI response was not valid JSON."}
+
 class TeleoJudge:
     def __init__(self):
         self.ai = VertexAIClient()
+        self.cache = VerdictCache()
+        self.router = ModelRouter()
 
-    def evaluate_submission(self, job_desc: str, code: str, language: str) -> dict:
-        """
-        Uses Gemini to statically analyze code against requirements.
-        Returns: {'verdict': 'PASS' | 'FAIL', 'reason': 'str'}
-        """
-        
-        system_prompt = SYS_PROMPT.strip()
+    def _build_messages(
+        self, job_desc: str, code: str, language: str, system_prompt: str = SYS_PROMPT, context: str = ""
+    ) -> list[dict]:
+        system_prompt = system_prompt.strip()
 
         user_content = f"""
         --- JOB REQUIREMENTS ---
@@ -24,29 +55,282 @@ class TeleoJudge:
         --- SUBMITTED CODE ({language}) ---
         {code}
         """
+        if context:
+            user_content += f"""
+        --- REVIEW CONTEXT ---
+        {context}
+        """
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_content}
         ]
 
+    def _try_parse_verdict(self, response_text: str):
+        """Returns {'verdict', 'reason'} or None when the output is not a well-formed verdict."""
         try:
-            response_text = self.ai.chat_completion(messages, model="gemini-2.0-flash-exp")
-            
+            # Structured output is plain JSON; fences are only stripped for models that ignore the schema
             cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
-            
             result = json.loads(cleaned_text)
-            
-            # Fallback validation
-            if result.get("verdict") not in ["PASS", "FAIL"]:
-                result["verdict"] = "FAIL"
-                result["reason"] = "AI Error: Invalid verdict format."
-                
+        except (json.JSONDecodeError, AttributeError):
+            return None
+        if not isinstance(result, dict) or result.get("verdict") not in ["PASS", "FAIL"]:
+            return None
+        verdict = {"verdict": result["verdict"], "reason": str(result.get("reason", ""))}
+        if isinstance(result.get("confidence"), (int, float)):
+            verdict["confidence"] = min(1.0, max(0.0, float(result["confidence"])))
+        return verdict
+
+    def _parse_verdict(self, response_text: str) -> dict:
+        result = self._try_parse_verdict(response_text)
+        if result is None:
+            logger.error(f"Invalid verdict. Raw AI Output: {response_text}")
+            return dict(INVALID_OUTPUT)
+        return result
+
+    async def _stream_text(
+        self, messages: list[dict], on_progress, model: str = JUDGE_MODEL, temperature: float = JUDGE_TEMPERATURE
+    ) -> str:
+        """Streams a judge call, reporting the verdict as soon as it appears in the output."""
+        parts = []
+        announced = False
+        async for text in self.ai.astream_completion(
+            messages, model=model, temperature=temperature, response_schema=VERDICT_SCHEMA
+        ):
+            parts.append(text)
+            if not announced:
+                match = EARLY_VERDICT.search("".join(parts))
+                if match:
+                    announced = True
+                    on_progress({"event": "verdict", "verdict": match.group(1), "model": model, "final": False})
+        return "".join(parts)
+
+    async def _ask(
+        self, messages: list[dict], on_progress=None, model: str = JUDGE_MODEL, temperature: float = JUDGE_TEMPERATURE
+    ) -> dict:
+        """
+        One structured judge call, streamed when an on_progress callback is given.
+        Output that is not a valid verdict is retried up to JUDGE_PARSE_RETRIES times.
+        Returns: {'verdict': 'PASS' | 'FAIL', 'reason': 'str', 'confidence': float}
+        """
+        response_text = ""
+        for attempt in range(JUDGE_PARSE_RETRIES + 1):
+            if on_progress:
+                try:
+                    response_text = await self._stream_text(messages, on_progress, model, temperature)
+                except Exception as e:
+                    logger.error(f"Judge stream error: {e}")
+                    response_text = ""
+            else:
+                response_text = await self.ai.achat_completion(
+                    messages, model=model, temperature=temperature, response_schema=VERDICT_SCHEMA
+                )
+            result = self._try_parse_verdict(response_text)
+            if result:
+                return result
+            logger.warning(f"Malformed judge output (attempt {attempt + 1}/{JUDGE_PARSE_RETRIES + 1}): {response_text[:200]!r}")
+        return self._parse_verdict(response_text)
+
+    async def _vote(self, messages: list[dict], route: dict, on_progress=None) -> dict:
+        """
+        route['samples'] independent verdicts; the majority wins and a tie fails,
+        since an unclear review should not release funds.
+        """
+        samples = await asyncio.gather(*[
+            self._ask(messages, model=route["model"], temperature=JUDGE_VOTE_TEMPERATURE)
+            for _ in range(route["samples"])
+        ])
+        passes = [s for s in samples if s["verdict"] == "PASS"]
+        verdict = "PASS" if len(passes) * 2 > len(samples) else "FAIL"
+        majority = passes if verdict == "PASS" else [s for s in samples if s["verdict"] == "FAIL"]
+        if on_progress:
+            on_progress({"event": "vote", "model": route["model"], "pass": len(passes), "total": len(samples)})
+        return {
+            "verdict": verdict,
+            "reason": f"{majority[0]['reason']} ({len(majority)}/{len(samples)} reviews agree)",
+            "confidence": len(majority) / len(samples),
+        }
+
+    async def _decide(self, messages: list[dict], route: dict, on_progress=None) -> dict:
+        """Judges on the routed tier and escalates borderline verdicts to the next tier up."""
+        start = time.perf_counter()
+        if route["samples"] > 1:
+            result = await self._vote(messages, route, on_progress)
+        else:
+            result = await self._ask(messages, on_progress, model=route["model"])
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        self.router.record(route, result, time.perf_counter() - start, prompt_tokens)
+
+        stronger = self.router.escalation(route, result)
+        if stronger and self._is_cacheable(result):
+            logger.info(f"Borderline {result['verdict']} from {route['model']}, escalating to {stronger['model']}")
+            reference = await self._decide(messages, stronger, on_progress)
+            self.router.record_escalation(route, result, reference)
+            return reference
+        return result
+
+    def _is_cacheable(self, result: dict) -> bool:
+        """Only genuine verdicts are cached, never System/AI error fallbacks."""
+        return not str(result.get("reason", "")).startswith(("System Error", "AI Error"))
+
+    def evaluate_submission(self, job_desc: str, code: str, language: str) -> dict:
+        """
+        Uses Gemini to statically analyze code against requirements.
+        Returns: {'verdict': 'PASS' | 'FAIL', 'reason': 'str'}
+        """
+        messages = self._build_messages(job_desc, code, language)
+
+        try:
+            response_text = self.ai.chat_completion(
+                messages, model=JUDGE_MODEL, temperature=JUDGE_TEMPERATURE, response_schema=VERDICT_SCHEMA
+            )
+            return self._parse_verdict(response_text)
+        except Exception as e:
+            logger.error(f"Judge Error: {e}")
+            return {"verdict": "FAIL", "reason": f"System Error: {str(e)}"}
+
+    async def aevaluate_submission(
+        self, job_desc: str, code: str, language: str, on_progress=None, route: dict = None, context: str = ""
+    ) -> dict:
+        """
+        Async version of evaluate_submission: awaits Gemini directly instead of
+        occupying a threadpool thread for the length of the review.
+        Identical (job, submission, model, prompt) inputs are answered from the verdict cache.
+        With on_progress the response is streamed and the verdict reported before the reason is complete.
+        `route` (see ModelRouter.route) picks the model tier, the router's default tier otherwise.
+        `context` is background for the judge (e.g. similar past jobs), shown after the code.
+        Returns: {'verdict': 'PASS' | 'FAIL', 'reason': 'str'}
+        """
+        route = route or self.router.route()
+        model_key = _model_key(route)
+        cache_key = self.cache.make_key(job_desc, code, model_key, PROMPT_VERSION, context)
+        cached = await self.cache.get(cache_key)
+        if cached:
+            logger.info("Verdict cache hit, skipping LLM call")
+            return cached
+
+        messages = self._build_messages(job_desc, code, language, context=context)
+
+        try:
+            result = await self._decide(messages, route, on_progress)
+            if self._is_cacheable(result):
+                await self.cache.set(cache_key, result, model_key, PROMPT_VERSION)
+            return result
+        except Exception as e:
+            logger.error(f"Judge Error: {e}")
+            return {"verdict": "FAIL", "reason": f"System Error: {str(e)}"}
+
+    async def areview_submission(
+        self, job_desc: str, notes: str, file_names: list[str], documents: list[dict], on_progress=None,
+        amount: float = 0.0, context: str = "",
+    ) -> dict:
+        """
+        Reviews an ingested submission within the prompt budget.
+        Small submissions get one judge call. Larger ones are split by the context planner
+        into relevance-ranked chunks that are reviewed in parallel and reduced to one verdict.
+        on_progress(event) receives chunk progress and the early verdict of the final call.
+        The model tier is routed on the job's payout `amount` and the submission size.
+        `context` goes to the final judge call (the single review or the reduce step).
+        Returns: {'verdict': 'PASS' | 'FAIL', 'reason': 'str'}
+        """
+        plan = await plan_context(job_desc, documents, ai=self.ai)
+        chunks = plan["chunks"]
+        route = self.router.route(amount=amount, tokens=plan["total_tokens"])
+        if on_progress:
+            on_progress({"event": "route", "tier": route["tier"], "model": route["model"], "samples": route["samples"]})
+
+        if len(chunks) == 1:
+            code = build_submission_text(notes, file_names, chunks[0])
+            return await self.aevaluate_submission(
+                job_desc=job_desc, code=code, language="Multi-File Project", on_progress=on_progress, route=route,
+                context=context,
+            )
+
+        print(f"🧩 Submission is ~{plan['total_tokens']} tokens, reviewing in {len(chunks)} chunks")
+        model_key = _model_key(route)
+        cache_key = self.cache.make_key(
+            job_desc, build_submission_text(notes, file_names, documents), model_key, PROMPT_VERSION, context
+        )
+        cached = await self.cache.get(cache_key)
+        if cached:
+            logger.info("Verdict cache hit, skipping LLM call")
+            return cached
+
+        try:
+            partials = await asyncio.gather(*[
+                self._review_chunk(job_desc, notes, file_names, chunk, index, len(chunks), route, on_progress)
+                for index, chunk in enumerate(chunks, start=1)
+            ])
+            result = await self._reduce_reviews(job_desc, partials, plan["dropped"], route, on_progress, context)
+            if self._is_cacheable(result) and all(self._is_cacheable(p) for p in partials):
+                await self.cache.set(cache_key, result, model_key, PROMPT_VERSION)
             return result
+        except Exception as e:
+            logger.error(f"Judge Error: {e}")
+            return {"verdict": "FAIL", "reason": f"System Error: {str(e)}"}
+
+    async def areview_changes(
+        self, job_desc: str, changes: str, previous_reason: str, tokens: int, on_progress=None,
+        amount: float = 0.0, context: str = "", min_confidence: float = 0.0,
+    ) -> dict:
+        """
+        Judges a resubmission on its changes since the previous FAIL (see app/incremental.py)
+        in one call, routed on the size of the changes.
+        Returns: {'verdict': 'PASS' | 'FAIL', 'reason': 'str'}, or None when the judge errs or is
+        less sure than `min_confidence` (the caller then reviews the whole submission).
+        """
+        route = self.router.route(amount=amount, tokens=tokens)
+        if on_progress:
+            on_progress({"event": "route", "tier": route["tier"], "model": route["model"], "samples": route["samples"], "incremental": True})
+        code = f"PREVIOUS VERDICT: FAIL - {previous_reason}\n\n{changes}"
+        model_key = _model_key(route)
+        prompt_version = f"{PROMPT_VERSION}-incremental"
+        cache_key = self.cache.make_key(job_desc, code, model_key, prompt_version, context)
+        cached = await self.cache.get(cache_key)
+        if cached:
+            logger.info("Verdict cache hit, skipping LLM call")
+            return cached
 
-        except json.JSONDecodeError:
-            logger.error(f"JSON Decode Error. Raw AI Output: {response_text}")
-            return {"verdict": "FAIL", "reason": "System Error: AI response was not valid JSON."}
+        messages = self._build_messages(
+            job_desc, code, "Changes Since Previous Submission", system_prompt=INCREMENTAL_PROMPT, context=context
+        )
+        try:
+            result = await self._decide(messages, route, on_progress)
         except Exception as e:
             logger.error(f"Judge Error: {e}")
-            return {"verdict": "FAIL", "reason": f"System Error: {str(e)}"}
\ No newline at end of file
+            return None
+        if not self._is_cacheable(result) or result.get("confidence", 1.0) < min_confidence:
+            return None
+        await self.cache.set(cache_key, result, model_key, prompt_version)
+        return result
+
+    async def _review_chunk(
+        self, job_desc: str, notes: str, file_names: list[str], chunk: list[dict], index: int, total: int,
+        route: dict, on_progress=None,
+    ) -> dict:
+        code = build_submission_text(notes, file_names, chunk)
+        messages = self._build_messages(
+            job_desc, code, f"Multi-File Project, part {index} of {total}", system_prompt=CHUNK_REVIEW_PROMPT
+        )
+        # Parts are summaries for the reduce step: one sample on the routed model is enough
+        result = await self._ask(messages, model=route["model"])
+        if on_progress:
+            on_progress({"event": "chunk", "part": index, "total": total, "verdict": result["verdict"]})
+        return result
+
+    async def _reduce_reviews(
+        self, job_desc: str, partials: list[dict], dropped: list[str], route: dict, on_progress=None,
+        context: str = "",
+    ) -> dict:
+        reviews = "\n".join(
+            f"PART {i}: {p['verdict']} - {p.get('reason', '')}" for i, p in enumerate(partials, start=1)
+        )
+        if dropped:
+            reviews += f"\n\nNOT REVIEWED (least relevant, over budget): {', '.join(dropped)}"
+        messages = self._build_messages(job_desc, reviews, "Part Reviews", system_prompt=REDUCE_PROMPT, context=context)
+        return await self._decide(messages, route, on_progress)
+
+
+def _model_key(route: dict) -> str:
+    """Cache key part for a tier: verdicts from different models or vote sizes are not interchangeable."""
+    return route["model"] if route["samples"] == 1 else f"{route['model']}x{route['samples']}"
@@ -1,22 +1,94 @@
 # backend/llm_client.py
 import os
+import time
+import random
+import asyncio
 import logging
+import httpx
 from google import genai
-from google.genai import types
+from google.genai import types, errors
 from dotenv import load_dotenv
+from app.metrics import LLM_SECONDS, record_llm_usage
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger("uvicorn")
 
+# Async path tuning: max in-flight Gemini requests per process and retry policy
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 64))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 1.0))
+LLM_BACKOFF_CAP = float(os.getenv("LLM_BACKOFF_CAP_SECONDS", 30.0))
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
 class VertexAIClient:
     def __init__(self):
         # Initialize the new Gen AI Client
         # ensure GOOGLE_API_KEY is set in your .env file
+        # The async path shares one keep-alive connection pool sized to the concurrency limit
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONCURRENCY,
+                max_keepalive_connections=LLM_MAX_CONCURRENCY,
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
         self.client = genai.Client(
             api_key=os.getenv("GOOGLE_API_KEY"),
-            http_options=types.HttpOptions(api_version="v1")
+            http_options=types.HttpOptions(
+                api_version="v1",
+                httpx_async_client=self.http_client,
+            )
+        )
+        self.semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    def _build_contents(self, messages: list[dict]) -> list:
+        """
+        Manual prompt construction for System/User/Assistant roles.
+        Supports multimodal input (Text + Images).
+        """
+        combined_contents = []
+        current_text_chunk = ""
+
+        for msg in messages:
+            role_label = msg["role"].capitalize()  # "System", "User", "Assistant"
+            content = msg["content"]
+
+            # Add Role Label to text buffer
+            current_text_chunk += f"{role_label}: "
+
+            if isinstance(content, str):
+                current_text_chunk += f"{content}\n\n"
+
+            elif isinstance(content, list):
+                # Handle Multimodal List
+                for part in content:
+                    if isinstance(part, str):
+                        current_text_chunk += f"{part}\n"
+                    elif hasattr(part, 'inline_data') or hasattr(part, 'file_data'):
+                        # If we hit an image part, flush the text buffer first
+                        if current_text_chunk:
+                            combined_contents.append(current_text_chunk)
+                            current_text_chunk = "" # Reset buffer
+                        
+                        # Add the image part directly
+                        combined_contents.append(part)
+
+                current_text_chunk += "\n\n"
+
+        # Append remaining text
+        if current_text_chunk:
+            combined_contents.append(current_text_chunk)
+        return combined_contents
+
+    def _generation_config(self, **kwargs) -> types.GenerateContentConfig:
+        """Sampling settings; a `response_schema` switches the model to structured JSON output."""
+        schema = kwargs.get("response_schema")
+        return types.GenerateContentConfig(
+            temperature=kwargs.get("temperature", 0.7),
+            response_mime_type="application/json" if schema else None,
+            response_schema=schema,
         )
 
     def chat_completion(
@@ -27,55 +99,120 @@ class VertexAIClient:
         Supports multimodal input (Text + Images).
         """
         try:
-            combined_contents = []
-            current_text_chunk = ""
-
-            for msg in messages:
-                role_label = msg["role"].capitalize()  # "System", "User", "Assistant"
-                content = msg["content"]
-
-                # Add Role Label to text buffer
-                current_text_chunk += f"{role_label}: "
-
-                if isinstance(content, str):
-                    current_text_chunk += f"{content}\n\n"
-
-                elif isinstance(content, list):
-                    # Handle Multimodal List
-                    for part in content:
-                        if isinstance(part, str):
-                            current_text_chunk += f"{part}\n"
-                        elif hasattr(part, 'inline_data') or hasattr(part, 'file_data'):
-                            # If we hit an image part, flush the text buffer first
-                            if current_text_chunk:
-                                combined_contents.append(current_text_chunk)
-                                current_text_chunk = "" # Reset buffer
-                            
-                            # Add the image part directly
-                            combined_contents.append(part)
-
-                    current_text_chunk += "\n\n"
-
-            # Append remaining text
-            if current_text_chunk:
-                combined_contents.append(current_text_chunk)
+            combined_contents = self._build_contents(messages)
 
             # Call the model
             # Note: I changed default model to 'gemini-2.0-flash-exp' as 2.5 is not public yet.
             # Change back to 'gemini-2.5-flash' if you have early access.
+            start = time.perf_counter()
             response = self.client.models.generate_content(
                 model=model,
                 contents=combined_contents,
-                config=types.GenerateContentConfig(
-                    temperature=kwargs.get("temperature", 0.7)
-                )
+                config=self._generation_config(**kwargs)
             )
+            LLM_SECONDS.observe(time.perf_counter() - start, model=model, outcome="ok")
+            record_llm_usage(model, response)
             return response.text
 
         except Exception as err:
             logger.exception(f"Error in VertexAIClient.chat_completion: {err}")
             return "Error generating response."
 
+    async def achat_completion(
+        self, messages: list[dict], model: str = "gemini-2.0-flash-exp", **kwargs
+    ) -> str:
+        """
+        Async counterpart of chat_completion on the genai async client.
+        At most LLM_MAX_CONCURRENCY requests are in flight per process; rate limits
+        and transient server errors are retried with jittered exponential backoff.
+        """
+        try:
+            response = await self._call_with_retries(
+                self.client.aio.models.generate_content,
+                model=model,
+                contents=self._build_contents(messages),
+                config=self._generation_config(**kwargs)
+            )
+            return response.text
+
+        except Exception as err:
+            logger.exception(f"Error in VertexAIClient.achat_completion: {err}")
+            return "Error generating response."
+
+    async def astream_completion(
+        self, messages: list[dict], model: str = "gemini-2.0-flash-exp", **kwargs
+    ):
+        """
+        Streaming counterpart of achat_completion: yields the response text as it arrives.
+        Holds a concurrency slot for the whole stream. Errors before the first chunk are
+        retried like achat_completion; once text has been yielded they are raised.
+        """
+        request = {
+            "model": model,
+            "contents": self._build_contents(messages),
+            "config": self._generation_config(**kwargs),
+        }
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            started = False
+            try:
+                async with self.semaphore:
+                    start = time.perf_counter()
+                    last_chunk = None
+                    try:
+                        async for chunk in await self.client.aio.models.generate_content_stream(**request):
+                            last_chunk = chunk
+                            if chunk.text:
+                                started = True
+                                yield chunk.text
+                    except Exception:
+                        LLM_SECONDS.observe(time.perf_counter() - start, model=model, outcome="error")
+                        raise
+                    LLM_SECONDS.observe(time.perf_counter() - start, model=model, outcome="ok")
+                    # Usage is reported on the final chunk
+                    record_llm_usage(model, last_chunk)
+                    return
+            except errors.APIError as err:
+                if started or err.code not in RETRYABLE_STATUS_CODES or attempt == LLM_MAX_RETRIES:
+                    raise
+                delay = self._retry_delay(err, attempt)
+                logger.warning(f"Gemini stream returned {err.code}, retrying in {delay:.1f}s (attempt {attempt + 1}/{LLM_MAX_RETRIES})")
+                await asyncio.sleep(delay)
+
+    async def _call_with_retries(self, method, **request):
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with self.semaphore:
+                    start = time.perf_counter()
+                    try:
+                        response = await method(**request)
+                    except Exception:
+                        LLM_SECONDS.observe(time.perf_counter() - start, model=request.get("model"), outcome="error")
+                        raise
+                LLM_SECONDS.observe(time.perf_counter() - start, model=request.get("model"), outcome="ok")
+                record_llm_usage(request.get("model"), response)
+                return response
+            except errors.APIError as err:
+                if err.code not in RETRYABLE_STATUS_CODES or attempt == LLM_MAX_RETRIES:
+                    raise
+                delay = self._retry_delay(err, attempt)
+                logger.warning(f"Gemini returned {err.code}, retrying in {delay:.1f}s (attempt {attempt + 1}/{LLM_MAX_RETRIES})")
+                # Sleep outside the semaphore so backoff does not hold a slot
+                await asyncio.sleep(delay)
+
+    def _retry_delay(self, err: errors.APIError, attempt: int) -> float:
+        """Honours Retry-After on 429s, otherwise full-jitter exponential backoff."""
+        retry_after = getattr(getattr(err, "response", None), "headers", {}).get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), LLM_BACKOFF_CAP) + random.uniform(0, LLM_BACKOFF_BASE)
+            except ValueError:
+                pass
+        return random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * (2 ** attempt)))
+
+    async def aclose(self):
+        """Closes the shared async connection pool. Call this on shutdown."""
+        await self.http_client.aclose()
+
     def execute_code(self, text_prompt: str) -> str:
         """
         Executes code using the Gemini Code Execution tool.
@@ -107,4 +244,27 @@ class VertexAIClient:
             return response.embeddings[0].values
         except Exception as err:
             logger.exception(f"Error generating embedding: {err}")
+            return []
+
+    async def aembed_texts(
+        self, texts: list[str], model: str = "text-embedding-004", batch_size: int = 100, dimensions: int = None
+    ) -> list[list[float]]:
+        """
+        Embeds many texts on the async client, batch_size texts per request.
+        `dimensions` truncates the vectors (output_dimensionality), the model's full size otherwise.
+        Returns one vector per input text, or [] if any batch fails.
+        """
+        try:
+            vectors = []
+            for start in range(0, len(texts), batch_size):
+                response = await self._call_with_retries(
+                    self.client.aio.models.embed_content,
+                    model=model,
+                    contents=texts[start:start + batch_size],
+                    config=types.EmbedContentConfig(output_dimensionality=dimensions) if dimensions else None,
+                )
+                vectors.extend(e.values for e in response.embeddings)
+            return vectors
+        except Exception as err:
+            logger.exception(f"Error generating embeddings: {err}")
             return []
\ No newline at end of file
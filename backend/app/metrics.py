@@ -0,0 +1,129 @@
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from pymongo import monitoring
+
+logger = logging.getLogger("uvicorn")
+
+# Spans slower than this are also logged, so slow stages show up without scraping /metrics
+SLOW_SPAN_SECONDS = float(os.getenv("SLOW_SPAN_SECONDS", 5.0))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+BYTES_BUCKETS = (1024, 16384, 131072, 524288, 1048576, 2097152, 8388608)
+
+
+class Histogram:
+    """
+    Minimal thread-safe Prometheus histogram (cumulative buckets, _sum and _count per label set).
+    Observed from worker threads (web3, pymongo monitoring) as well as the event loop.
+    """
+
+    def __init__(self, name: str, documentation: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+        registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.setdefault(key, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _label_text(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{label}="{value}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = {key: list(series) for key, series in self.series.items()}
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self._label_text(key, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {series[-1]}")
+        return lines
+
+
+registry: list[Histogram] = []
+
+STAGE_SECONDS = Histogram(
+    "teleo_stage_seconds", "Latency of submission pipeline stages.", ("stage",), LATENCY_BUCKETS)
+HTTP_SECONDS = Histogram(
+    "teleo_http_request_seconds", "Latency of API requests by route.", ("method", "route", "status"), LATENCY_BUCKETS)
+LLM_SECONDS = Histogram(
+    "teleo_llm_request_seconds", "Latency of Gemini calls, per attempt.", ("model", "outcome"), LATENCY_BUCKETS)
+LLM_TOKENS = Histogram(
+    "teleo_llm_tokens", "Tokens per Gemini call.", ("model", "kind"), TOKEN_BUCKETS)
+RPC_SECONDS = Histogram(
+    "teleo_rpc_request_seconds", "Latency of JSON-RPC calls to the chain node.", ("method", "chain"), LATENCY_BUCKETS)
+MONGO_SECONDS = Histogram(
+    "teleo_mongo_command_seconds", "Latency of MongoDB commands.", ("command", "outcome"), LATENCY_BUCKETS)
+INGEST_BYTES = Histogram(
+    "teleo_ingest_bytes", "Text bytes ingested per uploaded file and per submission.", ("kind",), BYTES_BUCKETS)
+
+
+def render() -> str:
+    """The registry in Prometheus text exposition format (served at /metrics)."""
+    return "\n".join(line for histogram in registry for line in histogram.render()) + "\n"
+
+
+@contextmanager
+def span(stage: str, timings: dict = None):
+    """
+    Times a block into teleo_stage_seconds{stage=...}.
+    If a timings dict is given the duration is also recorded there (used to store
+    a per-submission breakdown next to the verdict).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0) + elapsed, 4)
+        if elapsed >= SLOW_SPAN_SECONDS:
+            logger.warning(f"slow span stage={stage} seconds={elapsed:.3f}")
+
+
+def record_llm_usage(model: str, response):
+    """Token counts reported by Gemini (embedding responses carry none)."""
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+    for kind, count in (("prompt", usage.prompt_token_count), ("completion", usage.candidates_token_count)):
+        if count:
+            LLM_TOKENS.observe(count, model=model, kind=kind)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Registered on the Motor client: times every command the driver sends."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name, outcome="ok")
+
+    def failed(self, event):
+        MONGO_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name, outcome="error")
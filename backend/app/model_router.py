@@ -0,0 +1,134 @@
+import os
+import json
+import logging
+from collections import defaultdict
+from app.metrics import Histogram, LATENCY_BUCKETS
+
+logger = logging.getLogger("uvicorn")
+
+# Routing policy: JSON in JUDGE_ROUTING_POLICY, either inline or a path to a file.
+# Rules are checked in order and the first match picks the tier; amounts are in MNEE,
+# tokens are the context planner's estimate for the whole submission.
+# Routing is off by default: every review runs on the standard tier, as before. The
+# tiers stay defined so a policy (or rejudge --tier) can name them.
+DEFAULT_POLICY = {
+    "tiers": {
+        # usd_per_1k_tokens is the input price, used for the spend estimate in get_stats()
+        "fast": {"model": os.getenv("JUDGE_MODEL_FAST", "gemini-2.0-flash-lite"), "samples": 1, "usd_per_1k_tokens": 0.000075},
+        "standard": {"model": os.getenv("JUDGE_MODEL", "gemini-2.0-flash-exp"), "samples": 1, "usd_per_1k_tokens": 0.0001},
+        "strong": {"model": os.getenv("JUDGE_MODEL_STRONG", "gemini-2.5-pro"), "samples": 1, "usd_per_1k_tokens": 0.00125},
+        # Majority of three strong reviews, for policies that want votes on the largest payouts
+        "critical": {"model": os.getenv("JUDGE_MODEL_STRONG", "gemini-2.5-pro"), "samples": 3, "usd_per_1k_tokens": 0.00125},
+    },
+    "rules": [],
+    "default": "standard",
+    # Verdicts the model itself is unsure about are re-judged one tier up
+    "borderline_confidence": 0.6,
+    "escalation": {},
+}
+
+# Opt-in tiering (JUDGE_ROUTING_POLICY=tiered): high-value payouts always go to the strong
+# tier and are never escalated or sent to a cheaper tier; small payouts go to the fast
+# tier and borderline fast verdicts are re-judged on the standard tier. Whether it pays
+# off depends on the payout mix, since a strong review costs 12.5x a standard one;
+# compare with benchmarks/bench_router before turning it on.
+HIGH_VALUE_AMOUNT = float(os.getenv("JUDGE_HIGH_VALUE_AMOUNT", 500))
+TIERED_POLICY = {
+    **DEFAULT_POLICY,
+    "rules": [
+        {"tier": "strong", "min_amount": HIGH_VALUE_AMOUNT},
+        {"tier": "fast", "max_amount": 200},
+    ],
+    "escalation": {"fast": "standard"},
+}
+
+ROUTED_SECONDS = Histogram(
+    "teleo_judge_route_seconds", "Judge time per routing tier (all votes of a tier together).", ("tier", "model", "verdict"), LATENCY_BUCKETS)
+
+
+def load_policy(raw: str = None) -> dict:
+    raw = raw if raw is not None else os.getenv("JUDGE_ROUTING_POLICY", "")
+    if not raw:
+        return DEFAULT_POLICY
+    if raw == "tiered":
+        return TIERED_POLICY
+    if not raw.lstrip().startswith("{"):
+        with open(raw) as file:
+            raw = file.read()
+    policy = {**DEFAULT_POLICY, **json.loads(raw)}
+
+    tiers = policy["tiers"]
+    referenced = [rule["tier"] for rule in policy["rules"]] + [policy["default"]]
+    referenced += list(policy["escalation"].keys()) + list(policy["escalation"].values())
+    unknown = sorted(set(referenced) - set(tiers))
+    if unknown:
+        raise ValueError(f"Routing policy references unknown tiers: {', '.join(unknown)}")
+    return policy
+
+
+class ModelRouter:
+    """
+    Picks the model (and number of votes) for a review from the job's payout and size,
+    escalates borderline verdicts, and keeps per-model latency, spend and agreement stats.
+    """
+
+    def __init__(self, policy: dict = None):
+        self.policy = policy or load_policy()
+        self.stats = defaultdict(lambda: {
+            "calls": 0, "pass": 0, "fail": 0, "seconds": 0.0, "prompt_tokens": 0, "usd": 0.0,
+            "escalated": 0, "agreed": 0, "overruled": 0,
+        })
+
+    def tier(self, name: str) -> dict:
+        return {"tier": name, **self.policy["tiers"][name]}
+
+    def route(self, amount: float = 0.0, tokens: int = 0) -> dict:
+        """Returns the tier for a job: {'tier', 'model', 'samples', 'usd_per_1k_tokens'}."""
+        amount = float(amount or 0)
+        for rule in self.policy["rules"]:
+            if amount < rule.get("min_amount", 0) or tokens < rule.get("min_tokens", 0):
+                continue
+            if "max_amount" in rule and amount > rule["max_amount"]:
+                continue
+            if "max_tokens" in rule and tokens > rule["max_tokens"]:
+                continue
+            return self.tier(rule["tier"])
+        return self.tier(self.policy["default"])
+
+    def escalation(self, route: dict, result: dict):
+        """The next tier up when a verdict is borderline, else None."""
+        confidence = result.get("confidence")
+        if confidence is None or confidence >= self.policy["borderline_confidence"]:
+            return None
+        next_tier = self.policy["escalation"].get(route["tier"])
+        return self.tier(next_tier) if next_tier else None
+
+    def record(self, route: dict, result: dict, seconds: float, prompt_tokens: int):
+        stats = self.stats[route["model"]]
+        stats["calls"] += route["samples"]
+        stats["pass" if result["verdict"] == "PASS" else "fail"] += 1
+        stats["seconds"] += seconds
+        stats["prompt_tokens"] += prompt_tokens * route["samples"]
+        stats["usd"] += prompt_tokens * route["samples"] / 1000 * route.get("usd_per_1k_tokens", 0)
+        ROUTED_SECONDS.observe(seconds, tier=route["tier"], model=route["model"], verdict=result["verdict"])
+
+    def record_escalation(self, route: dict, result: dict, reference: dict):
+        """
+        How often a model's verdict survives review by a stronger tier. This is the
+        accuracy signal available without labelled data.
+        """
+        stats = self.stats[route["model"]]
+        stats["escalated"] += 1
+        stats["agreed" if result["verdict"] == reference["verdict"] else "overruled"] += 1
+
+    def get_stats(self) -> dict:
+        models = {}
+        for model, stats in self.stats.items():
+            verdicts = stats["pass"] + stats["fail"]
+            models[model] = {
+                **stats,
+                "usd": round(stats["usd"], 6),
+                "mean_seconds": round(stats["seconds"] / verdicts, 3) if verdicts else 0.0,
+                "agreement_rate": round(stats["agreed"] / stats["escalated"], 4) if stats["escalated"] else None,
+            }
+        return {"policy": self.policy, "models": models}
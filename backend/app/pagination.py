@@ -0,0 +1,60 @@
+import json
+import base64
+import datetime
+from bson import ObjectId
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# List views return this much of descriptions / notes; the detail endpoints return everything
+PREVIEW_CHARS = 280
+
+
+def encode_cursor(value, doc_id: ObjectId) -> str:
+    """Opaque keyset cursor: the sort key and _id of the last document on the page."""
+    if isinstance(value, datetime.datetime):
+        payload = {"t": value.isoformat(), "id": str(doc_id)}
+    else:
+        payload = {"v": value, "id": str(doc_id)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Returns (sort value, ObjectId). Raises ValueError for a malformed cursor."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value = datetime.datetime.fromisoformat(payload["t"]) if "t" in payload else payload["v"]
+        return value, ObjectId(payload["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def after_cursor(field: str, cursor: str) -> dict:
+    """Query clause for the page after `cursor`, for a (field DESC, _id DESC) sort."""
+    value, doc_id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lt": doc_id}},
+    ]}
+
+
+def page_size(limit: int = None) -> int:
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def preview(field: str) -> dict:
+    """Projection expression that keeps only the first PREVIEW_CHARS of a string field."""
+    return {"$substrCP": [{"$ifNull": [f"${field}", ""]}, 0, PREVIEW_CHARS]}
+
+
+def list_projection(model, previews: tuple = (), computed: tuple = ()) -> dict:
+    """
+    Projection for a list-view response model: its stored fields, with `previews` cut to
+    PREVIEW_CHARS. `computed` fields are filled in after the query.
+    """
+    projection = {}
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        if key == "_id" or key in computed:
+            continue
+        projection[key] = preview(key) if key in previews else 1
+    return projection
@@ -0,0 +1,143 @@
+import os
+import asyncio
+import datetime
+from app.database import get_database, job_key
+from app.change_feed import jobs_changed
+
+# Payout lifecycle stored on db.submissions.payout_status (jobs move PAYING -> PAID)
+QUEUED = "QUEUED"  # waiting for the next releaseFundsBatch (PAYOUT_MODE=batch)
+PENDING = "PENDING"
+CONFIRMED = "CONFIRMED"
+REVERTED = "REVERTED"
+
+PAYOUT_WATCH_SECONDS = float(os.getenv("PAYOUT_WATCH_SECONDS", 4))
+# Job states in which a payout is under way or done (PAYOUT_QUEUED / BATCHING: see batch_payouts.py)
+PAYOUT_JOB_STATES = ("PAYING", "PAID", "REFUNDED", "PAYOUT_QUEUED", "BATCHING")
+# A PAYING claim that never got a tx hash (the process died before broadcasting) is taken over after this long
+PAYOUT_CLAIM_SECONDS = int(os.getenv("PAYOUT_CLAIM_SECONDS", 300))
+
+
+class ReceiptWatcher:
+    task: asyncio.Task = None
+
+watcher = ReceiptWatcher()
+
+
+async def claim_payout(job_id: str, status: str, chain_id: int = None, **fields):
+    """
+    Atomically moves a job into `status` (PAYING, or PAYOUT_QUEUED in batch mode) unless a
+    payout for it is already under way or done, so concurrent PASS verdicts pay a job once.
+    Returns the job's previous status, or None when another payout got there first.
+    """
+    db = get_database()
+    now = datetime.datetime.now()
+    job = await db.jobs.find_one_and_update(
+        {**job_key(job_id, chain_id), "$or": [
+            {"status": {"$nin": PAYOUT_JOB_STATES}},
+            {"status": "PAYING", "tx_hash": None,
+             "payout_claimed_at": {"$lt": now - datetime.timedelta(seconds=PAYOUT_CLAIM_SECONDS)}},
+        ]},
+        {"$set": {"status": status, "payout_claimed_at": now, **fields}},
+        projection={"status": 1},
+    )
+    if job is None:
+        return None
+    return job.get("status") or "OPEN"
+
+
+async def release_payout_claim(job_id: str, previous_status: str, chain_id: int = None):
+    """Undoes claim_payout when the payout could not be sent."""
+    db = get_database()
+    await db.jobs.update_one(
+        job_key(job_id, chain_id), {"$set": {"status": previous_status}, "$unset": {"payout_claimed_at": ""}}
+    )
+    await jobs_changed(job_id)
+
+
+async def _settle(job: dict, receipt, paid: bool):
+    db = get_database()
+    now = datetime.datetime.now()
+    # Batched payouts share a tx hash, so submissions are matched on the job too
+    submission_filter = {"tx_hash": job["tx_hash"], "chain_job_id": job["chain_job_id"]}
+    if paid:
+        print(f"✅ Payout confirmed for Job #{job['chain_job_id']} in block {receipt['blockNumber']}")
+        await db.jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "PAID"}})
+        await db.submissions.update_many(
+            submission_filter,
+            {"$set": {"payout_status": CONFIRMED, "payout_confirmed_at": now}}
+        )
+        await jobs_changed(job["chain_job_id"])
+        return
+
+    print(f"❌ Payout failed on chain for Job #{job['chain_job_id']} ({job['tx_hash']})")
+    # Back to ASSIGNED so the freelancer can be paid by a later submission
+    await db.jobs.update_one({"_id": job["_id"]}, {"$set": {"status": "ASSIGNED"}, "$unset": {"tx_hash": ""}})
+    await db.submissions.update_many(
+        submission_filter,
+        {"$set": {"payout_status": REVERTED, "reason": "Payout failed: transaction reverted or job skipped on chain"}}
+    )
+    await jobs_changed(job["chain_job_id"])
+
+
+async def confirm_pending_payouts() -> int:
+    """Checks receipts for every job in PAYING state. Returns how many were settled."""
+    # Imported on first use: app.chain pulls in web3 and eth_account, most of main's import time
+    from app.chain import aget_receipt, get_failed_releases
+    db = get_database()
+    pending = await db.jobs.find(
+        {"status": "PAYING", "tx_hash": {"$ne": None}},
+        {"chain_job_id": 1, "tx_hash": 1, "chain_id": 1}
+    ).to_list(length=500)
+    if not pending:
+        return 0
+
+    # Each tx is looked up on its job's chain; a chain whose RPC fails is retried next round
+    txs = list(dict.fromkeys((job.get("chain_id"), job["tx_hash"]) for job in pending))
+    receipts = await asyncio.gather(
+        *[aget_receipt(tx_hash, chain_id) for chain_id, tx_hash in txs], return_exceptions=True
+    )
+    receipts = dict(zip(txs, receipts))
+    for (chain_id, tx_hash), receipt in receipts.items():
+        if isinstance(receipt, Exception):
+            print(f"⚠️ Receipt lookup for {tx_hash} (chain {chain_id}) failed: {receipt}")
+            receipts[(chain_id, tx_hash)] = None
+    # Jobs a successful releaseFundsBatch skipped, per tx
+    skipped = {
+        tx: get_failed_releases(receipt, tx[0])
+        for tx, receipt in receipts.items() if receipt is not None and receipt["status"] == 1
+    }
+
+    settled = 0
+    for job in pending:
+        tx = (job.get("chain_id"), job["tx_hash"])
+        receipt = receipts[tx]
+        if receipt is None:
+            continue
+        paid = receipt["status"] == 1 and int(job["chain_job_id"]) not in skipped[tx]
+        await _settle(job, receipt, paid)
+        settled += 1
+    return settled
+
+
+async def _watch_loop():
+    while True:
+        try:
+            await confirm_pending_payouts()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Receipt Watcher Error: {e}")
+        await asyncio.sleep(PAYOUT_WATCH_SECONDS)
+
+
+def start_receipt_watcher():
+    """Call this on startup"""
+    watcher.task = asyncio.create_task(_watch_loop())
+
+
+async def stop_receipt_watcher():
+    """Call this on shutdown"""
+    if watcher.task:
+        watcher.task.cancel()
+        await asyncio.gather(watcher.task, return_exceptions=True)
+        watcher.task = None
@@ -0,0 +1,157 @@
+import os
+import ast
+import json
+import hashlib
+from html.parser import HTMLParser
+from app.database import get_database, job_key
+from app import job_queue
+
+# Deterministic checks run before a submission is queued for the AI Judge.
+# Only clear-cut failures are decided here; anything uncertain goes to the LLM.
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "true").lower() == "true"
+PRESCREEN_MAX_FILES = int(os.getenv("PRESCREEN_MAX_FILES", 200))
+# Below this many bytes of code and notes together there is nothing to review
+PRESCREEN_MIN_BYTES = int(os.getenv("PRESCREEN_MIN_BYTES", 16))
+# Duplicate detection needs at least this many bytes of file content: notes alone or a
+# tiny file ("done", an empty README) repeat across honest submissions
+PRESCREEN_DUPLICATE_MIN_BYTES = int(os.getenv("PRESCREEN_DUPLICATE_MIN_BYTES", 256))
+
+# Elements whose content is raw text: if one is left open the rest of the file is swallowed
+HTML_RAW_TEXT_TAGS = {"script", "style", "textarea"}
+# Judge fallbacks that are not real verdicts (see TeleoJudge._is_cacheable)
+ERROR_REASON_PREFIXES = ("System Error", "AI Error")
+
+
+def content_hash(notes: str, documents: list[dict], blobs: list[dict] = None) -> str:
+    """
+    sha256 over the text files (name + content) and the binary files (name + blob sha256),
+    or the notes when there are none.
+    """
+    digest = hashlib.sha256()
+    texts = sorted((d["name"], d["text"]) for d in documents if not d["binary"] and d["text"].strip())
+    binaries = sorted((b["name"], b["sha256"]) for b in blobs or [] if b["binary"])
+    if not texts and not binaries:
+        digest.update(" ".join((notes or "").split()).encode())
+    for name, text in texts:
+        digest.update(name.encode() + b"\0" + text.encode() + b"\0")
+    # Marked apart from the texts, so text-only hashes stay what they were
+    for name, sha256 in binaries:
+        digest.update(b"\1" + name.encode() + b"\0" + sha256.encode() + b"\0")
+    return digest.hexdigest()
+
+
+def file_bytes(documents: list[dict], blobs: list[dict] = None) -> int:
+    """Bytes of file content that content_hash covers: text files and binary blobs, not the notes."""
+    text_bytes = sum(len(d["text"].strip()) for d in documents if not d["binary"])
+    return text_bytes + sum(b["bytes"] for b in blobs or [] if b["binary"])
+
+
+def _python_error(text: str):
+    try:
+        ast.parse(text)
+    except SyntaxError as e:
+        return f"line {e.lineno}: {e.msg}"
+    except ValueError as e:  # e.g. null bytes in the source
+        return str(e)
+
+
+def _json_error(text: str):
+    try:
+        json.loads(text)
+    except ValueError as e:
+        return str(e)
+
+
+class _RawTextTagChecker(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.open_tag = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HTML_RAW_TEXT_TAGS:
+            self.open_tag = (tag, self.getpos()[0])
+
+    def handle_endtag(self, tag):
+        if self.open_tag and tag == self.open_tag[0]:
+            self.open_tag = None
+
+
+def _html_error(text: str):
+    """HTML is forgiving by design: only unclosed <script>/<style>/<textarea> are fatal."""
+    checker = _RawTextTagChecker()
+    checker.feed(text)
+    checker.close()
+    if checker.open_tag:
+        return f"line {checker.open_tag[1]}: <{checker.open_tag[0]}> is never closed"
+
+
+# No JavaScript check: without a real parser, JSX and regex literals are indistinguishable
+# from broken code, and a false failure here is worse than leaving it to the judge
+SYNTAX_CHECKERS = {
+    ".py": _python_error,
+    ".json": _json_error,
+    ".html": _html_error,
+}
+
+
+def syntax_error(document: dict):
+    """Returns a parse error for a supported file type, else None (truncated files are not checked)."""
+    if document["binary"] or document["truncated"]:
+        return None
+    checker = SYNTAX_CHECKERS.get(os.path.splitext(document["name"].lower())[1])
+    return checker(document["text"]) if checker else None
+
+
+def check_documents(notes: str, documents: list[dict]):
+    """Local checks that need no database. Returns a failure reason or None."""
+    if len(documents) > PRESCREEN_MAX_FILES:
+        return f"Too many files ({len(documents)}); at most {PRESCREEN_MAX_FILES} are reviewed."
+
+    text_bytes = sum(len(d["text"].strip()) for d in documents if not d["binary"])
+    if text_bytes + len((notes or "").strip()) < PRESCREEN_MIN_BYTES:
+        if documents and all(d["binary"] for d in documents):
+            return "Only binary attachments were submitted; there is no readable code or text to review."
+        return "The submission is empty: no code, files or notes to review."
+
+    for document in documents:
+        error = syntax_error(document)
+        if error:
+            return f"{document['name']} does not parse ({error})."
+    return None
+
+
+async def find_duplicate(jobId: str, digest: str, chain_id: int = None):
+    """
+    Looks for an earlier judged submission with the same content.
+    Copies of work submitted to another job fail; a resubmission to the same job
+    fails with the earlier reason if that one failed. Returns a reason or None.
+    """
+    db = get_database()
+    earlier = await db.submissions.find_one(
+        {"content_hash": digest, "status": job_queue.DONE, "verdict": {"$ne": None}},
+        {"chain_job_id": 1, "chain_id": 1, "verdict": 1, "reason": 1},
+        sort=[("created_at", 1)],
+    )
+    if not earlier:
+        return None
+    if job_key(earlier["chain_job_id"], earlier.get("chain_id")) != job_key(jobId, chain_id):
+        return f"Identical to a submission made for Job #{earlier['chain_job_id']}."
+    if earlier["verdict"] == "FAIL" and not str(earlier["reason"]).startswith(ERROR_REASON_PREFIXES):
+        return f"Identical to a previous submission that was rejected: {earlier['reason']}"
+    return None
+
+
+async def prescreen(jobId: str, notes: str, documents: list[dict], blobs: list[dict] = None, chain_id: int = None) -> dict:
+    """
+    Runs the deterministic checks for a submission; `blobs` (the blob manifest) identifies
+    binary files, whose documents carry no content.
+    Returns: {'content_hash': str, 'verdict': 'FAIL' | None, 'reason': str | None}
+    """
+    digest = content_hash(notes, documents, blobs)
+    if not PRESCREEN_ENABLED:
+        return {"content_hash": digest, "verdict": None, "reason": None}
+
+    reason = check_documents(notes, documents)
+    if not reason and file_bytes(documents, blobs) >= PRESCREEN_DUPLICATE_MIN_BYTES:
+        reason = await find_duplicate(jobId, digest, chain_id)
+    return {"content_hash": digest, "verdict": "FAIL" if reason else None, "reason": reason}
@@ -0,0 +1,46 @@
+import os
+import time
+from fastapi.responses import JSONResponse
+
+# Off by default: when enabled, a request sent with `X-Profile: 1` is profiled and the
+# report is written to PROFILE_DIR (its path is returned in the X-Profile-File header).
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/teleo-profiles")
+PROFILE_HEADER = "x-profile"
+
+try:
+    # Sampling profiler with asyncio support; optional, profiled requests get 501 without it
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+
+def wants_profile(request) -> bool:
+    return PROFILER_ENABLED and request.headers.get(PROFILE_HEADER) == "1"
+
+
+def _report_path(request, extension: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    route = request.url.path.strip("/").replace("/", "_") or "root"
+    return os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{request.method}-{route}.{extension}")
+
+
+async def profile_request(request, call_next):
+    """Runs call_next under a profiler and attaches the report path to the response."""
+    if Profiler is None:
+        # cProfile would only see the event loop thread and miss time spent awaiting,
+        # which is most of a request here, so refuse instead of writing a misleading report
+        return JSONResponse({"detail": "Profiling needs pyinstrument installed"}, status_code=501)
+
+    profiler = Profiler(async_mode="enabled")
+    profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+    path = _report_path(request, "html")
+    with open(path, "w") as file:
+        file.write(profiler.output_html())
+
+    response.headers["X-Profile-File"] = path
+    return response
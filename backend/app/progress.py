@@ -0,0 +1,61 @@
+import os
+import json
+import asyncio
+from functools import cached_property
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Seconds between SSE comments on an idle stream, so proxies keep the connection open
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+# Events a slow subscriber may fall behind by before older ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Event(dict):
+    """A published event. Its SSE frame is encoded once, however many subscribers receive it."""
+
+    @cached_property
+    def frame(self) -> str:
+        return f"event: {self['event']}\ndata: {json.dumps(self, default=str)}\n\n"
+
+
+class ProgressBroker:
+    """
+    In-process pub/sub by topic: a submission ID (status changes, early verdicts),
+    "jobs" and "job:<id>" (see change_feed.py). Subscribers hold one bounded queue each,
+    so a publish is a dict lookup plus one put per subscriber.
+    """
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)  # topic -> {asyncio.Queue}
+
+    def publish(self, topic, event: dict):
+        queues = self.subscribers.get(str(topic))
+        if not queues:
+            return
+        event = Event(event)
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @contextmanager
+    def subscribe(self, topic: str):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers[topic].add(queue)
+        try:
+            yield queue
+        finally:
+            self.subscribers[topic].discard(queue)
+            if not self.subscribers[topic]:
+                del self.subscribers[topic]
+
+
+broker = ProgressBroker()
+
+
+def format_sse(event: dict = None) -> str:
+    """One Server-Sent Event frame; None renders a heartbeat comment."""
+    if event is None:
+        return ": keep-alive\n\n"
+    return (event if isinstance(event, Event) else Event(event)).frame
@@ -0,0 +1,448 @@
+"""
+Re-judges past submissions to measure verdict drift after a prompt or model change.
+
+Streams finished submissions from Mongo in _id order and runs each through the current
+judge (TeleoJudge.areview_submission, always a full review) with bounded concurrency.
+Results go to db.rejudge_results, never back to the submissions, and the verdict cache
+is bypassed so every verdict is fresh. Progress is checkpointed on db.rejudge_runs:
+re-running with the same --run-id resumes after the last checkpointed submission whose
+result, and every earlier one's, is stored. A resumed run keeps the filter, policy and
+tier it was started with.
+
+It runs as its own process, so live reviews keep their own LLM concurrency slots. To
+leave provider quota for them:
+  --rpm / --tpm        cap judge calls and (estimated) prompt tokens per minute; set
+                       them to the quota minus live headroom
+  --yield-queue-depth  pause new calls while the live review queue is this deep
+
+Usage (from backend/):
+    python -m app.rejudge --run-id v5-flash --concurrency 16 --rpm 600 --tpm 2000000
+    python -m app.rejudge --run-id v5-flash                      # resume
+    python -m app.rejudge --report v4-flash v5-flash             # compare runs
+Routing follows JUDGE_ROUTING_POLICY, or --policy (inline JSON or a file); --tier forces
+every review onto one tier of it.
+"""
+import os
+import time
+import asyncio
+import argparse
+import datetime
+import statistics
+import contextvars
+from collections import defaultdict, deque
+from app import job_queue
+from app.database import connect_to_mongo, close_mongo_connection, get_database, job_key
+from app.ingest import load_documents
+from app.chain import aget_job_details
+from app.prescreen import ERROR_REASON_PREFIXES
+from app.context_planner import estimate_tokens
+from app.model_router import ModelRouter, load_policy
+from app.PROMPTS import PROMPT_VERSION
+from app.services import services
+
+REJUDGE_CONCURRENCY = int(os.getenv("REJUDGE_CONCURRENCY", 8))
+# 0 disables the limit
+REJUDGE_RPM = int(os.getenv("REJUDGE_RPM", 0))
+REJUDGE_TPM = int(os.getenv("REJUDGE_TPM", 0))
+REJUDGE_YIELD_QUEUE_DEPTH = int(os.getenv("REJUDGE_YIELD_QUEUE_DEPTH", 20))
+QUEUE_CHECK_SECONDS = 5.0
+CHECKPOINT_EVERY = 25
+# Outcomes process_submission records without asking the judge
+NOT_JUDGED_REASONS = ("Job not found on chain", "Job already settled on chain")
+
+# Judge calls made for the submission being re-judged: {'calls', 'prompt_tokens', 'models', 'model'}
+_usage = contextvars.ContextVar("rejudge_usage")
+
+
+class RateLimiter:
+    """Token buckets for calls and prompt tokens per minute, refilled continuously."""
+
+    def __init__(self, rpm: int = 0, tpm: int = 0):
+        self.limits = {"calls": rpm, "tokens": tpm}
+        self.available = {"calls": float(rpm), "tokens": float(tpm)}
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        for kind, limit in self.limits.items():
+            self.available[kind] = min(limit, self.available[kind] + (now - self.updated) * limit / 60)
+        self.updated = now
+
+    async def acquire(self, tokens: int):
+        # Callers queue on the lock, so a large request is not starved by small ones
+        async with self.lock:
+            wanted = {"calls": 1, "tokens": tokens}
+            while True:
+                self._refill()
+                short = {
+                    kind: min(wanted[kind], limit) - self.available[kind]
+                    for kind, limit in self.limits.items() if limit
+                }
+                wait = max([need * 60 / self.limits[kind] for kind, need in short.items() if need > 0], default=0)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+            for kind, limit in self.limits.items():
+                if limit:
+                    self.available[kind] -= min(wanted[kind], limit)
+
+
+class LiveTrafficGate:
+    """Holds re-judge calls while live submissions are waiting for a judge."""
+
+    def __init__(self, max_depth: int):
+        self.max_depth = max_depth
+        self.checked = 0.0
+        self.depth = 0
+        self.paused_seconds = 0.0
+
+    async def _depth(self) -> int:
+        if time.monotonic() - self.checked >= QUEUE_CHECK_SECONDS:
+            self.checked = time.monotonic()
+            self.depth = await get_database().submissions.count_documents(
+                {"status": {"$in": [job_queue.QUEUED, *job_queue.IN_FLIGHT]}}
+            )
+        return self.depth
+
+    async def wait(self):
+        if self.max_depth <= 0:
+            return
+        start = time.monotonic()
+        while await self._depth() >= self.max_depth:
+            await asyncio.sleep(QUEUE_CHECK_SECONDS)
+        self.paused_seconds += time.monotonic() - start
+
+
+class ThrottledLLM:
+    """
+    Stands in for the judge's VertexAIClient: every completion first waits for the live
+    traffic gate and the rate limiter, and is counted against the current submission.
+    """
+
+    def __init__(self, ai, limiter: RateLimiter, gate: LiveTrafficGate):
+        self.ai = ai
+        self.limiter = limiter
+        self.gate = gate
+
+    async def _admit(self, messages: list[dict], model: str):
+        tokens = sum(estimate_tokens(m["content"]) for m in messages if isinstance(m["content"], str))
+        await self.gate.wait()
+        await self.limiter.acquire(tokens)
+        usage = _usage.get(None)
+        if usage is not None:
+            usage["calls"] += 1
+            usage["prompt_tokens"] += tokens
+            usage["models"][model] += tokens
+            usage["model"] = model  # the last call decides: reduce step, vote or escalation
+
+    async def achat_completion(self, messages: list[dict], model: str = None, **kwargs) -> str:
+        await self._admit(messages, model)
+        return await self.ai.achat_completion(messages, model=model, **kwargs)
+
+    async def aembed_texts(self, texts: list[str], **kwargs):
+        # Context planner relevance ranking: small, and not a judge call
+        return await self.ai.aembed_texts(texts, **kwargs)
+
+    async def aclose(self):
+        await self.ai.aclose()
+
+
+class NoCache:
+    """The verdict cache would answer with the verdicts being re-checked."""
+
+    async def get(self, key: str):
+        return None
+
+    async def set(self, key: str, verdict: dict, model: str, prompt_version: str):
+        pass
+
+    def make_key(self, *parts, **kwargs) -> str:
+        return ""
+
+
+def _is_genuine(submission: dict) -> bool:
+    """A real judge verdict: not an error fallback or a chain check that failed before the review."""
+    reason = str(submission.get("reason"))
+    return submission.get("verdict") in ("PASS", "FAIL") and not reason.startswith(ERROR_REASON_PREFIXES + NOT_JUDGED_REASONS)
+
+
+def submission_filter(args) -> dict:
+    query = {
+        "status": {"$in": [job_queue.DONE, job_queue.FAILED]},
+        "verdict": {"$in": ["PASS", "FAIL"]},
+        # Claimed by a judge worker; pre-screen rejections are recorded with 0 attempts
+        "attempts": {"$gt": 0},
+    }
+    if args.job:
+        query["chain_job_id"] = {"$in": args.job}
+    if args.chain_id:
+        query["chain_id"] = args.chain_id
+    if args.since:
+        query["created_at"] = {"$gte": datetime.datetime.fromisoformat(args.since)}
+    return query
+
+
+async def _job_inputs(jobId: str, chain_id: int, jobs: dict):
+    """(description, amount) the live review used, from the indexed job or the chain."""
+    key = job_key(jobId, chain_id)
+    if (key["chain_id"], jobId) not in jobs:
+        db_job = await get_database().jobs.find_one(key, {"onchain": 1})
+        details = (db_job or {}).get("onchain") or {}
+        if "description" not in details:
+            details = await aget_job_details(int(jobId), key["chain_id"]) or {}
+        jobs[key["chain_id"], jobId] = (details.get("description"), float(details.get("amount") or 0))
+    return jobs[key["chain_id"], jobId]
+
+
+async def rejudge_one(submission: dict, run: dict, jobs: dict):
+    """Re-judges one submission and stores the result. Returns False when it cannot be re-judged."""
+    description, amount = await _job_inputs(submission["chain_job_id"], submission.get("chain_id"), jobs)
+    if not description:
+        return False
+    if "payload" in submission:
+        documents = submission["payload"]["documents"]
+    else:
+        documents = await load_documents(submission.get("blobs", []))
+
+    usage = {"calls": 0, "prompt_tokens": 0, "models": defaultdict(int), "model": None}
+    _usage.set(usage)
+    judge = await services.aget_judge()
+    start = time.perf_counter()
+    result = await judge.areview_submission(
+        job_desc=description,
+        notes=submission["notes"],
+        file_names=submission["files"],
+        documents=documents,
+        amount=amount,
+    )
+    seconds = time.perf_counter() - start
+
+    prices = {tier["model"]: tier.get("usd_per_1k_tokens", 0) for tier in judge.router.policy["tiers"].values()}
+    await get_database().rejudge_results.update_one(
+        {"_id": f"{run['_id']}:{submission['_id']}"},
+        {"$set": {
+            "run_id": run["_id"],
+            "submission_id": submission["_id"],
+            "chain_job_id": submission["chain_job_id"],
+            "prompt_version": run["prompt_version"],
+            "original": {
+                "verdict": submission["verdict"],
+                "reason": submission["reason"],
+                "review_mode": submission.get("review_mode", "full"),
+            },
+            "verdict": result["verdict"],
+            "reason": result["reason"],
+            "confidence": result.get("confidence"),
+            "error": not _is_genuine(result),
+            "agreed": result["verdict"] == submission["verdict"],
+            "model": usage["model"],
+            "seconds": round(seconds, 3),
+            "llm_calls": usage["calls"],
+            "prompt_tokens": usage["prompt_tokens"],
+            "usd": round(sum(tokens / 1000 * prices.get(model, 0) for model, tokens in usage["models"].items()), 6),
+            "created_at": datetime.datetime.now(),
+        }},
+        upsert=True,
+    )
+    return True
+
+
+async def _start_run(args) -> dict:
+    db = get_database()
+    run = await db.rejudge_runs.find_one({"_id": args.run_id})
+    if run:
+        if run["prompt_version"] != PROMPT_VERSION:
+            raise SystemExit(f"Run {args.run_id} was started with prompt {run['prompt_version']}, this is {PROMPT_VERSION}")
+        # A run keeps its scope and models: flags left out are restored, different ones refused
+        for name, value in {"policy": run.get("policy"), "tier": run.get("tier"), **run.get("filter", {})}.items():
+            passed = getattr(args, name)
+            if passed is not None and passed != value:
+                raise SystemExit(f"Run {args.run_id} was started with {name}={value!r}, not {passed!r}")
+            setattr(args, name, value)
+        print(f"⏯️  Resuming run {args.run_id} after {run.get('last_submission_id')} ({run.get('processed', 0)} done)")
+        return run
+    run = {
+        "_id": args.run_id,
+        "prompt_version": PROMPT_VERSION,
+        "policy": args.policy,
+        "tier": args.tier,
+        "filter": {"job": args.job, "chain_id": args.chain_id, "since": args.since},
+        "last_submission_id": None,
+        "processed": 0,
+        "skipped": 0,
+        "started_at": datetime.datetime.now(),
+    }
+    await db.rejudge_runs.insert_one(run)
+    return run
+
+
+async def _save_checkpoint(run: dict, **fields):
+    await get_database().rejudge_runs.update_one(
+        {"_id": run["_id"]},
+        {"$set": {
+            "last_submission_id": run["last_submission_id"],
+            "processed": run["processed"],
+            "skipped": run["skipped"],
+            "updated_at": datetime.datetime.now(),
+            **fields,
+        }},
+    )
+
+
+async def rejudge(args):
+    db = get_database()
+    run = await _start_run(args)
+    judge = await services.aget_judge()
+    if args.policy:
+        judge.router = ModelRouter(load_policy(args.policy))
+    if args.tier:
+        if args.tier not in judge.router.policy["tiers"]:
+            raise SystemExit(f"Unknown tier {args.tier}: choose from {', '.join(judge.router.policy['tiers'])}")
+        judge.router = ModelRouter({**judge.router.policy, "rules": [], "default": args.tier, "escalation": {}})
+    gate = LiveTrafficGate(args.yield_queue_depth)
+    ai = judge.ai.ai if isinstance(judge.ai, ThrottledLLM) else judge.ai
+    judge.ai = ThrottledLLM(ai, RateLimiter(args.rpm, args.tpm), gate)
+    judge.cache = NoCache()
+
+    query = submission_filter(args)
+    if run["last_submission_id"] is not None:
+        query["_id"] = {"$gt": run["last_submission_id"]}
+    projection = {"chain_job_id": 1, "chain_id": 1, "notes": 1, "files": 1, "blobs": 1, "payload": 1, "verdict": 1, "reason": 1, "review_mode": 1}
+    cursor = db.submissions.find(query, projection, sort=[("_id", 1)], batch_size=100)
+    if args.limit:
+        cursor = cursor.limit(args.limit)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    # Submissions in cursor order with their done flag; the checkpoint only moves past a
+    # prefix that is entirely done, so a crash re-judges at most the in-flight ones and the
+    # fewer than CHECKPOINT_EVERY finished since the last save
+    dispatched = deque()
+    jobs = {}
+    started = time.monotonic()
+    # The prefix can move several entries at once, so saves go by distance, not exact multiples
+    saved = {"count": run["processed"] + run["skipped"]}
+
+    async def advance():
+        while dispatched and dispatched[0]["done"]:
+            entry = dispatched.popleft()
+            run["last_submission_id"] = entry["_id"]
+            run["processed" if entry["stored"] else "skipped"] += 1
+        count = run["processed"] + run["skipped"]
+        if count - saved["count"] >= CHECKPOINT_EVERY:
+            saved["count"] = count
+            await _save_checkpoint(run)
+            print(f"🔁 {run['processed']} re-judged, {run['skipped']} skipped ({time.monotonic() - started:.0f}s)")
+
+    async def work(submission: dict, entry: dict):
+        try:
+            entry["stored"] = await rejudge_one(submission, run, jobs)
+        except Exception as e:
+            print(f"⚠️ Re-judge of {submission['_id']} failed: {e}")
+            entry["stored"] = False
+        finally:
+            entry["done"] = True
+            semaphore.release()
+        await advance()
+
+    tasks = set()
+    async for submission in cursor:
+        if not _is_genuine(submission):
+            continue
+        await semaphore.acquire()
+        entry = {"_id": submission["_id"], "done": False, "stored": False}
+        dispatched.append(entry)
+        task = asyncio.create_task(work(submission, entry))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    await advance()
+    await _save_checkpoint(run, finished_at=datetime.datetime.now(), paused_for_live_seconds=round(gate.paused_seconds, 1))
+    print(f"✅ Run {run['_id']}: {run['processed']} re-judged, {run['skipped']} skipped")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return round(values[int(q * (len(values) - 1))], 3) if values else 0.0
+
+
+async def build_report(run_ids: list[str]) -> dict:
+    """Per run and model: agreement with the original verdicts, flips, latency and cost."""
+    db = get_database()
+    groups = defaultdict(list)
+    async for result in db.rejudge_results.find(
+        {"run_id": {"$in": run_ids}},
+        {"run_id": 1, "prompt_version": 1, "model": 1, "original": 1, "verdict": 1, "agreed": 1, "error": 1,
+         "seconds": 1, "llm_calls": 1, "prompt_tokens": 1, "usd": 1},
+    ):
+        groups[(result["run_id"], result["prompt_version"], result["model"])].append(result)
+
+    rows = []
+    for (run_id, prompt_version, model), results in sorted(groups.items(), key=lambda item: (run_ids.index(item[0][0]), str(item[0][2]))):
+        judged = [r for r in results if not r.get("error")]
+        seconds = sorted(r["seconds"] for r in results)
+        rows.append({
+            "run_id": run_id,
+            "prompt_version": prompt_version,
+            "model": model,
+            "submissions": len(results),
+            "errors": len(results) - len(judged),
+            "agreement": round(sum(r["agreed"] for r in judged) / len(judged), 4) if judged else None,
+            "pass_to_fail": sum(r["original"]["verdict"] == "PASS" and r["verdict"] == "FAIL" for r in judged),
+            "fail_to_pass": sum(r["original"]["verdict"] == "FAIL" and r["verdict"] == "PASS" for r in judged),
+            "mean_seconds": round(statistics.fmean(seconds), 3) if seconds else 0.0,
+            "p50_seconds": _percentile(seconds, 0.5),
+            "p95_seconds": _percentile(seconds, 0.95),
+            "llm_calls": sum(r["llm_calls"] for r in results),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in results),
+            "usd": round(sum(r["usd"] for r in results), 4),
+        })
+    return {"runs": run_ids, "rows": rows}
+
+
+HEADER = (f"{'run':<18}{'prompt':<9}{'model':<26}{'subs':>6}{'err':>5}{'agree':>8}{'P->F':>6}{'F->P':>6}"
+          f"{'p50 s':>8}{'p95 s':>8}{'tokens':>11}{'usd':>9}")
+
+
+def format_row(row: dict) -> str:
+    agreement = "-" if row["agreement"] is None else f"{row['agreement']:.1%}"
+    return (f"{row['run_id']:<18}{row['prompt_version']:<9}{str(row['model']):<26}{row['submissions']:>6}{row['errors']:>5}"
+            f"{agreement:>8}{row['pass_to_fail']:>6}{row['fail_to_pass']:>6}{row['p50_seconds']:>8}{row['p95_seconds']:>8}"
+            f"{row['prompt_tokens']:>11}{row['usd']:>9}")
+
+
+async def main_async(args):
+    await connect_to_mongo()
+    try:
+        if not args.report:
+            await rejudge(args)
+        report = await build_report(args.report or [args.run_id])
+        print(HEADER)
+        for row in report["rows"]:
+            print(format_row(row))
+    finally:
+        await services.aclose()
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--run-id", help=f"checkpoint and result key (default {PROMPT_VERSION}-<time>)")
+    parser.add_argument("--concurrency", type=int, default=REJUDGE_CONCURRENCY, help="submissions re-judged at once")
+    parser.add_argument("--rpm", type=int, default=REJUDGE_RPM, help="judge calls per minute (0: unlimited)")
+    parser.add_argument("--tpm", type=int, default=REJUDGE_TPM, help="estimated prompt tokens per minute (0: unlimited)")
+    parser.add_argument("--yield-queue-depth", type=int, default=REJUDGE_YIELD_QUEUE_DEPTH,
+                        help="pause while this many live submissions are queued or judging (0: never)")
+    parser.add_argument("--policy", help="routing policy JSON or file (default JUDGE_ROUTING_POLICY)")
+    parser.add_argument("--tier", help="judge every submission on this tier of the policy")
+    parser.add_argument("--job", nargs="+", help="only these chain job ids")
+    parser.add_argument("--chain-id", type=int, help="only jobs on this chain")
+    parser.add_argument("--since", help="only submissions created at or after this ISO date")
+    parser.add_argument("--limit", type=int, help="stop after this many submissions (this invocation)")
+    parser.add_argument("--report", nargs="+", metavar="RUN_ID", help="print the report for these runs and exit")
+    args = parser.parse_args()
+    args.run_id = args.run_id or f"{PROMPT_VERSION}-{datetime.datetime.now():%Y%m%d-%H%M%S}"
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
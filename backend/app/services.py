@@ -0,0 +1,51 @@
+import threading
+from starlette.concurrency import run_in_threadpool
+from init_env import ensure_google_credentials
+
+
+class Services:
+    """
+    Process-wide clients, created on first use instead of at import time.
+    The FastAPI lifespan (main.py) closes whatever was actually created.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._judge = None
+
+    @property
+    def judge(self):
+        """Blocks on first use (credentials download, client setup): from async code use aget_judge."""
+        if self._judge is None:
+            with self.lock:
+                if self._judge is None:
+                    from app.judge import TeleoJudge
+                    ensure_google_credentials()
+                    self._judge = TeleoJudge()
+        return self._judge
+
+    async def aget_judge(self):
+        """The judge, created in a worker thread on first use so the event loop keeps serving."""
+        if self._judge is None:
+            await run_in_threadpool(lambda: self.judge)
+        return self._judge
+
+    @property
+    def w3(self):
+        from app.chain import get_w3
+        return get_w3()
+
+    @property
+    def payout_sender(self):
+        from app.chain import get_payout_sender
+        return get_payout_sender()
+
+    async def aclose(self):
+        if self._judge is not None:
+            await self._judge.ai.aclose()
+            self._judge = None
+        from app.chain import close_chains
+        await close_chains()
+
+
+services = Services()
@@ -0,0 +1,281 @@
+import os
+import asyncio
+import hashlib
+import datetime
+import threading
+import numpy as np
+from bson import Binary
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.database import get_database
+from app.services import services
+from app.vector_index import VectorIndex
+from app import job_queue
+
+# Embedding index over job descriptions and submitted files (see vector_index.py).
+# Used to find near-copies of earlier work submitted to other jobs and to show the judge
+# how similar past jobs were decided. Index calls run in worker threads: they touch the
+# files, wait for other processes' writes and may retrain the IVF partition.
+SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "true").lower() == "true"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-004")
+# Truncated (Matryoshka) embeddings: a quarter of the size, nearly the same neighbours
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 256))
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/vector_index")
+EMBED_MAX_CHARS = 8000
+EMBEDDING_SYNC_SECONDS = float(os.getenv("EMBEDDING_SYNC_SECONDS", 30))
+EMBEDDING_SYNC_BATCH = 200
+
+# Files shorter than this are boilerplate-sized and match each other trivially
+COPY_MIN_CHARS = int(os.getenv("COPY_MIN_CHARS", 200))
+COPY_THRESHOLD = float(os.getenv("COPY_THRESHOLD", 0.97))
+SIMILAR_JOB_THRESHOLD = float(os.getenv("SIMILAR_JOB_THRESHOLD", 0.8))
+SIMILAR_JOBS_IN_CONTEXT = 3
+
+
+class Indexes:
+    """The two on-disk indexes, opened on first use."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._jobs = None
+        self._files = None
+        self.task: asyncio.Task = None
+        self.verified = False  # jobs index checked against Mongo since startup
+
+    def _open(self, name: str) -> VectorIndex:
+        return VectorIndex(VECTOR_INDEX_DIR, name, EMBEDDING_DIM)
+
+    @property
+    def jobs(self) -> VectorIndex:
+        """Keys: chain_job_id."""
+        if self._jobs is None:
+            with self.lock:
+                if self._jobs is None:
+                    self._jobs = self._open("jobs")
+        return self._jobs
+
+    @property
+    def files(self) -> VectorIndex:
+        """Keys: '<chain_job_id>/<submission_id>/<file name>'."""
+        if self._files is None:
+            with self.lock:
+                if self._files is None:
+                    self._files = self._open("files")
+        return self._files
+
+indexes = Indexes()
+
+
+def _embedding_key(text: str) -> str:
+    return hashlib.sha256(f"{EMBEDDING_MODEL}:{EMBEDDING_DIM}:{text}".encode()).hexdigest()
+
+
+async def embed_texts(texts: list[str]):
+    """
+    Embeddings for `texts` as a (len(texts), EMBEDDING_DIM) float32 array, or None if the model fails.
+    Vectors are cached in db.embeddings by content, so unchanged jobs and resubmitted files
+    (and index rebuilds) cost no API calls.
+    """
+    texts = [text[:EMBED_MAX_CHARS] for text in texts]
+    keys = [_embedding_key(text) for text in texts]
+    db = get_database()
+    found = {}
+    async for doc in db.embeddings.find({"_id": {"$in": list(set(keys))}}):
+        found[doc["_id"]] = np.frombuffer(doc["vector"], dtype=np.float32)
+
+    missing = list(dict.fromkeys(key for key in keys if key not in found))
+    if missing:
+        text_by_key = dict(zip(keys, texts))
+        judge = await services.aget_judge()
+        vectors = await judge.ai.aembed_texts(
+            [text_by_key[key] for key in missing], model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIM
+        )
+        if len(vectors) != len(missing) or any(len(v) != EMBEDDING_DIM for v in vectors):
+            return None
+        now = datetime.datetime.now()
+        for key, vector in zip(missing, vectors):
+            found[key] = np.asarray(vector, dtype=np.float32)
+        try:
+            await db.embeddings.insert_many(
+                [{"_id": key, "vector": Binary(found[key].tobytes()), "model": EMBEDDING_MODEL, "created_at": now}
+                 for key in missing],
+                ordered=False,
+            )
+        except BulkWriteError:
+            pass  # another worker cached the same text first
+    return np.stack([found[key] for key in keys])
+
+
+def job_text(job: dict) -> str:
+    """Title and description; '' for chain-indexed placeholders that have no description yet."""
+    if not (job.get("description") or "").strip():
+        return ""
+    return f"{job.get('title') or ''}\n{job['description']}".strip()
+
+
+async def sync_job_embeddings() -> int:
+    """
+    Embeds jobs that are new or whose title/description changed (index_job unsets embedding_key).
+    On the first pass after startup, a jobs index that is missing rows (e.g. a fresh disk)
+    is rebuilt from the embedding cache. Returns the number of jobs indexed.
+    """
+    db = get_database()
+    query = {"embedding_key": {"$exists": False}}
+    if not indexes.verified:
+        indexed = await asyncio.to_thread(lambda: len(indexes.jobs))
+        if indexed < await db.jobs.count_documents({"embedding_key": {"$ne": None}}):
+            query = {}
+        indexes.verified = True
+
+    synced, last_id = 0, None
+    while True:
+        page = {**query, "_id": {"$gt": last_id}} if last_id else query
+        jobs = await db.jobs.find(page, {"chain_job_id": 1, "title": 1, "description": 1}) \
+            .sort("_id", 1).limit(EMBEDDING_SYNC_BATCH).to_list(length=EMBEDDING_SYNC_BATCH)
+        if not jobs:
+            return synced
+        last_id = jobs[-1]["_id"]
+
+        # Chain-indexed placeholders without a description are marked too, and re-embedded
+        # once the frontend posts their metadata
+        texts = {job["_id"]: job_text(job)[:EMBED_MAX_CHARS] for job in jobs}
+        embeddable = [job for job in jobs if texts[job["_id"]]]
+        if embeddable:
+            vectors = await embed_texts([texts[job["_id"]] for job in embeddable])
+            if vectors is None:
+                return synced
+            keys = [job["chain_job_id"] for job in embeddable]
+            await asyncio.to_thread(lambda: indexes.jobs.add(keys, vectors))
+        await db.jobs.bulk_write([
+            UpdateOne({"_id": job["_id"]}, {"$set": {
+                "embedding_key": _embedding_key(texts[job["_id"]]) if texts[job["_id"]] else None
+            }})
+            for job in jobs
+        ], ordered=False)
+        synced += len(embeddable)
+
+
+async def find_similar_jobs(text: str = None, jobId: str = None, k: int = 5) -> list[dict]:
+    """
+    Jobs closest to `text`, or to job `jobId`'s embedding (the job itself is excluded).
+    Returns: [{'chain_job_id', 'title', 'score', 'verdict', 'reason'}] with the latest verdict per job.
+    """
+    db = get_database()
+    vector = await asyncio.to_thread(lambda: indexes.jobs.get(jobId)) if jobId is not None else None
+    if vector is None and not text and jobId is not None:
+        job = await db.jobs.find_one({"chain_job_id": jobId}, {"title": 1, "description": 1})
+        text = job_text(job) if job else None
+    if vector is None:
+        vectors = await embed_texts([text]) if text else None
+        if vectors is None:
+            return []
+        vector = vectors[0]
+
+    hits = await asyncio.to_thread(lambda: indexes.jobs.search(vector, k + 1))
+    hits = [(key, score) for key, score in hits if key != jobId][:k]
+    if not hits:
+        return []
+    ids = [key for key, _ in hits]
+    titles = {
+        job["chain_job_id"]: job.get("title")
+        for job in await db.jobs.find({"chain_job_id": {"$in": ids}}, {"chain_job_id": 1, "title": 1}).to_list(length=k)
+    }
+    verdicts = {}
+    async for submission in db.submissions.find(
+        {"chain_job_id": {"$in": ids}, "status": job_queue.DONE, "verdict": {"$ne": None}},
+        {"chain_job_id": 1, "verdict": 1, "reason": 1},
+    ).sort("created_at", 1):
+        verdicts[submission["chain_job_id"]] = submission
+    return [
+        {
+            "chain_job_id": key,
+            "title": titles.get(key),
+            "score": round(score, 4),
+            "verdict": verdicts.get(key, {}).get("verdict"),
+            "reason": verdicts.get(key, {}).get("reason"),
+        }
+        for key, score in hits
+    ]
+
+
+async def review_context(jobId: str, job_desc: str) -> str:
+    """Past decisions on similar jobs, as a context section for the judge ('' when there are none)."""
+    similar = await find_similar_jobs(text=job_desc, jobId=jobId, k=SIMILAR_JOBS_IN_CONTEXT)
+    lines = [
+        f"- Job #{job['chain_job_id']} (similarity {job['score']:.2f}): {job['verdict']} - {job['reason']}"
+        for job in similar if job["verdict"] and job["score"] >= SIMILAR_JOB_THRESHOLD
+    ]
+    if not lines:
+        return ""
+    return "Verdicts on similar past jobs (for consistency; judge this submission on its own merits):\n" + "\n".join(lines)
+
+
+async def find_copies(jobId: str, submission_id, documents: list[dict]) -> list[dict]:
+    """
+    Embeds the submission's text files, looks each one up among files submitted to other
+    jobs and adds them to the index. Returns the near-copies found:
+    [{'file', 'chain_job_id', 'submission_id', 'matched_file', 'score'}]
+    """
+    files = [d for d in documents if not d["binary"] and len(d["text"].strip()) >= COPY_MIN_CHARS]
+    if not files:
+        return []
+    vectors = await embed_texts([d["text"] for d in files])
+    if vectors is None:
+        return []
+    return await asyncio.to_thread(_match_and_add, jobId, submission_id, files, vectors)
+
+
+def _match_and_add(jobId: str, submission_id, files: list[dict], vectors) -> list[dict]:
+    copies = []
+    for document, vector in zip(files, vectors):
+        for key, score in indexes.files.search(vector, k=5):
+            if score < COPY_THRESHOLD:
+                break
+            other_job, other_submission, other_file = key.split("/", 2)
+            if other_job != jobId:
+                copies.append({
+                    "file": document["name"], "chain_job_id": other_job, "submission_id": other_submission,
+                    "matched_file": other_file, "score": round(score, 4),
+                })
+                break
+    indexes.files.add([f"{jobId}/{submission_id}/{d['name']}" for d in files], vectors)
+    return copies
+
+
+def copy_context(copies: list[dict]) -> str:
+    if not copies:
+        return ""
+    lines = [
+        f"- {c['file']} is {c['score']:.0%} similar to {c['matched_file']} submitted for Job #{c['chain_job_id']}"
+        for c in copies
+    ]
+    return "Possible copied work (embedding similarity to submissions for other jobs):\n" + "\n".join(lines)
+
+
+async def _sync_loop():
+    while True:
+        try:
+            await sync_job_embeddings()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Embedding Sync Error: {e}")
+        await asyncio.sleep(EMBEDDING_SYNC_SECONDS)
+
+
+def start_embedding_sync():
+    """Call this on startup"""
+    if SIMILARITY_ENABLED:
+        indexes.task = asyncio.create_task(_sync_loop())
+
+
+async def stop_embedding_sync():
+    """Call this on shutdown"""
+    if indexes.task:
+        indexes.task.cancel()
+        await asyncio.gather(indexes.task, return_exceptions=True)
+        indexes.task = None
+
+
+def get_stats() -> dict:
+    return {"jobs": indexes.jobs.get_stats(), "files": indexes.files.get_stats()}
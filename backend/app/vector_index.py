@@ -0,0 +1,253 @@
+import os
+import json
+import fcntl
+import threading
+import contextlib
+import numpy as np
+
+# Below this many vectors a full scan is already fast; above it an IVF (inverted file)
+# partition is trained and only the closest IVF_PROBES lists are scanned per query.
+IVF_MIN_VECTORS = int(os.getenv("VECTOR_IVF_MIN_VECTORS", 20000))
+IVF_PROBES = int(os.getenv("VECTOR_IVF_PROBES", 8))
+IVF_TRAIN_ITERATIONS = 8
+# Rows added since the list-ordered copy was built are scanned separately until there are this many
+IVF_TAIL_ROWS = 4096
+INITIAL_CAPACITY = 1024
+
+
+class VectorIndex:
+    """
+    Unit-normalized float32 vectors in a memory-mapped file, addressed by string keys.
+    Files in `directory`: <name>.f32 (rows), <name>.keys (one JSON-quoted key per line, row order)
+    and <name>.ivf.npy (IVF centroids, retrained when the index has doubled since training;
+    rows added in between are assigned to their nearest centroid).
+    Adding an existing key overwrites its row. Cosine similarity is a dot product.
+
+    Several processes (API replicas, scripts) may share the files: writes take an exclusive
+    lock on <name>.lock, so there is one writer at a time, and every call first picks up the
+    rows and centroids other processes wrote. A row another process overwrote keeps its IVF
+    list here until the next retraining.
+    """
+
+    def __init__(self, directory: str, name: str, dim: int):
+        self.dim = dim
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, f"{name}.f32")
+        self.keys_path = os.path.join(directory, f"{name}.keys")
+        self.ivf_path = os.path.join(directory, f"{name}.ivf.npy")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+
+        self.keys = []
+        self.rows = {}
+        self.keys_offset = 0  # bytes of the keys file loaded
+        self.vectors = None
+        self.ivf_mtime = None  # of the centroids file loaded
+
+        self.centroids = None   # (lists, dim)
+        self.assignments = None  # row -> nearest list
+        self.trained_count = 0  # rows when the centroids were trained
+        # In-memory copy of the rows grouped by list (CSR order), so a probe scans a contiguous
+        # slice instead of gathering rows from the map; rows >= listed_count are the unlisted tail
+        self.list_rows = None
+        self.list_offsets = None
+        self.list_vectors = None
+        self.listed_count = 0
+        with self._file_lock(), self.lock:
+            self._map(INITIAL_CAPACITY)
+            self._refresh()
+
+    def __len__(self):
+        with self.lock:
+            self._refresh()
+            return len(self.keys)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Held while writing the files; taken before self.lock."""
+        with open(self.lock_path, "a") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            yield  # closing the file releases the lock
+
+    def _map(self, capacity: int = 0):
+        """
+        (Re)maps the whole vector file. With `capacity`, first grows the file to that many rows
+        if needed, which only the writer (holding the file lock) may do.
+        """
+        size = capacity * self.dim * 4
+        if capacity and (not os.path.exists(self.vectors_path) or os.path.getsize(self.vectors_path) < size):
+            with open(self.vectors_path, "ab") as file:
+                file.truncate(size)
+        if self.vectors is not None:
+            self.vectors.flush()
+        rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def _refresh(self):
+        """Loads the rows and centroids written by other processes since the last call (under self.lock)."""
+        if os.path.exists(self.keys_path) and os.path.getsize(self.keys_path) > self.keys_offset:
+            with open(self.keys_path, "rb") as file:
+                file.seek(self.keys_offset)
+                data = file.read()
+            # A line without its newline is still being written
+            data = data[:data.rfind(b"\n") + 1]
+            self.keys_offset += len(data)
+            for line in data.decode().split("\n")[:-1]:
+                key = self._decode_key(line)
+                self.rows[key] = len(self.keys)
+                self.keys.append(key)
+            # Rows are written before their keys, so the file already holds them
+            if len(self.vectors) < len(self.keys):
+                self._map()
+
+        ivf_mtime = os.stat(self.ivf_path).st_mtime_ns if os.path.exists(self.ivf_path) else None
+        if ivf_mtime != self.ivf_mtime:
+            self.ivf_mtime = ivf_mtime
+            self.centroids = np.load(self.ivf_path)
+            self.assignments = self._nearest_lists(self.vectors[:len(self.keys)])
+            self.trained_count = len(self.keys)
+            self.list_rows = None
+        elif self.centroids is not None and len(self.assignments) < len(self.keys):
+            added = self.vectors[len(self.assignments):len(self.keys)]
+            self.assignments = np.concatenate([self.assignments, self._nearest_lists(added)])
+            if len(self.keys) - self.listed_count > IVF_TAIL_ROWS:
+                self.list_rows = None
+
+    @staticmethod
+    def _decode_key(line: str) -> str:
+        # Quoted so a newline in a key (a file name) cannot split it; older files hold bare keys
+        return json.loads(line) if line.startswith('"') else line
+
+    @staticmethod
+    def normalize(vectors) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def add(self, keys: list[str], vectors):
+        """
+        Inserts or overwrites one row per key. Blocks while another process writes, and
+        retrains the IVF partition when due: call it from a worker thread.
+        """
+        vectors = self.normalize(vectors)
+        with self._file_lock():
+            with self.lock:
+                self._refresh()
+                self._write(keys, vectors)
+                retrain = len(self.keys) >= IVF_MIN_VECTORS and len(self.keys) >= 2 * self.trained_count
+            # Searches go on with the old centroids meanwhile
+            if retrain:
+                self._train()
+
+    def _write(self, keys: list[str], vectors: np.ndarray):
+        """Rows first, then their keys: readers only see rows that are complete."""
+        new_keys, rows = [], []
+        for key in keys:
+            row = self.rows.get(key)
+            if row is None:
+                row = len(self.keys)
+                if row >= len(self.vectors):
+                    self._map(len(self.vectors) * 2)
+                self.keys.append(key)
+                self.rows[key] = row
+                new_keys.append(key)
+            rows.append(row)
+        rows = np.asarray(rows)
+        self.vectors[rows] = vectors
+        self.vectors.flush()
+        if self.centroids is not None:
+            grown = len(self.keys) - len(self.assignments)
+            self.assignments = np.concatenate([self.assignments, np.zeros(grown, dtype=np.int32)])
+            self.assignments[rows] = self._nearest_lists(vectors)
+            if rows.min() < self.listed_count or len(self.keys) - self.listed_count > IVF_TAIL_ROWS:
+                self.list_rows = None
+        if new_keys:
+            data = "".join(f"{json.dumps(key)}\n" for key in new_keys).encode()
+            with open(self.keys_path, "ab") as file:
+                file.write(data)
+            self.keys_offset += len(data)
+
+    def _nearest_lists(self, vectors: np.ndarray, centroids: np.ndarray = None) -> np.ndarray:
+        centroids = self.centroids if centroids is None else centroids
+        return np.concatenate([
+            np.argmax(vectors[start:start + 8192] @ centroids.T, axis=1).astype(np.int32)
+            for start in range(0, max(len(vectors), 1), 8192)
+        ])[:len(vectors)]
+
+    def _train(self):
+        """Spherical k-means over the current rows; about sqrt(n) lists. Called holding the file lock."""
+        count = len(self.keys)
+        data = self.vectors[:count]
+        lists = int(np.sqrt(count))
+        rng = np.random.default_rng(0)
+        sample = data[rng.choice(count, size=min(count, lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+        for _ in range(IVF_TRAIN_ITERATIONS):
+            nearest = self._nearest_lists(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            # Empty lists keep their old centroid
+            centroids = np.where(np.bincount(nearest, minlength=lists)[:, None] > 0, sums, centroids)
+            centroids = self.normalize(centroids)
+        assignments = self._nearest_lists(data, centroids)
+
+        # Replaced whole, so other processes never load a partly written file
+        with open(f"{self.ivf_path}.tmp", "wb") as file:
+            np.save(file, centroids)
+        os.replace(f"{self.ivf_path}.tmp", self.ivf_path)
+        with self.lock:
+            self.centroids = centroids
+            self.assignments = assignments
+            self.trained_count = count
+            self.list_rows = None
+            self.ivf_mtime = os.stat(self.ivf_path).st_mtime_ns
+
+    def _build_lists(self):
+        order = np.argsort(self.assignments, kind="stable").astype(np.int32)
+        self.list_offsets = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self.list_vectors = np.ascontiguousarray(self.vectors[order])
+        self.list_rows = order
+        self.listed_count = len(order)
+
+    def _score_ivf(self, query: np.ndarray):
+        """(rows, scores) over the IVF_PROBES lists closest to the query and the unlisted tail."""
+        if self.list_rows is None:
+            self._build_lists()
+        probes = np.argpartition(-(self.centroids @ query), min(IVF_PROBES, len(self.centroids) - 1))[:IVF_PROBES]
+        slices = [slice(self.list_offsets[i], self.list_offsets[i + 1]) for i in probes]
+        tail = np.arange(self.listed_count, len(self.keys), dtype=np.int32)
+        rows = np.concatenate([self.list_rows[s] for s in slices] + [tail])
+        scores = np.concatenate([self.list_vectors[s] @ query for s in slices] + [self.vectors[tail] @ query])
+        return rows, scores
+
+    def search(self, vector, k: int = 10, exact: bool = False) -> list[tuple[str, float]]:
+        """Top-k rows by cosine similarity: [(key, score)], best first."""
+        query = self.normalize(vector)[0]
+        with self.lock:
+            self._refresh()
+            count = len(self.keys)
+            if count == 0:
+                return []
+            if exact or self.centroids is None:
+                rows, scores = np.arange(count), self.vectors[:count] @ query
+            else:
+                rows, scores = self._score_ivf(query)
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.keys[rows[i]], float(scores[i])) for i in top]
+
+    def get(self, key: str):
+        with self.lock:
+            self._refresh()
+            row = self.rows.get(key)
+            return None if row is None else np.array(self.vectors[row])
+
+    def get_stats(self) -> dict:
+        return {
+            "vectors": len(self.keys),
+            "dim": self.dim,
+            "ivf_lists": 0 if self.centroids is None else len(self.centroids),
+            "ivf_trained_vectors": self.trained_count,
+            "bytes": self.vectors.nbytes,
+        }
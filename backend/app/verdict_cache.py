@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+import logging
+import datetime
+from collections import OrderedDict
+from app.database import get_database
+
+logger = logging.getLogger("uvicorn")
+
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", 1024))
+
+
+class VerdictCache:
+    """
+    Two-tier cache of judge verdicts keyed by the content they were computed from:
+    an in-process LRU in front of the db.verdict_cache collection
+    (TTL-evicted after VERDICT_CACHE_TTL_SECONDS, see database.py).
+    """
+
+    def __init__(self, max_size: int = VERDICT_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Line endings and trailing whitespace do not change a verdict."""
+        lines = (text or "").replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        return "\n".join(line.rstrip() for line in lines).strip()
+
+    def make_key(self, job_desc: str, code: str, model: str, prompt_version: str, context: str = "") -> str:
+        parts = [self.normalize(job_desc), self.normalize(code), model, prompt_version]
+        # Review context is only part of the key when present, so existing keys stay valid
+        if context:
+            parts.append(self.normalize(context))
+        payload = json.dumps(parts)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, verdict: dict):
+        self.entries[key] = verdict
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def get(self, key: str):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return dict(self.entries[key])
+
+        db = get_database()
+        if db is not None:
+            try:
+                doc = await db.verdict_cache.find_one({"_id": key})
+            except Exception as e:
+                logger.error(f"Verdict cache read failed: {e}")
+                doc = None
+            if doc:
+                verdict = {"verdict": doc["verdict"], "reason": doc["reason"]}
+                self._remember(key, verdict)
+                self.stats["mongo_hits"] += 1
+                return dict(verdict)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, verdict: dict, model: str, prompt_version: str):
+        entry = {"verdict": verdict["verdict"], "reason": verdict["reason"]}
+        self._remember(key, entry)
+
+        db = get_database()
+        if db is None:
+            return
+        try:
+            await db.verdict_cache.update_one(
+                {"_id": key},
+                {"$set": {
+                    **entry,
+                    "model": model,
+                    "prompt_version": prompt_version,
+                    "created_at": datetime.datetime.now(),
+                }},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.error(f"Verdict cache write failed: {e}")
+
+    def get_stats(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["mongo_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.entries),
+        }
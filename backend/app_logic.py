@@ -1,159 +1,528 @@
 
-from app.judge import TeleoJudge
-from app.chain import release_payment, get_job_details
-from dtos import Submission, JobModel
-from app.database import get_database
+from dtos import Submission, JobModel, JobSummary, SubmissionSummary
+from app.database import get_database, job_key
+from app.ingest import ingest_files, load_documents
+from app import job_queue, payouts, batch_payouts, similarity, admission, incremental
+from app.change_feed import JOBS_TOPIC, job_topic, jobs_changed
+from app.prescreen import prescreen
+from app.services import services
+from app.metrics import span
+from app.progress import broker, SSE_HEARTBEAT_SECONDS
+from app.pagination import page_size, after_cursor, encode_cursor, list_projection
 from starlette.concurrency import run_in_threadpool
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+import asyncio
 import datetime
 
-judge = TeleoJudge()
 
 async def submit_work(
-    jobId, notes: str, files
+    jobId, notes: str, files, chain_id: int = None
 ):
     db = get_database()
     print(f"📡 Received submission for Job #{jobId}")
-    
-    # 1. PROCESS FILES
-    file_context = ""
-    file_names = []
-    
-    if files:
-        for file in files:
-            print(f"📂 Processing file: {file.filename}")
-            file_names.append(file.filename)
-            
-            # Simple Logic: Read text files directly for AI Context
-            if file.filename.endswith(('.py', '.js', '.txt', '.md', '.json', '.html', '.css')):
-                content = await file.read()
-                file_context += f"\n\n--- FILE: {file.filename} ---\n{content.decode('utf-8', errors='ignore')}"
-            else:
-                file_context += f"\n\n--- ATTACHMENT ---\nFile '{file.filename}' (Binary) received."
 
-    # 2. COMBINE NOTES + FILE CONTEXT
-    submission_summary = f"Files Uploaded: {', '.join(file_names)}\n\n"
-    full_submission_text = f"FREELANCER NOTES:\n{notes}\n\n{submission_summary}{file_context}"
-
-    # 3. FETCH JOB & VALIDATE
-    db_job = await db.jobs.find_one({"chain_job_id": jobId})
+    # 1. FETCH JOB + RATE LIMITS (before any file is read)
+    with span("job_lookup"):
+        db_job = await db.jobs.find_one(job_key(jobId, chain_id))
     if not db_job:
         return
-    # print(db_job)
+    await admission.check_rate_limits(jobId, db_job)
+
+    # 2. PROCESS FILES (streamed, within byte budgets)
+    with span("ingest"):
+        ingested = await ingest_files(files)
+    file_names = ingested["file_names"]
+    print(f"📦 Ingested {len(file_names)} files ({ingested['total_bytes']} bytes of text)")
+
+    submission = {
+        "_id": ObjectId(),
+        "chain_job_id": jobId,
+        "chain_id": db_job["chain_id"],
+        "freelancer_name": db_job.get("freelancer_name", "Unknown"),
+        "notes": notes,
+        "files": file_names, # List of filenames
+        # Files live in the blob store; the worker (and any re-review) reloads them by hash
+        "blobs": ingested["blobs"],
+        "verdict": None,
+        "reason": None,
+        "tx_hash": None,
+    }
+
+    # 3. PRE-SCREEN (empty, unparseable or duplicate work fails without an LLM call)
+    with span("prescreen"):
+        screened = await prescreen(jobId, notes, ingested["documents"], ingested["blobs"], db_job["chain_id"])
+    submission["content_hash"] = screened["content_hash"]
+    if screened["verdict"]:
+        result = {"status": job_queue.DONE, "verdict": screened["verdict"], "reason": screened["reason"]}
+        submission_id = await job_queue.record(submission, result)
+        print(f"🚫 Pre-screen rejected submission {submission_id}: {screened['reason']}")
+        return {**result, "submission_id": submission_id}
+
+    # 4. ONE REVIEW PER JOB AT A TIME (a retried identical request joins the queued one)
+    queued = await admission.acquire_review_lease(
+        jobId, submission["_id"], submission["content_hash"], db_job["chain_id"]
+    )
+    if queued:
+        print(f"🔁 Identical submission already queued for Job #{jobId}: {queued['submission_id']}")
+        return {"status": job_queue.QUEUED, "submission_id": str(queued["submission_id"]), "deduplicated": True}
+
+    # 5. QUEUE FOR REVIEW (judge + payout run on the worker pool)
+    with span("enqueue"):
+        try:
+            submission_id = await job_queue.enqueue(submission)
+        except Exception:
+            await admission.release_review_lease(submission)
+            raise
+    print(f"📥 Queued submission {submission_id} for Job #{jobId}")
+
+    return {"status": job_queue.QUEUED, "submission_id": submission_id}
+
+
+async def process_submission(submission: dict) -> dict:
+    """
+    Worker stage: validates the job on chain, runs the AI review and pays out on PASS.
+    Returns the fields stored on the finished submission, including per-stage `timings` in seconds.
+    """
+    # Imported on first use: app.chain pulls in web3 and eth_account, most of main's import time
+    from app.chain import get_payout_sender, aget_job_details
+    db = get_database()
+    jobId = submission["chain_job_id"]
+    timings = {}
 
-    job_details = await run_in_threadpool(get_job_details, int(jobId))
+    # Chain state synced by the indexer saves an RPC round trip; fall back to the node otherwise
+    with span("job_lookup", timings):
+        key = job_key(jobId, submission.get("chain_id"))
+        db_job = await db.jobs.find_one(key, {"onchain": 1})
+    chain_id = key["chain_id"]
+    job_details = (db_job or {}).get("onchain") or {}
+    if "description" not in job_details:
+        with span("chain_read", timings):
+            job_details = await aget_job_details(int(jobId), chain_id)
     if not job_details:
-        return {"status": "FAIL", "reason": "Job not found on chain"}
-    
-    # print(f"📝 Job Details fetched: {job_details}")
+        return {"status": job_queue.FAILED, "verdict": "FAIL", "reason": "Job not found on chain", "timings": timings}
+    if job_details["is_settled"]:
+        return {"status": job_queue.FAILED, "verdict": "FAIL", "reason": "Job already settled on chain", "timings": timings}
+
+    # Submissions queued before the blob store carry their documents inline
+    if "payload" in submission:
+        documents = submission["payload"]["documents"]
+    else:
+        with span("blob_load", timings):
+            documents = await load_documents(submission.get("blobs", []))
+
+    # SIMILARITY (near-copies of other jobs' submissions, verdicts on similar past jobs)
+    copies, context = [], ""
+    if similarity.SIMILARITY_ENABLED:
+        with span("similarity", timings):
+            try:
+                copies, similar_jobs = await asyncio.gather(
+                    similarity.find_copies(jobId, submission["_id"], documents),
+                    similarity.review_context(jobId, job_details["description"]),
+                )
+                context = "\n\n".join(c for c in (similarity.copy_context(copies), similar_jobs) if c)
+            except Exception as e:
+                # Advisory only: the review goes ahead without it
+                print(f"⚠️ Similarity lookup failed: {e}")
 
-    # 4. AI REVIEW
+    # AI REVIEW (a resubmission after a FAIL is judged on its changes when they are small)
     print("⚖️  AI Judge is reviewing...")
-    review = await run_in_threadpool(
-        judge.evaluate_submission,
-        job_desc=job_details['description'],
-        code=full_submission_text,
-        language="Multi-File Project"
-    )
+    on_progress = lambda event: broker.publish(submission["_id"], event)
+    review, review_fields = None, {"review_mode": "full"}
+    with span("judge", timings):
+        judge = await services.aget_judge()
+        incremental_plan = await incremental.plan_incremental(submission, documents)
+        if incremental_plan:
+            print(f"🧾 Incremental review against {incremental_plan['previous_submission_id']} (~{incremental_plan['tokens']} tokens)")
+            review = await judge.areview_changes(
+                job_desc=job_details['description'],
+                changes=incremental_plan["changes"],
+                previous_reason=incremental_plan["previous_reason"],
+                tokens=incremental_plan["tokens"],
+                on_progress=on_progress,
+                amount=float(job_details.get("amount") or 0),
+                context=context,
+                min_confidence=incremental.INCREMENTAL_MIN_CONFIDENCE,
+            )
+            if review is None:
+                print("🧾 Changes alone were not conclusive: full review")
+            else:
+                review_fields = {
+                    "review_mode": "incremental",
+                    "previous_submission_id": incremental_plan["previous_submission_id"],
+                }
+        if review is None:
+            review = await judge.areview_submission(
+                job_desc=job_details['description'],
+                notes=submission["notes"],
+                file_names=submission["files"],
+                documents=documents,
+                on_progress=on_progress,
+                amount=float(job_details.get("amount") or 0),
+                context=context,
+            )
     
     tx_hash = None
+    payout_status = None
     if review['verdict'] == 'PASS':
+        await job_queue.set_stage(submission, job_queue.PAYING, verdict=review['verdict'], reason=review['reason'])
         try:
-            print("💸 Initiating Payout...")
-            tx_hash = await run_in_threadpool(release_payment, int(jobId))
-            print(f"✅ Payout Sent! Hash: {tx_hash}")
-            await db.jobs.update_one(
-                {"chain_job_id": jobId},
-                {"$set": {"status": "PAID", "tx_hash": tx_hash}}
-            )
+            with span("payout", timings):
+                if batch_payouts.batch_mode():
+                    # Settled together with other approved jobs by the batch scheduler
+                    queued = await batch_payouts.queue_payout(jobId, submission)
+                    payout_status = payouts.QUEUED if queued else None
+                else:
+                    # Claimed before sending: a concurrent PASS for the same job does not pay twice
+                    previous_status = await payouts.claim_payout(jobId, "PAYING", chain_id)
+                    if previous_status is not None:
+                        print("💸 Initiating Payout...")
+                        try:
+                            tx_hash = await run_in_threadpool(lambda: get_payout_sender(chain_id).send_release(int(jobId)))
+                        except Exception:
+                            await payouts.release_payout_claim(jobId, previous_status, chain_id)
+                            raise
+                        payout_status = payouts.PENDING
+                        # Broadcast only: the receipt watcher confirms it and marks the job PAID
+                        await db.jobs.update_one(key, {"$set": {"tx_hash": tx_hash}})
+                        await jobs_changed(jobId)
+            if payout_status is None:
+                print(f"⏭️  Payout for Job #{jobId} already under way, not paying again")
+                return {
+                    "status": job_queue.FAILED,
+                    "verdict": "PASS",
+                    "reason": "Payout skipped: this job is already being paid",
+                    "tx_hash": None,
+                    "similar_submissions": copies,
+                    **review_fields,
+                    "timings": timings,
+                }
         except Exception as e:
             print(f"❌ Blockchain Error: {e}")
             return {
-                "status": "FAIL", 
+                "status": job_queue.FAILED, 
                 "verdict": "PASS", 
                 "reason": f"Payout failed: {str(e)}", 
-                "tx_hash": None
+                "tx_hash": None,
+                "similar_submissions": copies,
+                **review_fields,
+                "timings": timings,
             }
-        
-    # 5. STORE SUBMISSION
-    submission_entry = {
-        "chain_job_id": jobId,
-        "freelancer_name": db_job.get("freelancer_name", "Unknown"),
-        "notes": notes,
-        "files": file_names, # List of filenames
+
+    result = {
+        "status": job_queue.DONE,
         "verdict": review['verdict'],
         "reason": review['reason'],
         "tx_hash": tx_hash,
-        "created_at": datetime.datetime.now()
+        "payout_status": payout_status,
+        "similar_submissions": copies,
+        **review_fields,
+        "timings": timings,
     }
-    await db.submissions.insert_one(submission_entry)
+    if payout_status == payouts.QUEUED:
+        # queue_payout stored these, and the batch may already have moved them on to PENDING
+        del result["tx_hash"], result["payout_status"]
+    return result
+
 
+async def get_submission_status(submission_id: str):
+    submission = await job_queue.get_status(submission_id)
+    if not submission:
+        return None
     return {
-        "status": "OK",
-        "verdict": review['verdict'],
-        "reason": review['reason'],
-        "tx_hash": tx_hash
+        "submission_id": str(submission["_id"]),
+        "chain_job_id": submission["chain_job_id"],
+        "status": submission.get("status", job_queue.DONE),
+        "verdict": submission.get("verdict"),
+        "reason": submission.get("reason"),
+        "tx_hash": submission.get("tx_hash"),
+        "payout_status": submission.get("payout_status"),
+        "review_mode": submission.get("review_mode"),
     }
 
 
+async def submission_events(submission_id: str):
+    """
+    Progress of one submission as events: its current status first, then live status
+    changes and the judge's early verdict, until it is DONE or FAILED.
+    Yields None when idle for SSE_HEARTBEAT_SECONDS.
+    """
+    # Subscribe before reading the status so a change in between is not lost
+    with broker.subscribe(submission_id) as queue:
+        status = await get_submission_status(submission_id)
+        yield {"event": "status", **status}
+        if status["status"] in (job_queue.DONE, job_queue.FAILED):
+            return
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield event
+            if event["event"] == "status" and event["status"] in (job_queue.DONE, job_queue.FAILED):
+                return
+
+
+async def _follow(topic: str, keep=lambda event: True):
+    """Events published on `topic` that pass `keep`; None when idle for SSE_HEARTBEAT_SECONDS."""
+    with broker.subscribe(topic) as queue:
+        yield {"event": "ready"}
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if keep(event):
+                yield event
+
+
+def job_board_events(chain_id: int = None):
+    """
+    Job changes (new jobs, OPEN -> ASSIGNED -> PAYING -> PAID, applicants) for the job board,
+    optionally for one chain. Events carry chain_job_id and the job's current list fields.
+    """
+    return _follow(JOBS_TOPIC, lambda event: not chain_id or event.get("chain_id") in (None, chain_id))
+
+
+def job_events(jobId: str):
+    """One job's changes ('job' events) and its new or updated submissions ('submission' events)."""
+    return _follow(job_topic(jobId))
+
+
+# Fields only the frontend knows: they replace the chain indexer's placeholders
+JOB_METADATA_FIELDS = ("title", "description", "client_name", "tags", "chain_id")
+# Larger resyncs are split by the client
+JOBS_BULK_MAX = 5000
+
+
+def _job_upsert(job: JobModel, now: datetime.datetime) -> tuple[dict, list]:
+    """
+    One atomic upsert per job, as an update pipeline that branches on the stored document:
+      new                 -> the whole job is inserted
+      chain placeholder   -> the frontend metadata is filled in (indexed_from_chain dropped,
+                             embedding_key dropped so the similarity index re-embeds it)
+      already indexed     -> unchanged
+    `indexed_at` = now marks the first two, which is how callers tell the outcomes apart.
+    Returns: (filter, pipeline) for an upsert.
+    """
+    key = job_key(job.chain_job_id, job.chain_id)
+    job_dict = job.model_dump()
+    job_dict.update({**key, "created_at": now, "indexed_at": now, "job_number": job_number(job.chain_job_id)})
+    # Every stored job has a title (the indexer's placeholder included), so a missing one means
+    # this is the document the upsert is creating
+    is_new = {"$eq": [{"$ifNull": ["$title", None]}, None]}
+    is_placeholder = {"$eq": ["$indexed_from_chain", True]}
+    new_or_placeholder = {"$or": [is_new, is_placeholder]}
+
+    fields = {}
+    for field, value in job_dict.items():
+        fills = (field in JOB_METADATA_FIELDS and value) or field == "indexed_at"
+        fields[field] = {"$cond": [new_or_placeholder if fills else is_new, {"$literal": value}, f"${field}"]}
+    for field in ("indexed_from_chain", "embedding_key"):
+        fields[field] = {"$cond": [is_placeholder, "$$REMOVE", f"${field}"]}
+    return key, [{"$set": fields}]
+
+
+def _index_outcome(doc: dict, now: datetime.datetime) -> str:
+    if doc.get("created_at") == now:
+        return "inserted"
+    return "updated" if doc.get("indexed_at") == now else "unchanged"
+
+
+def _now_ms() -> datetime.datetime:
+    # Mongo stores milliseconds: truncate so the value read back compares equal
+    now = datetime.datetime.now()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
 async def index_job(job: JobModel):
     db = get_database()
-    
-    # Convert Pydantic model to dict
-    job_dict = job.model_dump()
-    job_dict["created_at"] = datetime.datetime.now()
-    
-    # Check if exists (Idempotency)
-    existing = await db.jobs.find_one({"chain_job_id": job.chain_job_id})
-    if existing:
-        return {"message": "Job already indexed", "id": str(existing["_id"])}
+    now = _now_ms()
+    query, pipeline = _job_upsert(job, now)
+    # Single atomic upsert: concurrent posts of the same job cannot both insert
+    doc = await db.jobs.find_one_and_update(
+        query, pipeline, upsert=True, return_document=ReturnDocument.AFTER,
+        projection={"_id": 1, "created_at": 1, "indexed_at": 1},
+    )
+    outcome = _index_outcome(doc, now)
+    if outcome == "unchanged":
+        return {"message": "Job already indexed", "id": str(doc["_id"])}
+    await jobs_changed(job.chain_job_id)
+    return {"id": str(doc["_id"]), "status": "Indexed"}
 
-    # Async Insert
-    new_job = await db.jobs.insert_one(job_dict)
-    return {"id": str(new_job.inserted_id), "status": "Indexed"}
 
-async def list_jobs(chain_id: int = None):
-    print(chain_id)
+async def index_jobs(jobs: list[JobModel]) -> dict:
+    """
+    Upserts many jobs in one unordered bulk_write (same rules as index_job).
+    Returns: {'inserted', 'updated', 'unchanged', 'failed': int, 'results': [per job, in request order]}
+    Each result is {'chain_job_id', 'status': 'inserted' | 'updated' | 'unchanged' | 'error', 'id' | 'error'}.
+    """
+    if len(jobs) > JOBS_BULK_MAX:
+        raise ValueError(f"At most {JOBS_BULK_MAX} jobs per request")
     db = get_database()
+    now = _now_ms()
+
+    # The same job twice in one request: the last entry is written and reported for both
+    keys = [tuple(job_key(job.chain_job_id, job.chain_id).values()) for job in jobs]
+    latest = {key: i for i, key in enumerate(keys)}
+    unique = sorted(latest.values())
+    errors = {}
+    if unique:
+        try:
+            await db.jobs.bulk_write(
+                [UpdateOne(*_job_upsert(jobs[i], now), upsert=True) for i in unique], ordered=False
+            )
+        except BulkWriteError as e:
+            errors = {unique[error["index"]]: error["errmsg"] for error in e.details["writeErrors"]}
+
+    written = [jobs[i].chain_job_id for i in unique if i not in errors]
+    # May also return the same ids on other chains: matched on the whole key below
+    docs = {
+        (doc["chain_id"], doc["chain_job_id"]): doc
+        for doc in await db.jobs.find(
+            {"chain_job_id": {"$in": written}}, {"chain_id": 1, "chain_job_id": 1, "created_at": 1, "indexed_at": 1}
+        ).to_list(length=None)
+    } if written else {}
+
+    results = []
+    for job, key in zip(jobs, keys):
+        written_index = latest[key]
+        if written_index in errors:
+            results.append({"chain_job_id": job.chain_job_id, "status": "error", "error": errors[written_index]})
+        else:
+            doc = docs[key]
+            results.append({"chain_job_id": job.chain_job_id, "status": _index_outcome(doc, now), "id": str(doc["_id"])})
+
+    await jobs_changed(*{r["chain_job_id"] for r in results if r["status"] in ("inserted", "updated")})
+    counts = {status: sum(r["status"] == status for r in results) for status in ("inserted", "updated", "unchanged")}
+    return {**counts, "failed": sum(r["status"] == "error" for r in results), "results": results}
+
+# List views fetch only what their response model (dtos.py) returns
+JOB_LIST_PROJECTION = list_projection(JobSummary, previews=("description",), computed=("onchain",))
+
+SUBMISSION_LIST_PROJECTION = list_projection(SubmissionSummary, previews=("notes",))
+
+# Bookkeeping kept on db.jobs that is not part of the API: the review lease (admission.py),
+# payout claims (payouts.py, batch_payouts.py) and the embedding marker (similarity.py)
+JOB_INTERNAL_FIELDS = (
+    "review_lease", "payout_claimed_at", "payout_submission_id", "batch_id", "batch_claimed_at", "embedding_key",
+)
+JOB_FULL_PROJECTION = {field: 0 for field in JOB_INTERNAL_FIELDS}
+
+def job_number(chain_job_id: str) -> int:
+    """Numeric sort key: chain_job_id is a string, so sorting on it is lexicographic."""
+    return int(chain_job_id) if chain_job_id.isdigit() else -1
+
+async def list_jobs(
+    chain_id: int = None, include_onchain: bool = False, status: str = None, tag: str = None,
+    applicant: str = None, cursor: str = None, limit: int = None, view: str = "summary"
+):
+    """
+    One page of jobs, newest chain job first, as stored (ObjectId _id; see app/serialization.py).
+    Returns: (jobs, next_cursor) - next_cursor is None on the last page.
+    """
+    db = get_database()
+    limit = page_size(limit)
     query = {}
     if chain_id:
         query["chain_id"] = chain_id
-    print(query)
-    cursor = db.jobs.find(query).sort("chain_job_id", -1).limit(50)
-    jobs = await cursor.to_list(length=50)
-    for job in jobs:
-        job["_id"] = str(job["_id"])
+    if status:
+        query["status"] = status
+    if tag:
+        query["tags"] = tag
+    if applicant:
+        query["applicants"] = applicant
+    if cursor:
+        query.update(after_cursor("job_number", cursor))
+
+    projection = JOB_FULL_PROJECTION if view == "full" else JOB_LIST_PROJECTION
+    # Fetch one extra document to know whether there is a next page
+    db_cursor = db.jobs.find(query, projection).sort([("job_number", -1), ("_id", -1)]).limit(limit + 1)
+    jobs = await db_cursor.to_list(length=limit + 1)
+    next_cursor = None
+    if len(jobs) > limit:
+        jobs = jobs[:limit]
+        next_cursor = encode_cursor(jobs[-1]["job_number"], jobs[-1]["_id"])
+
+    if include_onchain and jobs:
+        from app.chain import aget_jobs_details
+        # One batched RPC round trip per chain on the page, chains in parallel
+        by_chain = {}
+        for job in jobs:
+            if job["chain_job_id"].isdigit():
+                by_chain.setdefault(job.get("chain_id"), []).append(int(job["chain_job_id"]))
+        chain_ids = list(by_chain)
+        onchain = dict(zip(chain_ids, await asyncio.gather(
+            *[aget_jobs_details(by_chain[chain], chain) for chain in chain_ids], return_exceptions=True
+        )))
+        for job in jobs:
+            details = onchain.get(job.get("chain_id"))
+            if job["chain_job_id"].isdigit() and isinstance(details, dict):
+                job["onchain"] = details.get(int(job["chain_job_id"]))
         
-    return jobs
+    return jobs, next_cursor
+
+async def get_job(jobId: str, chain_id: int = None):
+    """The job as stored, without its internal fields (ObjectId _id; see app/serialization.py)."""
+    db = get_database()
+    return await db.jobs.find_one(job_key(jobId, chain_id), JOB_FULL_PROJECTION)
 
 async def assign_freelancer(
-    jobId, freelancerName
+    jobId, freelancerName, chain_id: int = None
 ):
     db = get_database()
     # Update status to ASSIGNED and set the name
     await db.jobs.update_one(
-        {"chain_job_id": jobId},
+        job_key(jobId, chain_id),
         {"$set": {
             "status": "ASSIGNED", 
             "freelancer_name": freelancerName
             # We don't change blockchain address because it's already YOU
         }}
     )
+    await jobs_changed(jobId)
     return {"status": "Assigned"}
 
 
-async def apply_to_job(jobId, applicantName):
+async def apply_to_job(jobId, applicantName, chain_id: int = None):
     db = get_database()
     # Add user to applicants list if not already there
     await db.jobs.update_one(
-        {"chain_job_id": jobId},
+        job_key(jobId, chain_id),
         {"$addToSet": {"applicants": applicantName}}
     )
+    await jobs_changed(jobId)
     return {"status": "Applied"}
 
-async def get_submissions(jobId: str):
+async def find_similar_jobs(jobId: str = None, text: str = None, k: int = 5):
+    if not jobId and not text:
+        raise ValueError("Pass jobId or q")
+    return await similarity.find_similar_jobs(text=text, jobId=jobId, k=min(max(k, 1), 50))
+
+async def get_submissions(
+    jobId: str, status: str = None, cursor: str = None, limit: int = None, view: str = "summary",
+    chain_id: int = None,
+):
+    """
+    One page of a job's submissions, newest first, as stored (ObjectId _id; see app/serialization.py).
+    Returns: (submissions, next_cursor) - next_cursor is None on the last page.
+    """
     db = get_database()
-    cursor = db.submissions.find({"chain_job_id": jobId}).sort("created_at", -1)
-    job_list = await cursor.to_list(length=100)
-    for job in job_list:
-        job["_id"] = str(job["_id"])
-    return job_list
\ No newline at end of file
+    limit = page_size(limit)
+    query = job_key(jobId, chain_id)
+    if status:
+        query["status"] = status
+    if cursor:
+        query.update(after_cursor("created_at", cursor))
+
+    projection = {"payload": 0} if view == "full" else SUBMISSION_LIST_PROJECTION
+    db_cursor = db.submissions.find(query, projection).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1)
+    job_list = await db_cursor.to_list(length=limit + 1)
+    next_cursor = None
+    if len(job_list) > limit:
+        job_list = job_list[:limit]
+        next_cursor = encode_cursor(job_list[-1]["created_at"], job_list[-1]["_id"])
+    return job_list, next_cursor
@@ -0,0 +1,48 @@
+"""
+Benchmark: on-chain job reads, one eth_call per job versus batched + cached reads.
+
+Point SEPOLIA_RPC_URL at a local anvil node with TeleoEscrow deployed at
+TELEO_ESCROW_ADDRESS (and some jobs created), e.g.:
+    anvil &
+    forge script ... --rpc-url http://127.0.0.1:8545 --broadcast
+    SEPOLIA_RPC_URL=http://127.0.0.1:8545 python -m benchmarks.bench_chain_reads --jobs 200
+
+Reports wall time for:
+  sequential - contract.functions.jobs(id).call() per job (the old get_job_details)
+  batched    - chain.get_jobs_details(ids), cold cache
+  cached     - the same call again within the block
+"""
+import argparse
+import time
+
+from app import chain
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100, help="number of job ids to read, starting at 0")
+    args = parser.parse_args()
+    ids = list(range(args.jobs))
+
+    sequential, seq_ms = timed(lambda: [chain.get_contract().functions.jobs(i).call() for i in ids])
+    batched, batch_ms = timed(lambda: chain.get_jobs_details(ids))
+    _, cached_ms = timed(lambda: chain.get_jobs_details(ids))
+
+    found = sum(1 for details in batched.values() if details)
+    settled = sum(1 for details in batched.values() if details and details["is_settled"])
+    assert len(sequential) == len(batched)
+
+    print(f"{args.jobs} ids ({found} existing, {settled} settled) at block {chain.read_cache.block_number}")
+    print(f"{'sequential':<12}{seq_ms:>10} ms")
+    print(f"{'batched':<12}{batch_ms:>10} ms")
+    print(f"{'cached':<12}{cached_ms:>10} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: judge latency and prompt-token spend versus submission size.
+
+Runs the judge against a fake LLM whose latency grows with prompt size
+(BASE_MS + MS_PER_1K_TOKENS per 1k prompt tokens), comparing:
+  single  - the whole submission in one prompt (no size control)
+  planned - TeleoJudge.areview_submission: budgeted packing, parallel chunk
+            reviews and a reduce call once the budget is exceeded
+
+Usage (from backend/):
+    python -m benchmarks.bench_context_planner
+    python -m benchmarks.bench_context_planner --counts 10 100 1000 --file-kb 8 --budget 60000
+"""
+import argparse
+import asyncio
+import io
+import sys
+import time
+
+from app import context_planner
+from app.context_planner import estimate_tokens
+from app.ingest import build_submission_text
+from app.judge import TeleoJudge
+from app.model_router import ModelRouter
+from app.verdict_cache import VerdictCache
+
+BASE_MS = 400
+MS_PER_1K_TOKENS = 15
+
+
+class FakeLLM:
+    """Stands in for VertexAIClient: sleeps in proportion to the prompt and counts tokens."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    async def achat_completion(self, messages, model=None, **kwargs):
+        tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        self.calls += 1
+        self.prompt_tokens += tokens
+        await asyncio.sleep((BASE_MS + MS_PER_1K_TOKENS * tokens / 1000) / 1000)
+        return '{"verdict": "PASS", "reason": "Looks complete."}'
+
+    async def aembed_texts(self, texts, **kwargs):
+        # No embedding backend here: forces the keyword-overlap ranking fallback
+        return []
+
+
+def make_documents(count: int, file_kb: int) -> list[dict]:
+    line = "def handler(event, context):\n    return {'status': 200, 'body': 'ok'}\n"
+    text = (line * (file_kb * 1024 // len(line) + 1))[: file_kb * 1024]
+    return [
+        {"name": f"module_{i}.py", "text": text, "size": len(text), "binary": False, "truncated": False}
+        for i in range(count)
+    ]
+
+
+def make_judge() -> TeleoJudge:
+    judge = TeleoJudge.__new__(TeleoJudge)
+    judge.ai = FakeLLM()
+    judge.cache = VerdictCache()
+    judge.router = ModelRouter()
+    return judge
+
+
+async def run_case(mode: str, count: int, file_kb: int) -> dict:
+    job_desc = "Build an HTTP handler that returns status 200 with an ok body."
+    documents = make_documents(count, file_kb)
+    file_names = [d["name"] for d in documents]
+    judge = make_judge()
+
+    start = time.perf_counter()
+    if mode == "single":
+        code = build_submission_text("benchmark", file_names, documents)
+        await judge.aevaluate_submission(job_desc=job_desc, code=code, language="Multi-File Project")
+    else:
+        await judge.areview_submission(job_desc, "benchmark", file_names, documents)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "files": count,
+        "latency_ms": round(elapsed * 1000, 1),
+        "llm_calls": judge.ai.calls,
+        "prompt_tokens": judge.ai.prompt_tokens,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--file-kb", type=int, default=8)
+    parser.add_argument("--budget", type=int, default=context_planner.JUDGE_CONTEXT_TOKENS)
+    args = parser.parse_args()
+    context_planner.JUDGE_CONTEXT_TOKENS = args.budget
+
+    print(f"budget={args.budget} tokens, fake LLM latency={BASE_MS}ms + {MS_PER_1K_TOKENS}ms/1k tokens")
+    print(f"{'mode':<9}{'files':>7}{'latency ms':>12}{'LLM calls':>11}{'prompt tokens':>15}")
+    for count in args.counts:
+        for mode in ("single", "planned"):
+            # Silence judge progress prints
+            sys.stdout = io.StringIO()
+            r = asyncio.run(run_case(mode, count, args.file_kb))
+            sys.stdout = sys.__stdout__
+            print(f"{r['mode']:<9}{r['files']:>7}{r['latency_ms']:>12}{r['llm_calls']:>11}{r['prompt_tokens']:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: cold start of the API process.
+
+Each run imports `main` in a fresh interpreter (nothing cached in sys.modules)
+with no RPC, credentials or network configured, so it also checks that
+importing the app has no side effects:
+    python -m benchmarks.bench_import --runs 5
+
+Reports the median wall time of `import main` and, from `-X importtime`,
+the modules with the largest cumulative import cost.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMED_IMPORT = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+# Keep only what the interpreter needs: the app must boot without SEPOLIA_RPC_URL, JSON_URL, ...
+CLEAN_ENV = {"PATH": os.environ.get("PATH", ""), "HOME": os.environ.get("HOME", "/tmp")}
+
+
+def cold_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", TIMED_IMPORT],
+        cwd=BACKEND_DIR, env=CLEAN_ENV, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def top_imports(limit: int) -> list[tuple[int, str]]:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=CLEAN_ENV, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    times = [cold_import() for _ in range(args.runs)]
+    print(f"import main: median {statistics.median(times) * 1000:.0f} ms "
+          f"(min {min(times) * 1000:.0f}, max {max(times) * 1000:.0f}) over {args.runs} runs")
+
+    print(f"\n{'cumulative':>12}  module")
+    for cumulative_us, module in top_imports(args.top):
+        print(f"{cumulative_us / 1000:>9.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
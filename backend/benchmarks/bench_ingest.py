@@ -0,0 +1,128 @@
+"""
+Benchmark: /submit-work file ingestion.
+
+Compares the streaming ingestion pipeline (app.ingest) against the old
+read-everything + string `+=` approach for submissions of 1, 50 and 500 files:
+  legacy   - whole-file read() and `+=` concatenation
+  stream   - chunked reads + single join, byte budgets lifted (like-for-like)
+  budgeted - chunked reads + single join with the default byte budgets
+  blobs    - "budgeted" plus streaming every file into the blob store
+Only "blobs" writes to the blob store, and it writes to a temporary BLOB_DIR.
+Each case runs in a fresh subprocess so peak RSS is not polluted by earlier runs.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ingest
+    python -m benchmarks.bench_ingest --file-kb 256 --counts 1 50 500
+"""
+import argparse
+import asyncio
+import io
+import os
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from starlette.datastructures import UploadFile
+
+from app.ingest import ingest_files, build_submission_text
+
+
+def make_uploads(count: int, file_kb: int) -> list:
+    line = b"def handler(event, context):\n    return {'status': 200, 'body': 'ok'}\n"
+    body = (line * (file_kb * 1024 // len(line) + 1))[: file_kb * 1024]
+    uploads = []
+    for i in range(count):
+        # Same spooling threshold the multipart parser uses: large parts live on disk
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        spooled.write(body)
+        spooled.seek(0)
+        uploads.append(UploadFile(file=spooled, filename=f"module_{i}.py"))
+    return uploads
+
+
+async def legacy_ingest(files) -> str:
+    file_context = ""
+    file_names = []
+    for file in files:
+        file_names.append(file.filename)
+        content = await file.read()
+        file_context += f"\n\n--- FILE: {file.filename} ---\n{content.decode('utf-8', errors='ignore')}"
+    submission_summary = f"Files Uploaded: {', '.join(file_names)}\n\n"
+    return f"FREELANCER NOTES:\nbenchmark\n\n{submission_summary}{file_context}"
+
+
+async def streaming_ingest(files) -> str:
+    # Budgets are lifted so "legacy" and "stream" process the same number of bytes
+    ingested = await ingest_files(files, max_file_bytes=1 << 40, max_submission_bytes=1 << 40, store_blobs=False)
+    return build_submission_text("benchmark", ingested["file_names"], ingested["documents"])
+
+
+async def budgeted_ingest(files) -> str:
+    # Production defaults: MAX_FILE_BYTES / MAX_SUBMISSION_BYTES apply
+    ingested = await ingest_files(files, store_blobs=False)
+    return build_submission_text("benchmark", ingested["file_names"], ingested["documents"])
+
+
+async def blob_ingest(files) -> str:
+    # What /submit-work does: production budgets and every file kept in the blob store
+    ingested = await ingest_files(files, store_blobs=True)
+    return build_submission_text("benchmark", ingested["file_names"], ingested["documents"])
+
+
+MODES = {"legacy": legacy_ingest, "stream": streaming_ingest, "budgeted": budgeted_ingest, "blobs": blob_ingest}
+
+
+def run_case(mode: str, count: int, file_kb: int) -> dict:
+    files = make_uploads(count, file_kb)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    context = asyncio.run(MODES[mode](files))
+    elapsed = time.perf_counter() - start
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "files": count,
+        "file_kb": file_kb,
+        "latency_ms": round(elapsed * 1000, 2),
+        "peak_rss_mb": round(rss_after / 1024, 1),
+        "rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+        "context_chars": len(context),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--file-kb", type=int, default=64)
+    parser.add_argument("--case", nargs=3, metavar=("MODE", "COUNT", "FILE_KB"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        mode, count, file_kb = args.case
+        # Silence per-file progress prints from the pipeline
+        sys.stdout = io.StringIO()
+        result = run_case(mode, int(count), int(file_kb))
+        sys.stdout = sys.__stdout__
+        print(json.dumps(result))
+        return
+
+    print(f"{'mode':<10}{'files':>7}{'latency ms':>12}{'peak RSS MB':>13}{'RSS growth MB':>15}")
+    for count in args.counts:
+        for mode in MODES:
+            with tempfile.TemporaryDirectory() as blob_dir:
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_ingest", "--case", mode, str(count), str(args.file_kb)],
+                    capture_output=True, text=True, check=True,
+                    env={**os.environ, "BLOB_STORE": "fs", "BLOB_DIR": blob_dir},
+                )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{r['mode']:<10}{r['files']:>7}{r['latency_ms']:>12}{r['peak_rss_mb']:>13}{r['rss_growth_mb']:>15}")
+
+
+if __name__ == "__main__":
+    main()
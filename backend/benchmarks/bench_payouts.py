@@ -0,0 +1,62 @@
+"""
+Benchmark: per-job releaseFunds versus one releaseFundsBatch.
+
+Needs a node (e.g. anvil) with TeleoEscrow deployed at TELEO_ESCROW_ADDRESS,
+JUDGE_PRIVATE_KEY set to the escrow's judge, and open jobs to settle:
+    SEPOLIA_RPC_URL=http://127.0.0.1:8545 python -m benchmarks.bench_payouts --jobs 0-19
+
+Without --send only gas is estimated (no state change). With --send the first
+half of the ids is paid one tx per job and the second half in one batch, and the
+wall time until every receipt is mined is reported for both.
+"""
+import argparse
+import time
+
+from app import chain
+
+
+def parse_ids(spec: str) -> list[int]:
+    start, _, end = spec.partition("-")
+    return list(range(int(start), int(end or start) + 1))
+
+
+def estimate(ids: list[int], sender) -> tuple[int, int]:
+    tx = {"from": sender.account.address}
+    # Execution estimates already include the 21000 base cost of each transaction
+    single = sum(chain.get_contract().functions.releaseFunds(i).estimate_gas(tx) for i in ids)
+    batch = chain.get_contract().functions.releaseFundsBatch(ids).estimate_gas(tx)
+    return single, batch
+
+
+def send_and_confirm(send, args) -> tuple[float, int]:
+    start = time.perf_counter()
+    hashes = [send(a) for a in args]
+    receipts = [chain.get_w3().eth.wait_for_transaction_receipt(h) for h in hashes]
+    return round(time.perf_counter() - start, 2), sum(r["gasUsed"] for r in receipts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", default="0-19", help="job id range, e.g. 0-19")
+    parser.add_argument("--send", action="store_true", help="actually settle the jobs and time it")
+    args = parser.parse_args()
+
+    ids = parse_ids(args.jobs)
+    sender = chain.get_payout_sender()
+
+    single, batch = estimate(ids, sender)
+    print(f"estimated gas for {len(ids)} jobs")
+    print(f"{'per-job':<10}{single:>12} total{single // len(ids):>10} / job")
+    print(f"{'batched':<10}{batch:>12} total{batch // len(ids):>10} / job   ({100 - batch * 100 // single}% saved)")
+
+    if args.send:
+        half = len(ids) // 2
+        single_s, single_gas = send_and_confirm(sender.send_release, ids[:half])
+        batch_s, batch_gas = send_and_confirm(sender.send_release_batch, [ids[half:]])
+        print(f"\nsettled on chain")
+        print(f"{'per-job':<10}{half:>4} jobs {single_s:>8}s {single_gas:>10} gas used")
+        print(f"{'batched':<10}{len(ids) - half:>4} jobs {batch_s:>8}s {batch_gas:>10} gas used")
+
+
+if __name__ == "__main__":
+    main()
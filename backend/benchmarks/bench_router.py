@@ -0,0 +1,146 @@
+"""
+Benchmark: judge routing policies on a synthetic workload with a fake LLM backend.
+
+Each fake model has a latency, a price and an accuracy. Every job carries a hidden
+ground-truth verdict that the fake model returns with that accuracy. Its confidence
+is lower when it gets the verdict wrong, which is what borderline escalation relies on.
+The draws are seeded per job, model and call, so every policy sees the same outcomes
+for the same model and the comparison is paired rather than down to scheduling order.
+Compares:
+  standard - the default policy: every review on the standard model
+  tiered   - the opt-in TIERED_POLICY (strong for high-value payouts, fast for small
+             ones, borderline fast verdicts escalated to standard)
+  <file>   - any policy JSON passed with --policy
+
+Usage (from backend/):
+    python -m benchmarks.bench_router
+    python -m benchmarks.bench_router --jobs 500 --policy my_policy.json
+"""
+import io
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+
+from app.judge import TeleoJudge
+from app.model_router import ModelRouter, DEFAULT_POLICY, TIERED_POLICY, HIGH_VALUE_AMOUNT, load_policy
+from app.verdict_cache import VerdictCache
+from app.context_planner import estimate_tokens
+
+# model -> (base latency ms, ms per 1k prompt tokens, accuracy)
+FAKE_MODELS = {
+    DEFAULT_POLICY["tiers"]["fast"]["model"]: (250, 5, 0.86),
+    DEFAULT_POLICY["tiers"]["standard"]["model"]: (700, 12, 0.92),
+    DEFAULT_POLICY["tiers"]["strong"]["model"]: (2500, 30, 0.97),
+}
+TRUTH = re.compile(r"\[truth=(PASS|FAIL)\]")
+
+
+class FakeLLM:
+    def __init__(self, models: dict, seed: int = 0):
+        self.models = models
+        self.seed = seed
+        self.calls = Counter()
+
+    async def achat_completion(self, messages, model=None, **kwargs):
+        base_ms, per_1k_ms, accuracy = self.models[model]
+        tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        await asyncio.sleep((base_ms + per_1k_ms * tokens / 1000) / 1000)
+
+        prompt = messages[-1]["content"]
+        truth = TRUTH.search(prompt).group(1)
+        self.calls[prompt, model] += 1
+        draw = random.Random(f"{self.seed}|{prompt}|{model}|{self.calls[prompt, model]}")
+        correct = draw.random() < accuracy
+        verdict = truth if correct else ("FAIL" if truth == "PASS" else "PASS")
+        confidence = draw.uniform(0.7, 1.0) if correct else draw.uniform(0.35, 0.8)
+        return json.dumps({"verdict": verdict, "confidence": round(confidence, 2), "reason": "benchmark"})
+
+    async def aembed_texts(self, texts, **kwargs):
+        return []
+
+
+def make_jobs(count: int) -> list[dict]:
+    jobs = []
+    for i in range(count):
+        tokens = int(min(55000, random.lognormvariate(8, 1.1)))
+        jobs.append({
+            "id": i,
+            "amount": round(random.lognormvariate(3.5, 1.3), 2),
+            "truth": "PASS" if random.random() < 0.6 else "FAIL",
+            "text": "x = 1\n" * (tokens * 4 // 6),
+        })
+    return jobs
+
+
+def make_judge(policy: dict, seed: int = 0) -> TeleoJudge:
+    judge = TeleoJudge.__new__(TeleoJudge)
+    judge.ai = FakeLLM(FAKE_MODELS, seed)
+    judge.cache = VerdictCache()
+    judge.router = ModelRouter(policy)
+    return judge
+
+
+async def run_policy(policy: dict, jobs: list[dict], concurrency: int, high_value: float, seed: int = 0) -> dict:
+    judge = make_judge(policy, seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes = []
+
+    async def review(job):
+        async with semaphore:
+            documents = [{"name": "main.py", "text": job["text"], "size": len(job["text"]), "binary": False, "truncated": False}]
+            start = time.perf_counter()
+            result = await judge.areview_submission(
+                f"Job {job['id']} [truth={job['truth']}]", "benchmark", ["main.py"], documents, amount=job["amount"]
+            )
+            outcomes.append((job, result, time.perf_counter() - start))
+
+    await asyncio.gather(*[review(job) for job in jobs])
+
+    latencies = sorted(seconds * 1000 for _, _, seconds in outcomes)
+    correct = [job["truth"] == result["verdict"] for job, result, _ in outcomes]
+    expensive = [job["truth"] == result["verdict"] for job, result, _ in outcomes if job["amount"] >= high_value]
+    stats = judge.router.get_stats()["models"]
+    return {
+        "mean_ms": round(statistics.fmean(latencies)),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))]),
+        "accuracy": round(sum(correct) / len(correct), 3),
+        "high_value_accuracy": round(sum(expensive) / len(expensive), 3) if expensive else None,
+        "llm_calls": sum(s["calls"] for s in stats.values()),
+        "usd": round(sum(s["usd"] for s in stats.values()), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--high-value", type=float, default=HIGH_VALUE_AMOUNT, help="amount counted as a high-value payout")
+    parser.add_argument("--policy", help="extra policy JSON (inline or file) to compare")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    policies = {"standard": DEFAULT_POLICY, "tiered": TIERED_POLICY}
+    if args.policy:
+        policies["custom"] = load_policy(args.policy)
+
+    print(f"{args.jobs} jobs, {args.high_value}+ MNEE counted as high value")
+    print(f"{'policy':<10}{'mean ms':>9}{'p95 ms':>9}{'accuracy':>10}{'high-value':>12}{'LLM calls':>11}{'usd':>9}")
+    for name, policy in policies.items():
+        random.seed(args.seed)
+        jobs = make_jobs(args.jobs)
+        # Silence judge progress prints
+        sys.stdout = io.StringIO()
+        r = asyncio.run(run_policy(policy, jobs, args.concurrency, args.high_value, args.seed))
+        sys.stdout = sys.__stdout__
+        print(f"{name:<10}{r['mean_ms']:>9}{r['p95_ms']:>9}{r['accuracy']:>10}{str(r['high_value_accuracy']):>12}"
+              f"{r['llm_calls']:>11}{r['usd']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark: serialization cost of the list endpoints per 1k documents.
+
+Synthetic job and submission documents shaped like Mongo returns them (ObjectId _id,
+datetimes, nested lists; summary = the list projection, full = whole documents).
+Compares:
+  jsonable   - the old path: stringify _id in a loop, then FastAPI's jsonable_encoder
+               and JSONResponse's json.dumps
+  pydantic   - validate into the response models (dtos.py) and dump_json in pydantic-core
+  orjson     - app.serialization.dumps, as the list endpoints now render
+plus the cost of the weak ETag and of gzip on the orjson body, and the bytes on the wire.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --docs 200 --repeat 50
+"""
+import json
+import time
+import gzip
+import random
+import argparse
+import datetime
+from decimal import Decimal
+from typing import List
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+from fastapi.encoders import jsonable_encoder
+
+from dtos import JobSummary, SubmissionSummary
+from app.pagination import PREVIEW_CHARS
+from app.serialization import dumps, etag, GZIP_LEVEL
+
+
+def make_job(i: int, full: bool) -> dict:
+    job = {
+        "_id": ObjectId(),
+        "chain_job_id": str(i),
+        "job_number": i,
+        "title": f"Build a REST endpoint #{i}",
+        "description": "Implement and test the endpoint. " * (40 if full else 8),
+        "amount_mnee": round(random.uniform(5, 2000), 2),
+        "client_address": "0x" + "%040x" % random.getrandbits(160),
+        "client_name": "client",
+        "tags": ["python", "fastapi", "mongo"],
+        "freelancer_address": None,
+        "freelancer_name": "freelancer",
+        "status": "OPEN",
+        "applicants": [f"user{n}" for n in range(random.randint(0, 8))],
+        "chain_id": 11155111,
+        "tx_hash": None,
+        "created_at": datetime.datetime.now(),
+    }
+    if full:
+        job["description"] = job["description"][:PREVIEW_CHARS * 4]
+        job["onchain"] = {
+            "client": job["client_address"], "freelancer": None, "amount": Decimal("12.5"),
+            "description": job["description"], "is_settled": False, "is_approved": False, "block": 123456,
+        }
+        job["indexed_at"] = datetime.datetime.now()
+    else:
+        job["description"] = job["description"][:PREVIEW_CHARS]
+    return job
+
+
+def make_submission(i: int, full: bool) -> dict:
+    submission = {
+        "_id": ObjectId(),
+        "chain_job_id": str(i % 50),
+        "freelancer_name": "freelancer",
+        "notes": "Implemented the endpoint and its tests. " * (20 if full else 7),
+        "files": ["main.py", "test_main.py", "README.md"],
+        "verdict": random.choice(["PASS", "FAIL"]),
+        "reason": "The endpoint meets the requirements and the tests cover the edge cases.",
+        "status": "DONE",
+        "tx_hash": "0x" + "%064x" % random.getrandbits(256),
+        "payout_status": "PAID",
+        "similar_submissions": [
+            {"file": "main.py", "matched_file": "app.py", "chain_job_id": "7", "submission_id": str(ObjectId()), "score": 0.93}
+        ],
+        "review_mode": "full",
+        "created_at": datetime.datetime.now(),
+    }
+    if full:
+        submission["blobs"] = [
+            {"name": name, "sha256": "%064x" % random.getrandbits(256), "bytes": 4096, "binary": False}
+            for name in submission["files"]
+        ]
+        submission["timings"] = {"job_lookup": 0.002, "blob_load": 0.01, "judge": 2.4, "payout": 0.8}
+        submission["attempts"] = 1
+        submission["completed_at"] = datetime.datetime.now()
+    else:
+        submission["notes"] = submission["notes"][:PREVIEW_CHARS]
+    return submission
+
+
+def render_jsonable(docs: list[dict]) -> bytes:
+    # Copies stand in for the fresh documents each request gets from Mongo
+    docs = [dict(doc) for doc in docs]
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    return json.dumps(
+        jsonable_encoder(docs), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def render_pydantic(adapter: TypeAdapter):
+    def render(docs: list[dict]) -> bytes:
+        return adapter.dump_json(adapter.validate_python(docs), by_alias=True)
+    return render
+
+
+def timed(render, docs: list[dict], repeat: int) -> tuple[float, bytes]:
+    body = render(docs)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render(docs)
+    return (time.perf_counter() - start) / repeat, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000, help="documents per page")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    per_1k = 1000 / args.docs
+    print(f"{'case':<20}{'encoder':<10}{'ms/1k docs':>12}{'KB/1k docs':>12}{'vs jsonable':>13}")
+    for kind, make, model in (("jobs", make_job, JobSummary), ("submissions", make_submission, SubmissionSummary)):
+        for view in ("summary", "full"):
+            docs = [make(i, view == "full") for i in range(args.docs)]
+            renderers = {"jsonable": render_jsonable, "orjson": dumps}
+            # The response models describe the summary view only
+            if view == "summary":
+                renderers["pydantic"] = render_pydantic(TypeAdapter(List[model]))
+            baseline = None
+            for name, render in renderers.items():
+                seconds, body = timed(render, docs, args.repeat)
+                baseline = baseline or seconds
+                print(f"{f'{kind} {view}':<20}{name:<10}{seconds * 1000 * per_1k:>12.2f}"
+                      f"{len(body) / 1024 * per_1k:>12.1f}{baseline / seconds:>12.1f}x")
+
+            body = dumps(docs)
+            etag_seconds, _ = timed(etag, body, args.repeat)
+            gzip_seconds, compressed = timed(lambda b: gzip.compress(b, compresslevel=GZIP_LEVEL), body, args.repeat)
+            print(f"{f'{kind} {view}':<20}{'+etag':<10}{etag_seconds * 1000 * per_1k:>12.2f}")
+            print(f"{f'{kind} {view}':<20}{'+gzip':<10}{gzip_seconds * 1000 * per_1k:>12.2f}"
+                  f"{len(compressed) / 1024 * per_1k:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+Load test: drives the API at a fixed concurrency against local stand-ins and
+reports p50/p95/p99 latency, throughput and memory per scenario.
+
+No Gemini key, RPC URL or MongoDB is needed by default:
+  LLM    - the real VertexAIClient (semaphore, retries, metrics) with the genai
+           calls replaced by a fake whose latency is lognormal around
+           --llm-latency-ms and which fails with --llm-error-rate (429/503, so
+           the retry path is exercised)
+  chain  - --chain stub: jobs carry an on-chain snapshot (no reads) and payouts
+           return a fake tx hash after --rpc-latency-ms
+           --chain node: reads and payouts go to SEPOLIA_RPC_URL, e.g. a local
+           anvil with TeleoEscrow at TELEO_ESCROW_ADDRESS and open jobs
+           --first-job-id.. (see bench_chain_reads), JUDGE_PRIVATE_KEY = judge
+  Mongo  - mongomock (in memory) unless --mongo-uri points at a real mongod
+
+The app is called in-process over ASGI, so the numbers exclude the network.
+    python -m benchmarks.loadtest --scenarios submit jobs submissions --requests 200 --concurrency 20
+    python -m benchmarks.loadtest --out results/after.json --compare results/before.json
+
+Results are written as JSON (config, git commit, per-scenario stats); --compare
+prints the change in p95 and throughput against an earlier result file.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import datetime
+import tempfile
+import statistics
+import subprocess
+
+os.environ.setdefault("GOOGLE_API_KEY", "loadtest")
+os.environ.setdefault("LLM_BACKOFF_BASE_SECONDS", "0.05")
+
+import httpx
+from google.genai import types, errors
+
+SCENARIOS = ("submit", "jobs", "submissions")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- Stand-ins ---
+
+class FakeGemini:
+    """Replaces the genai async methods on a VertexAIClient instance."""
+
+    def __init__(self, latency_ms: float, sigma: float, error_rate: float, pass_rate: float):
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.pass_rate = pass_rate
+        self.calls = 0
+        self.errors = 0
+
+    async def _delay(self):
+        self.calls += 1
+        await asyncio.sleep(random.lognormvariate(0, self.sigma) * self.latency_ms / 1000)
+        if random.random() < self.error_rate:
+            self.errors += 1
+            code = random.choice((429, 503))
+            error = errors.ClientError if code == 429 else errors.ServerError
+            raise error(code, {"error": {"message": "loadtest", "status": "UNAVAILABLE"}})
+
+    async def generate_content(self, model, contents, config=None):
+        await self._delay()
+        verdict = "PASS" if random.random() < self.pass_rate else "FAIL"
+        prompt_tokens = sum(len(c) for c in contents if isinstance(c, str)) // 4
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.Content(role="model", parts=[
+                types.Part(text=json.dumps({"verdict": verdict, "reason": "Load test verdict."}))
+            ]))],
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens, candidates_token_count=20
+            ),
+        )
+
+    async def generate_content_stream(self, model, contents, config=None):
+        # Like the SDK, the request only happens once the stream is iterated
+        async def stream():
+            response = await self.generate_content(model, contents, config)
+            text = response.text
+            for start in range(0, len(text), 16):
+                yield types.GenerateContentResponse(
+                    candidates=[types.Candidate(content=types.Content(role="model", parts=[
+                        types.Part(text=text[start:start + 16])
+                    ]))],
+                    usage_metadata=response.usage_metadata if start + 16 >= len(text) else None,
+                )
+        return stream()
+
+    async def embed_content(self, model, contents, config=None):
+        await self._delay()
+        dimensions = (config and config.output_dimensionality) or 8
+        return types.EmbedContentResponse(embeddings=[
+            types.ContentEmbedding(values=[random.Random(f"{text}:{i}").random() - 0.5 for i in range(dimensions)])
+            for text in contents
+        ])
+
+
+class StubPayoutSender:
+    """Broadcast stand-in: waits like an eth_sendRawTransaction and returns a fake hash."""
+
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+        self.sent = 0
+
+    def send_release(self, job_id: int) -> str:
+        time.sleep(self.latency_ms / 1000)
+        self.sent += 1
+        return "0x" + os.urandom(32).hex()
+
+
+def use_mongomock():
+    try:
+        import mongomock_motor
+    except ImportError:
+        sys.exit("mongomock-motor is not installed: pip install mongomock-motor, or pass --mongo-uri")
+    from app import database
+    database.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+
+
+async def seed_jobs(args) -> list[str]:
+    from app.database import get_database
+    from app.constants import GOD_USERS
+    db = get_database()
+    now = datetime.datetime.now()
+    ids = [str(args.first_job_id + i) for i in range(args.jobs)]
+    docs = []
+    for i, job_id in enumerate(ids):
+        doc = {
+            "chain_job_id": job_id,
+            "job_number": int(job_id),
+            "chain_id": 11155111,
+            "title": f"Load test job {job_id}",
+            "description": "Build an HTTP handler that returns status 200 with an ok body.",
+            "client_name": GOD_USERS[0]["name"],
+            "freelancer_name": GOD_USERS[1 + i % (len(GOD_USERS) - 1)]["name"],
+            "amount_mnee": 10.0,
+            "status": "OPEN",
+            "tags": ["python", "api"][: 1 + i % 2],
+            "applicants": [],
+            "created_at": now,
+        }
+        if args.chain == "stub":
+            doc["onchain"] = {
+                "description": doc["description"], "amount": 10.0, "block": 0,
+                "client": GOD_USERS[0]["address"], "freelancer": GOD_USERS[1]["address"],
+                "is_settled": False, "is_approved": False,
+            }
+        docs.append(doc)
+    await db.jobs.delete_many({"chain_job_id": {"$in": ids}})
+    await db.jobs.insert_many(docs)
+    return ids
+
+
+# --- Load generation ---
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies: list[float], failures: int, elapsed: float) -> dict:
+    ms = [s * 1000 for s in latencies]
+    return {
+        "requests": len(latencies) + failures,
+        "failures": failures,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+async def run_load(total: int, concurrency: int, request) -> tuple[list[float], int, float]:
+    """Calls `request(i)` total times with at most `concurrency` in flight."""
+    latencies, failures = [], 0
+    counter = iter(range(total))
+
+    async def user():
+        nonlocal failures
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await request(i)
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[user() for _ in range(concurrency)])
+    return latencies, failures, time.perf_counter() - start
+
+
+async def scenario_submit(client, args, job_ids) -> dict:
+    """
+    POST /submit-work, then poll the status endpoint until the worker finishes it.
+    Latencies are end to end (upload to verdict); post_* covers the upload request alone.
+    """
+    body = ("def handler(event, context):\n    return {'status': 200, 'body': 'ok'}\n" * 64)[: args.file_kb * 1024]
+    posted = []
+
+    async def request(i):
+        files = [("files", (f"module_{n}.py", f"# submission {i}\n{body}", "text/x-python")) for n in range(args.files)]
+        # Unique notes per request so the verdict cache never answers for the fake LLM; one job
+        # per request (while --requests <= --jobs) so admission control does not throttle them
+        data = {"jobId": job_ids[i % len(job_ids)], "notes": f"load test submission {i}"}
+        start = time.perf_counter()
+        response = await client.post("/submit-work", data=data, files=files)
+        if response.status_code != 200:
+            return False
+        posted.append(time.perf_counter() - start)
+        submission_id = response.json()["submission_id"]
+        deadline = start + args.submission_timeout
+        while time.perf_counter() < deadline:
+            status = (await client.get(f"/submissions/{submission_id}/status")).json()
+            if status["status"] in ("DONE", "FAILED"):
+                return status["status"] == "DONE"
+            await asyncio.sleep(args.poll_ms / 1000)
+        return False
+
+    latencies, failures, elapsed = await run_load(args.requests, args.concurrency, request)
+    result = summarize(latencies, failures, elapsed)
+    result["post_p50_ms"] = round(percentile([s * 1000 for s in posted], 50), 2)
+    result["post_p95_ms"] = round(percentile([s * 1000 for s in posted], 95), 2)
+    return result
+
+
+async def scenario_jobs(client, args, job_ids) -> dict:
+    """GET /jobs, following X-Next-Cursor for --pages pages."""
+    async def request(i):
+        cursor = None
+        for _ in range(args.pages):
+            params = {"limit": 50, "view": args.view, **({"cursor": cursor} if cursor else {})}
+            response = await client.get("/jobs", params=params)
+            if response.status_code != 200:
+                return False
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        return True
+
+    return summarize(*await run_load(args.requests, args.concurrency, request))
+
+
+async def scenario_submissions(client, args, job_ids) -> dict:
+    async def request(i):
+        response = await client.get(f"/submissions/{random.choice(job_ids)}", params={"limit": 50, "view": args.view})
+        return response.status_code == 200
+
+    return summarize(*await run_load(args.requests, args.concurrency, request))
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), falling back to the peak."""
+    try:
+        with open("/proc/self/statm") as file:
+            return round(int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 2**20 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+async def run(args) -> dict:
+    from app import database
+    if args.mongo_uri:
+        database.MONGO_URI = args.mongo_uri
+    else:
+        use_mongomock()
+        # mongomock cannot evaluate the $substrCP previews of the summary projection
+        args.view = args.view or "full"
+    args.view = args.view or "summary"
+
+    from app import similarity, blob_store
+    similarity.VECTOR_INDEX_DIR = tempfile.mkdtemp(prefix="teleo-loadtest-vectors-")
+    blob_store.BLOB_DIR = tempfile.mkdtemp(prefix="teleo-loadtest-blobs-")
+
+    import main
+    import app_logic
+    from app import job_queue, payouts, chain
+    from app.services import services
+
+    fake = FakeGemini(args.llm_latency_ms, args.llm_latency_sigma, args.llm_error_rate, args.llm_pass_rate)
+    services.judge.ai.client.aio.models.generate_content = fake.generate_content
+    services.judge.ai.client.aio.models.generate_content_stream = fake.generate_content_stream
+    services.judge.ai.client.aio.models.embed_content = fake.embed_content
+    stub_sender = None
+    if args.chain == "stub":
+        stub_sender = StubPayoutSender(args.rpc_latency_ms)
+        chain.get_payout_sender = lambda chain_id=None: stub_sender
+
+    await database.connect_to_mongo()
+    job_ids = await seed_jobs(args)
+    job_queue.start_workers(app_logic.process_submission, args.workers)
+    if args.chain == "node":
+        payouts.start_receipt_watcher()
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        for name in args.scenarios:
+            rss_before = rss_mb()
+            stats = await globals()[f"scenario_{name}"](client, args, job_ids)
+            stats["rss_mb_before"] = rss_before
+            stats["rss_mb_after"] = rss_mb()
+            stats["peak_rss_mb"] = peak_rss_mb()
+            results[name] = stats
+            print(format_row(name, stats), flush=True)
+
+    await job_queue.stop_workers()
+    if args.chain == "node":
+        await payouts.stop_receipt_watcher()
+    await services.aclose()
+    await database.close_mongo_connection()
+
+    results["llm"] = {"calls": fake.calls, "injected_errors": fake.errors}
+    if stub_sender:
+        results["payouts"] = {"sent": stub_sender.sent}
+    return results
+
+
+# --- Reporting ---
+
+HEADER = f"{'scenario':<13}{'reqs':>6}{'fail':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>9}"
+
+
+def format_row(name: str, stats: dict) -> str:
+    return (f"{name:<13}{stats['requests']:>6}{stats['failures']:>6}{stats['throughput_rps']:>9}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['rss_mb_after']:>9}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    print(f"\nvs {baseline_path} (commit {baseline.get('commit')})")
+    for name in SCENARIOS:
+        old, new = baseline["results"].get(name), current["results"].get(name)
+        if not old or not new:
+            continue
+        p95 = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+        rps = (new["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] * 100 if old["throughput_rps"] else 0.0
+        print(f"{name:<13} p95 {old['p95_ms']:>9} -> {new['p95_ms']:<9} ({p95:+.1f}%)   "
+              f"rps {old['throughput_rps']:>8} -> {new['throughput_rps']:<8} ({rps:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8, help="judge workers in the app")
+    parser.add_argument("--jobs", type=int, default=500, help="jobs seeded into Mongo")
+    parser.add_argument("--first-job-id", type=int, default=0)
+    parser.add_argument("--files", type=int, default=3, help="files per submission")
+    parser.add_argument("--file-kb", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=3, help="/jobs pages followed per request")
+    parser.add_argument("--view", choices=("summary", "full"), help="list projection (default summary, full on mongomock)")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-latency-sigma", type=float, default=0.4)
+    parser.add_argument("--llm-error-rate", type=float, default=0.02)
+    parser.add_argument("--llm-pass-rate", type=float, default=0.7)
+    parser.add_argument("--chain", choices=("stub", "node"), default="stub")
+    parser.add_argument("--rpc-latency-ms", type=float, default=50)
+    parser.add_argument("--mongo-uri", help="use a real mongod instead of mongomock")
+    parser.add_argument("--poll-ms", type=float, default=100)
+    parser.add_argument("--submission-timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="result file (default benchmarks/results/loadtest-<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    print(HEADER)
+    results = asyncio.run(run(args))
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "results": results,
+    }
+
+    out = args.out or os.path.join(
+        BACKEND_DIR, "benchmarks", "results",
+        f"loadtest-{report['commit']}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nresults written to {out}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
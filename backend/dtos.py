@@ -1,8 +1,10 @@
-from dataclasses import Field
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Annotated
 from datetime import datetime
-from pydantic import ConfigDict
+from pydantic import ConfigDict, BeforeValidator
+
+# Mongo _id: an ObjectId in the database, a string in responses
+ObjectIdStr = Annotated[str, BeforeValidator(str)]
 
 class Submission(BaseModel):
     jobId: str
@@ -37,4 +39,45 @@ class SubmissionModel(BaseModel):
     verdict: str
     reason: str
     tx_hash: Optional[str] = None
-    created_at: str
\ No newline at end of file
+    created_at: str
+
+
+class JobSummary(BaseModel):
+    """One row of GET /jobs (view=summary). The list projection is built from these fields."""
+    id: ObjectIdStr = Field(alias="_id")
+    chain_job_id: str
+    job_number: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None  # first PREVIEW_CHARS
+    amount_mnee: Optional[float] = None
+    client_address: Optional[str] = None
+    client_name: Optional[str] = None
+    tags: Optional[List[str]] = []
+    freelancer_address: Optional[str] = None
+    freelancer_name: Optional[str] = None
+    status: Optional[str] = None
+    applicants: Optional[List[str]] = []
+    chain_id: Optional[int] = None
+    tx_hash: Optional[str] = None
+    created_at: Optional[datetime] = None
+    onchain: Optional[dict] = None  # with onchain=true, read from the chain, not stored
+
+    model_config = ConfigDict(populate_by_name=True)
+
+class SubmissionSummary(BaseModel):
+    """One row of GET /submissions/{jobId} (view=summary). The list projection is built from these fields."""
+    id: ObjectIdStr = Field(alias="_id")
+    chain_job_id: str
+    freelancer_name: Optional[str] = None
+    notes: Optional[str] = None  # first PREVIEW_CHARS
+    files: List[str] = []
+    verdict: Optional[str] = None
+    reason: Optional[str] = None
+    status: Optional[str] = None
+    tx_hash: Optional[str] = None
+    payout_status: Optional[str] = None
+    similar_submissions: Optional[List[dict]] = None
+    review_mode: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -1,19 +1,39 @@
 import os
+import threading
 from dotenv import load_dotenv
 load_dotenv()
-import requests
 import json
+from app.constants import SEPOLIA_CHAIN_ID
 
-RPC_URL = os.getenv("SEPOLIA_RPC_URL")
+RPC_URL = os.getenv("SEPOLIA_RPC_URL")  # comma-separated for failover
+# The chain RPC_URL serves; jobs and requests that name no chain mean this one
+DEFAULT_CHAIN_ID = int(os.getenv("DEFAULT_CHAIN_ID", SEPOLIA_CHAIN_ID))
+# Other chains: {"<chain_id>": {"rpc_urls": [...], "escrow_address": "0x...", "start_block": 0}}
+CHAINS = os.getenv("CHAINS")
 PRIVATE_KEY = os.getenv("JUDGE_PRIVATE_KEY")
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 JSON_URL = os.getenv("JSON_URL")
 GOOGLE_APP_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "creds.json")
 
-# Download Google vertex Json
-response = requests.get(JSON_URL)
-if response.status_code == 200:
-    os.makedirs(os.path.dirname(GOOGLE_APP_CREDENTIALS), exist_ok=True)
-    with open(GOOGLE_APP_CREDENTIALS, "w") as file:
-        json_f = response.json()
-        json.dump(json_f, file)
\ No newline at end of file
+_credentials_lock = threading.Lock()
+
+
+def ensure_google_credentials() -> str:
+    """
+    Downloads the Google vertex Json the first time it is needed.
+    An existing file is reused, so the download happens once per container, not per import.
+    Returns the credentials path.
+    """
+    with _credentials_lock:
+        if os.path.exists(GOOGLE_APP_CREDENTIALS) or not JSON_URL:
+            return GOOGLE_APP_CREDENTIALS
+
+        import requests
+        response = requests.get(JSON_URL, timeout=10)
+        if response.status_code == 200:
+            if os.path.dirname(GOOGLE_APP_CREDENTIALS):
+                os.makedirs(os.path.dirname(GOOGLE_APP_CREDENTIALS), exist_ok=True)
+            with open(GOOGLE_APP_CREDENTIALS, "w") as file:
+                json_f = response.json()
+                json.dump(json_f, file)
+        return GOOGLE_APP_CREDENTIALS
@@ -1,16 +1,50 @@
-from fastapi import FastAPI, HTTPException
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi import Form, File, UploadFile
 from typing import List
-from dtos import JobModel, Optional
+from dtos import JobModel, JobSummary, SubmissionSummary, Optional
 from app.constants import GOD_USERS
 import app_logic
 from app.database import connect_to_mongo, close_mongo_connection
+from app.job_queue import start_workers, stop_workers
+from app.indexer import start_indexer, stop_indexer
+from app.payouts import start_receipt_watcher, stop_receipt_watcher
+from app.batch_payouts import start_batch_scheduler, stop_batch_scheduler
+from app.services import services
+from app import metrics, profiling, similarity, blob_store, admission
+from app.progress import format_sse
+from app.serialization import json_response
+from app.change_feed import start_change_feed, stop_change_feed
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Only cheap, local setup here: web3, credentials and the LLM client are created on first use
+    await connect_to_mongo()
+    start_workers(app_logic.process_submission)
+    start_indexer()
+    start_receipt_watcher()
+    start_batch_scheduler()
+    similarity.start_embedding_sync()
+    start_change_feed()
+    yield
+    await stop_workers()
+    await stop_indexer()
+    await stop_batch_scheduler()
+    await stop_receipt_watcher()
+    await similarity.stop_embedding_sync()
+    await stop_change_feed()
+    await services.aclose()
+    await close_mongo_connection()
+
 
 app = FastAPI(
     title="Teleo AI Backend",
     description="Backend service for Teleo AI Code Review and Payout System",
     docs_url="/api/docs",
+    lifespan=lifespan,
     )
 
 
@@ -19,16 +53,25 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-File", "ETag"],
 )
 
-@app.on_event("startup")
-async def startup_db_client():
-    await connect_to_mongo()
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    await close_mongo_connection()
-
+@app.middleware("http")
+async def observe_requests(request, call_next):
+    start = time.perf_counter()
+    if profiling.wants_profile(request):
+        response = await profiling.profile_request(request, call_next)
+    else:
+        response = await call_next(request)
+    # Label by route template (/jobs/{jobId}), not the raw path, to keep series bounded
+    route = request.scope.get("route")
+    metrics.HTTP_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=route.path if route else "unmatched",
+        status=response.status_code,
+    )
+    return response
 
 @app.get("/")
 def read_root():
@@ -38,18 +81,49 @@ def read_root():
 async def submit_work_endpoint(
     jobId: str = Form(...),
     notes: Optional[str] = Form(None),
-    files: List[UploadFile] = File(default=[])
+    files: List[UploadFile] = File(default=[]),
+    chainId: Optional[int] = Form(None),
 ):
     try:
-        result = await app_logic.submit_work(jobId, notes, files)
-        if not result:
-            raise HTTPException(status_code=404, detail="Job not found on chain")
-        elif result.get("status") == "FAIL":
-            raise HTTPException(status_code=400, detail=result.get("reason", "Submission failed"))
-        
-        return result
+        result = await app_logic.submit_work(jobId, notes, files, chainId)
+    except admission.Throttled as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except blob_store.BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return result
+
+@app.get("/submissions/{submissionId}/status")
+async def get_submission_status(submissionId: str):
+    try:
+        result = await app_logic.get_submission_status(submissionId)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    return result
+
+@app.get("/submissions/{submissionId}/events")
+async def stream_submission_events(submissionId: str):
+    """Server-Sent Events: status changes and the early verdict, until the submission is settled."""
+    if not await app_logic.get_submission_status(submissionId):
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    return event_stream(app_logic.submission_events(submissionId))
+
+def event_stream(events) -> StreamingResponse:
+    async def frames():
+        async for event in events:
+            yield format_sse(event)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.post("/jobs")
 async def index_job(job: JobModel):
@@ -59,13 +133,86 @@ async def index_job(job: JobModel):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/jobs")
-async def list_jobs(chainId: int = None):
+@app.post("/jobs/bulk")
+async def index_jobs(jobs: List[JobModel]):
+    """Upserts many jobs in one round trip (migrations, frontend resyncs); per-job results in request order."""
     try:
-        result = await app_logic.list_jobs(chainId)
-        return result
+        return await app_logic.index_jobs(jobs)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# The list routes serialize with orjson (json_response), so their schema is documented with
+# `responses` rather than enforced by a response_model; view=full returns the stored documents
+@app.get("/jobs", responses={200: {"model": List[JobSummary], "description": "One page of jobs (view=summary)"}})
+async def list_jobs(
+    request: Request,
+    chainId: int = None,
+    onchain: bool = False,
+    status: Optional[str] = None,
+    tag: Optional[str] = None,
+    applicant: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    view: str = "summary",
+):
+    try:
+        result, next_cursor = await app_logic.list_jobs(
+            chainId, include_onchain=onchain, status=status, tag=tag, applicant=applicant,
+            cursor=cursor, limit=limit, view=view,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return json_response(request, result, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+# /jobs/events and /jobs/similar are declared before /jobs/{jobId}, which would otherwise match them
+@app.get("/jobs/events")
+async def stream_job_board_events(chainId: int = None):
+    """Server-Sent Events: new jobs and job status changes, replacing polls of /jobs."""
+    return event_stream(app_logic.job_board_events(chainId))
+
+@app.get("/jobs/similar")
+async def find_similar_jobs(jobId: Optional[str] = None, q: Optional[str] = None, k: int = 5):
+    try:
+        return await app_logic.find_similar_jobs(jobId=jobId, text=q, k=k)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/jobs/{jobId}")
+async def get_job(jobId: str, request: Request, chainId: int = None):
+    try:
+        result = await app_logic.get_job(jobId, chainId)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not result:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return json_response(request, result)
+
+@app.get("/jobs/{jobId}/events")
+async def stream_job_events(jobId: str):
+    """Server-Sent Events: the job's status changes and its new or updated submissions."""
+    return event_stream(app_logic.job_events(jobId))
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/judge/cache-stats")
+async def get_verdict_cache_stats():
+    return (await services.aget_judge()).cache.get_stats()
+
+@app.get("/judge/router-stats")
+async def get_judge_router_stats():
+    return (await services.aget_judge()).router.get_stats()
+
+@app.get("/similarity/stats")
+def get_similarity_stats():
+    return similarity.get_stats()
 
 @app.get("/users")
 async def get_users():
@@ -74,10 +221,11 @@ async def get_users():
 @app.post("/assign")
 async def assign_freelancer(
     jobId: str = Form(...),
-    freelancerName: str = Form(...)
+    freelancerName: str = Form(...),
+    chainId: Optional[int] = Form(None),
 ):
     try:
-        await app_logic.assign_freelancer(jobId, freelancerName)
+        await app_logic.assign_freelancer(jobId, freelancerName, chainId)
         return {"status": "OK", "message": f"Freelancer {freelancerName} assigned to job {jobId}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -85,18 +233,31 @@ async def assign_freelancer(
 @app.post("/apply")
 async def apply_to_job(
     jobId: str = Form(...), 
-    applicantName: str = Form(...)
+    applicantName: str = Form(...),
+    chainId: Optional[int] = Form(None),
 ):
     try:
-        result = await app_logic.apply_to_job(jobId, applicantName)
+        result = await app_logic.apply_to_job(jobId, applicantName, chainId)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-@app.get("/submissions/{jobId}")
-async def get_submissions(jobId: str):
+@app.get("/submissions/{jobId}", responses={200: {"model": List[SubmissionSummary], "description": "One page of submissions (view=summary)"}})
+async def get_submissions(
+    jobId: str,
+    request: Request,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    view: str = "summary",
+    chainId: int = None,
+):
     try:
-        result = await app_logic.get_submissions(jobId)
-        return result
+        result, next_cursor = await app_logic.get_submissions(
+            jobId, status=status, cursor=cursor, limit=limit, view=view, chain_id=chainId
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    return json_response(request, result, {"X-Next-Cursor": next_cursor} if next_cursor else None)
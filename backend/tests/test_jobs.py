@@ -0,0 +1,77 @@
+import asyncio
+import datetime
+import pytest
+from bson import ObjectId
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+from fastapi.testclient import TestClient
+
+import main
+from app import admission, database
+from init_env import DEFAULT_CHAIN_ID
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No lifespan: the routes only need the database
+    monkeypatch.setattr(database.db, "db", mongomock_motor.AsyncMongoMockClient()["test"])
+    return TestClient(main.app)
+
+
+def test_get_job_during_review(client):
+    """The job's review lease holds an ObjectId; it stays out of the response."""
+    lease = {
+        "submission_id": ObjectId(),
+        "content_hash": "abc",
+        "expires_at": datetime.datetime.now() + datetime.timedelta(minutes=15),
+    }
+    job = {"chain_id": DEFAULT_CHAIN_ID, "chain_job_id": "7", "job_number": 7, "title": "Build it", "status": "ASSIGNED", "review_lease": lease}
+    asyncio.run(database.get_database().jobs.insert_one(job))
+
+    response = client.get("/jobs/7")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["chain_job_id"] == "7"
+    assert body["_id"] == str(job["_id"])
+    assert "review_lease" not in body
+
+
+def test_get_missing_job(client):
+    assert client.get("/jobs/8").status_code == 404
+
+
+def test_same_job_id_on_two_chains(client):
+    jobs = database.get_database().jobs
+    asyncio.run(jobs.insert_many([
+        {"chain_id": DEFAULT_CHAIN_ID, "chain_job_id": "7", "title": "default chain"},
+        {"chain_id": 8453, "chain_job_id": "7", "title": "other chain"},
+    ]))
+
+    assert client.get("/jobs/7").json()["title"] == "default chain"
+    assert client.get("/jobs/7", params={"chainId": 8453}).json()["title"] == "other chain"
+
+
+def test_reclaim_renews_review_lease(client):
+    """A submission reclaimed after its worker died keeps the job's review lease."""
+    db = database.get_database()
+    now = datetime.datetime.now()
+    submission = {"_id": ObjectId(), "chain_id": DEFAULT_CHAIN_ID, "chain_job_id": "7"}
+    lease = {"submission_id": submission["_id"], "content_hash": "abc", "expires_at": now + datetime.timedelta(seconds=5)}
+    asyncio.run(db.jobs.insert_one({"chain_id": DEFAULT_CHAIN_ID, "chain_job_id": "7", "review_lease": lease}))
+
+    asyncio.run(admission.renew_review_lease(submission))
+    renewed = asyncio.run(db.jobs.find_one({"chain_job_id": "7"}))["review_lease"]
+    assert renewed["expires_at"] > now + datetime.timedelta(seconds=admission.REVIEW_LEASE_SECONDS - 60)
+    assert renewed["submission_id"] == submission["_id"]
+
+    # Another submission's claim leaves the lease alone
+    asyncio.run(admission.renew_review_lease({**submission, "_id": ObjectId()}))
+    assert asyncio.run(db.jobs.find_one({"chain_job_id": "7"}))["review_lease"] == renewed
+
+
+def test_list_schemas_documented(client):
+    paths = client.get("/openapi.json").json()["paths"]
+    jobs = paths["/jobs"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    submissions = paths["/submissions/{jobId}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert jobs["items"]["$ref"].endswith("/JobSummary")
+    assert submissions["items"]["$ref"].endswith("/SubmissionSummary")
@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from app import database, job_queue, prescreen
+from init_env import DEFAULT_CHAIN_ID
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(database.db, "db", mongomock_motor.AsyncMongoMockClient()["test"])
+    return database.get_database()
+
+
+def judged(jobId: str, notes: str, documents: list[dict], verdict: str = "PASS") -> dict:
+    return {
+        "chain_id": DEFAULT_CHAIN_ID, "chain_job_id": jobId, "status": job_queue.DONE, "verdict": verdict, "reason": "ok",
+        "content_hash": prescreen.content_hash(notes, documents), "created_at": 0,
+    }
+
+
+def test_notes_only_submissions_are_not_duplicates(db):
+    asyncio.run(db.submissions.insert_one(judged("1", "Done, see the repo link.", [])))
+
+    result = asyncio.run(prescreen.prescreen("2", "Done, see the repo link.", []))
+    assert result["verdict"] is None
+
+
+def test_copied_files_are_duplicates(db):
+    code = "def handler(event):\n    return {'status': 200}\n" * 10
+    documents = [{"name": "main.py", "text": code, "size": len(code), "binary": False, "truncated": False}]
+    asyncio.run(db.submissions.insert_one(judged("1", "first", documents)))
+
+    result = asyncio.run(prescreen.prescreen("2", "second", documents))
+    assert result["verdict"] == "FAIL"
+    assert "Job #1" in result["reason"]
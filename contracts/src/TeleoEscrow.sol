@@ -29,6 +29,7 @@ contract TeleoEscrow is Ownable {
     event JobCreated(uint256 indexed jobId, address client, address freelancer, uint256 amount);
     event JobCompleted(uint256 indexed jobId, string verdict);
     event JobRefunded(uint256 indexed jobId);
+    event JobReleaseFailed(uint256 indexed jobId, string reason);
 
     constructor(address _mneeTokenAddress, address _judgeAddress) Ownable(msg.sender) {
         mneeToken = IERC20(_mneeTokenAddress);
@@ -78,6 +79,34 @@ contract TeleoEscrow is Ownable {
         emit JobCompleted(_jobId, "PASS");
     }
 
+    // 2b. JUDGE releases funds for many approved jobs in one transaction.
+    // A job that cannot be paid is skipped (JobReleaseFailed) instead of reverting the batch.
+    function releaseFundsBatch(uint256[] calldata _jobIds) external onlyJudge {
+        for (uint256 i = 0; i < _jobIds.length; i++) {
+            uint256 jobId = _jobIds[i];
+            Job storage job = jobs[jobId];
+            if (job.isSettled) {
+                emit JobReleaseFailed(jobId, "Job already settled");
+                continue;
+            }
+
+            job.isSettled = true;
+            job.isApproved = true;
+
+            // Pay the Freelancer; a failed transfer only rolls back this job
+            try mneeToken.transfer(job.freelancer, job.amount) returns (bool ok) {
+                if (ok) {
+                    emit JobCompleted(jobId, "PASS");
+                    continue;
+                }
+            } catch {}
+
+            job.isSettled = false;
+            job.isApproved = false;
+            emit JobReleaseFailed(jobId, "Transfer to freelancer failed");
+        }
+    }
+
     // 3. JUDGE refunds client (AI says FAIL/Timeout)
     function refundClient(uint256 _jobId) external onlyJudge {
         Job storage job = jobs[_jobId];
@@ -29,10 +29,7 @@ export default function JobDetail() {
   // Load Job
   const fetchJob = () => {
     if (!jobId) return;
-    axios.get(`${API_URL}/jobs`).then(res => {
-      const found = res.data.find((j: any) => j.chain_job_id == jobId);
-      if (found) setJob(found);
-    }).catch(err => console.error(err));
+    axios.get(`${API_URL}/jobs/${jobId}`).then(res => setJob(res.data)).catch(err => console.error(err));
   };
 
   // Fetch history
@@ -46,6 +43,23 @@ export default function JobDetail() {
     fetchHistory();
   }, [jobId]);
 
+  // Live updates: job status changes and new or judged submissions are pushed over SSE
+  useEffect(() => {
+    if (!jobId || typeof EventSource === 'undefined') return;
+    const source = new EventSource(`${API_URL}/jobs/${jobId}/events`);
+    source.addEventListener('job', (e) => {
+      const update = JSON.parse((e as MessageEvent).data);
+      setJob((prev: any) => prev ? { ...prev, ...update } : prev);
+    });
+    source.addEventListener('submission', (e) => {
+      const { submission_id, ...update } = JSON.parse((e as MessageEvent).data);
+      setHistory(prev => prev.some(sub => sub._id === submission_id)
+        ? prev.map(sub => sub._id === submission_id ? { ...sub, ...update } : sub)
+        : [{ _id: submission_id, ...update }, ...prev]);
+    });
+    return () => source.close();
+  }, [jobId]);
+
   // --- LOGIC HELPERS ---
   const isOwner = currentUser?.name === job?.client_name;
   const isAssignedToMe = job?.freelancer_name === currentUser?.name;
@@ -100,21 +114,54 @@ export default function JobDetail() {
           headers: { 'Content-Type': 'multipart/form-data' }
       });
 
-      if (res.data.verdict === 'PASS') {
+      // Review + payout run in the background: follow progress until the judge is done
+      addLog(`> Submission queued (${res.data.submission_id}). Awaiting verdict...`, "#888");
+      let result = res.data;
+      if (result.status !== 'DONE' && result.status !== 'FAILED') {
+        result = await followSubmission(res.data.submission_id);
+      }
+
+      if (result.verdict === 'PASS' && result.status === 'DONE') {
         addLog("✅ VERDICT: PASS", "#00D084");
-        addLog(`TX Hash: ${res.data.tx_hash || '0x...'}`, "#2196F3");
+        addLog(`TX Hash: ${result.tx_hash || '0x...'}`, "#2196F3");
         setVerdict('PASS');
         setJob((prev: any) => ({ ...prev, status: 'PAID' }));
       } else {
         addLog("❌ VERDICT: FAIL", "#ff4444");
-        addLog(`Reason: ${res.data.reason}`, "#ff4444");
+        addLog(`Reason: ${result.reason}`, "#ff4444");
         setVerdict('FAIL');
       }
+      fetchHistory();
     } catch (err) {
       addLog("System Error: Could not reach Judge.", "red");
     } finally { setIsJudging(false); }
   };
 
+  // Streams progress over SSE (early verdict included); falls back to polling if the stream fails
+  const followSubmission = (submissionId: string): Promise<any> => new Promise((resolve) => {
+    const pollUntilDone = async () => {
+      let result = (await axios.get(`${API_URL}/submissions/${submissionId}/status`)).data;
+      while (result.status !== 'DONE' && result.status !== 'FAILED') {
+        await sleep(2000);
+        result = (await axios.get(`${API_URL}/submissions/${submissionId}/status`)).data;
+      }
+      resolve(result);
+    };
+    if (typeof EventSource === 'undefined') { pollUntilDone(); return; }
+
+    const source = new EventSource(`${API_URL}/submissions/${submissionId}/events`);
+    source.addEventListener('verdict', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      addLog(`> Judge leaning ${data.verdict}, finishing review...`, "#888");
+    });
+    source.addEventListener('status', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      if (data.status === 'PAYING') addLog("> Approved. Sending payout...", "#888");
+      if (data.status === 'DONE' || data.status === 'FAILED') { source.close(); resolve(data); }
+    });
+    source.onerror = () => { source.close(); pollUntilDone(); };
+  });
+
   const addLog = (text: string, color: string) => setLogs(prev => [...prev, { text, color }]);
   const sleep = (ms: number) => new Promise(r => setTimeout(r, ms));
 
@@ -235,7 +282,7 @@ export default function JobDetail() {
                     <div key={idx} className={`${styles.historyCard} ${sub.verdict === 'PASS' ? styles.pass : styles.fail}`}>
                         <div className={styles.historyHeader}>
                             <span style={{color: sub.verdict==='PASS'?'#065f46':'#b91c1c'}}>
-                                {sub.verdict === 'PASS' ? '✅ ACCEPTED & PAID' : '❌ REJECTED'}
+                                {!sub.verdict ? '⏳ UNDER REVIEW' : sub.verdict === 'PASS' ? '✅ ACCEPTED & PAID' : '❌ REJECTED'}
                             </span>
                             <span style={{color:'#888'}}>
                                 {new Date(sub.created_at).toLocaleString()}
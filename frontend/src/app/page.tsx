@@ -33,6 +33,19 @@ export default function Home() {
     fetchJobs();
   }, [network.id]);
 
+  // Live updates: new jobs and status changes are pushed over SSE instead of re-fetching
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return;
+    const source = new EventSource(`${API_URL}/jobs/events?chainId=${network.id}`);
+    source.addEventListener('job', (e) => {
+      const update = JSON.parse((e as MessageEvent).data);
+      setJobs(prev => prev.some(job => job.chain_job_id === update.chain_job_id)
+        ? prev.map(job => job.chain_job_id === update.chain_job_id ? { ...job, ...update } : job)
+        : [update, ...prev]);
+    });
+    return () => source.close();
+  }, [network.id]);
+
   return (
     <main>
       <Navbar />